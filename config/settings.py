@@ -83,10 +83,39 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # 쓰기 트랜잭션은 BEGIN 시점에 write lock을 잡는다 (읽기→쓰기 승격 중 'database is locked' 방지)
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
 
+# Cache
+# 'balances': 품목별 InventoryBalance 읽기 캐시 (inventory.services.balance_cache).
+# locmem 은 프로세스별 LRU(MAX_ENTRIES 초과 시 오래 안 쓴 키부터 제거)라서, 다른 프로세스의 쓰기는
+# TIMEOUT 이 지나야 보인다. 여러 프로세스로 띄우면 FileBasedCache/DatabaseCache 로 바꾼다.
+# 'valuation': 재고 평가액 집계 캐시 (inventory.services.valuation). 쓰기 후 지우는 것은 쓴 프로세스뿐이라
+# 다른 프로세스에서는 최대 TIMEOUT 만큼 옛 집계가 보인다 ('balances' 와 같은 제약).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'balances': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'inventory-balances',
+        'TIMEOUT': 60,
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+    'valuation': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'inventory-valuation',
+        'TIMEOUT': 60,
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -122,3 +151,30 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+
+# Inventory
+# StockMovement 중 이 기간(일)보다 오래된 행은 archive_movements 가 StockMovementArchive로 옮긴다 (월 단위로 끊음)
+INVENTORY_CLOSED_PERIOD_DAYS = 365
+
+# 발주 제안(plan_replenishment): 기본 운송수단별 리드타임(일), 안전재고/검토주기(일)
+INVENTORY_LEAD_TIME_DAYS = {"OCEAN": 35, "AIR": 4}
+INVENTORY_SAFETY_STOCK_DAYS = 7
+INVENTORY_REVIEW_PERIOD_DAYS = 14
+
+# get_balances() 가 쓰는 CACHES alias
+INVENTORY_BALANCE_CACHE = "balances"
+# get_valuation() 이 쓰는 CACHES alias
+INVENTORY_VALUATION_CACHE = "valuation"
+
+
+# FX
+# FXDailyRate 달력: 끝이 없는 환율 기간을 오늘부터 며칠 뒤까지 펼칠지 (rebuild_fx_calendar 를 매일 돌려 연장)
+FX_DAILY_RATE_HORIZON_DAYS = 90
+# 프로세스마다 들고 있는 환율 인덱스(fx.services.get_index)가 다른 워커의 기간 변경을 확인하는 주기(초)
+FX_INDEX_CHECK_SECONDS = 5
+
+
+# Sales
+# ISSUE 시 로트 차감 순서: "FIFO"(입고 순) / "FEFO"(유통기한 빠른 순)
+SALES_LOT_ALLOCATION_STRATEGY = "FIFO"
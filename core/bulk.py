@@ -0,0 +1,67 @@
+# core/bulk.py
+
+from django.db import connections, router
+
+from core.exports import chunked
+
+
+def update_fields_by_pk(model, objs, fields, *, batch_size: int = 2000) -> int:
+    """
+    objs 의 fields 값을 pk 기준으로 저장한다 (QuerySet.bulk_update 와 같은 결과, save()/시그널 없음).
+    bulk_update 는 행×필드 만큼 CASE WHEN 식을 만들고 resolve 해서 수천 행이면 수 초가 걸리므로,
+    "UPDATE ... SET f = %s WHERE pk = %s" 한 문장을 executemany 로 batch_size 행씩 실행한다.
+    값 변환은 각 필드의 get_db_prep_save 를 그대로 쓴다.
+    반환: 저장한 행 수
+    """
+    objs = list(objs)
+    if not objs:
+        return 0
+
+    meta = model._meta
+    columns = [meta.get_field(name) for name in fields]
+    connection = connections[router.db_for_write(model)]
+    qn = connection.ops.quote_name
+    sql = "UPDATE {} SET {} WHERE {} = %s".format(
+        qn(meta.db_table),
+        ", ".join(f"{qn(f.column)} = %s" for f in columns),
+        qn(meta.pk.column),
+    )
+
+    with connection.cursor() as cursor:
+        for batch in chunked(objs, batch_size):
+            cursor.executemany(sql, [
+                [f.get_db_prep_save(getattr(obj, f.attname), connection) for f in columns] + [obj.pk]
+                for obj in batch
+            ])
+    return len(objs)
+
+
+def insert_objs(model, objs, *, batch_size: int = 2000) -> int:
+    """
+    objs 를 새 행으로 저장한다 (QuerySet.bulk_create 와 같은 값, save()/시그널 없음, objs 에 pk 를 채우지 않음).
+    SQLite 에서 bulk_create 는 bind 변수 한도(999) 때문에 행×필드 수에 따라 INSERT 를 수십 번으로 나누므로,
+    "INSERT INTO ... VALUES (%s, ...)" 한 문장을 executemany 로 batch_size 행씩 실행한다.
+    값은 각 필드의 pre_save(add=True) (auto_now_add 등) → get_db_prep_save 를 그대로 쓴다.
+    반환: 저장한 행 수
+    """
+    objs = list(objs)
+    if not objs:
+        return 0
+
+    meta = model._meta
+    columns = [f for f in meta.concrete_fields if not f.generated and f is not meta.auto_field]
+    connection = connections[router.db_for_write(model)]
+    qn = connection.ops.quote_name
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        qn(meta.db_table),
+        ", ".join(qn(f.column) for f in columns),
+        ", ".join(["%s"] * len(columns)),
+    )
+
+    with connection.cursor() as cursor:
+        for batch in chunked(objs, batch_size):
+            cursor.executemany(sql, [
+                [f.get_db_prep_save(f.pre_save(obj, True), connection) for f in columns]
+                for obj in batch
+            ])
+    return len(objs)
@@ -0,0 +1,56 @@
+# core/exports.py
+
+import csv
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+
+
+# 한 번에 yield 할 CSV 행 수 (행마다 yield 하면 WSGI 쓰기 호출이 너무 많아짐)
+ROWS_PER_WRITE = 500
+
+# QuerySet.iterator() chunk 크기 (DB에서 한 번에 가져오는 행 수)
+DB_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """csv.writer가 쓴 문자열을 버퍼에 담지 않고 그대로 돌려주는 pseudo-file."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(filename: str, rows) -> StreamingHttpResponse:
+    """
+    rows(iterable of list/tuple)를 CSV로 스트리밍하는 응답.
+    - Excel에서 UTF-8 한글이 깨지지 않도록 BOM을 맨 앞에 한 번만 쓴다.
+    - rows는 generator여도 되고, 전체를 메모리에 올리지 않는다 (메모리 사용량 일정).
+    헤더 행도 rows의 앞부분에 그냥 포함시키면 된다.
+    """
+    writer = csv.writer(_Echo())
+
+    def generate():
+        yield "\ufeff"  # UTF-8 BOM
+        for batch in chunked(rows, ROWS_PER_WRITE):
+            yield "".join(writer.writerow(row) for row in batch)
+
+    response = StreamingHttpResponse(generate(), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def iter_values(queryset, *fields, chunk_size: int = DB_CHUNK_SIZE):
+    """
+    모델 인스턴스를 만들지 않고 values_list 튜플을 chunk 단위로 읽는다.
+    """
+    return queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def chunked(iterable, size: int = DB_CHUNK_SIZE):
+    """iterable을 size 개씩 list로 끊어서 돌려준다 (chunk 단위 일괄 조회용)."""
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
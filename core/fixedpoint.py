@@ -0,0 +1,76 @@
+# core/fixedpoint.py
+"""
+고정소수점(scaled int) 금액/환율 표현.
+
+값 v 를 소수 자릿수 places 의 정수 n = v * 10**places 로 들고 계산한다.
+- 곱셈은 정수 곱 (자릿수는 더해짐), 나눗셈/자릿수 줄이기는 div_half_even / div_ceil 로 한 번만 반올림
+- 저장 전 반올림 규칙은 DB 컬럼과 같다: DecimalField.decimal_places 자리, ROUND_HALF_EVEN
+  (Django 가 DecimalField 를 저장할 때 쓰는 format_number 와 같은 규칙)
+Decimal 기본 context(28자리) 로 계산하면 나눗셈마다 가수가 28자리까지 늘어나고 DB 에서 잘리므로,
+계산 결과를 컬럼 자릿수로 바로 만들 때 쓴다.
+"""
+
+from decimal import ROUND_HALF_EVEN, Decimal
+
+
+def field_places(model, name: str) -> int:
+    """모델 DecimalField 의 소수 자릿수."""
+    return model._meta.get_field(name).decimal_places
+
+
+def to_fixed(value, places: int) -> int:
+    """Decimal(또는 int/str/float 기본값) → places 자리 정수. 자릿수가 더 많으면 ROUND_HALF_EVEN."""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    scaled = value.scaleb(places)
+    n = int(scaled)
+    if n != scaled:  # 컬럼보다 자릿수가 많은 값만 반올림 (DB 에서 읽은 값은 그대로)
+        n = int(scaled.to_integral_value(rounding=ROUND_HALF_EVEN))
+    return n
+
+
+def from_fixed(n: int, places: int) -> Decimal:
+    """places 자리 정수 → Decimal (지수가 -places 라서 DB 에서 읽은 값과 같은 모양)."""
+    return Decimal(n).scaleb(-places)
+
+
+def div_half_even(n: int, d: int) -> int:
+    """n / d (d > 0) 를 정수로 ROUND_HALF_EVEN."""
+    q, r = divmod(n, d)
+    r2 = 2 * r
+    if r2 > d or (r2 == d and q & 1):
+        q += 1
+    return q
+
+
+def div_ceil(n: int, d: int) -> int:
+    """n / d (d > 0) 올림."""
+    return -(-n // d)
+
+
+def average_cost(old_qty: Decimal, old_avg: Decimal, in_qty: Decimal, in_value: Decimal, places: int = 4) -> Decimal:
+    """
+    이동평균원가 (old_qty*old_avg + in_value) / (old_qty + in_qty) 를 places 자리로.
+    in_value = Σ 입고수량*입고단가. 분모가 0 이면 0.
+    수량/평균원가는 4자리(InventoryBalance), in_value 는 자릿수 제한 없이 받아 정확히 계산한 뒤 한 번만 반올림한다.
+    """
+    def exp_places(value: Decimal) -> int:
+        return max(0, -value.as_tuple().exponent)
+
+    # 모두 같은 자릿수의 정수로 바꿔 정확히 더한 뒤 한 번만 반올림 (in_value 는 자릿수가 길 수 있음)
+    qty_places = max(exp_places(old_qty), exp_places(in_qty))
+    avg_places = exp_places(old_avg)
+    scale = max(qty_places + avg_places, exp_places(in_value))
+    total = (
+        to_fixed(old_qty, qty_places) * to_fixed(old_avg, avg_places) * 10 ** (scale - qty_places - avg_places)
+        + to_fixed(in_value, scale)
+    )
+    base_qty = to_fixed(old_qty, qty_places) + to_fixed(in_qty, qty_places)
+    if base_qty == 0:
+        return from_fixed(0, places)
+
+    # avg = (total / 10**scale) / (base_qty / 10**qty_places)
+    n, d = total * 10 ** (places + qty_places), base_qty * 10 ** scale
+    if d < 0:
+        n, d = -n, -d
+    return from_fixed(div_half_even(n, d), places)
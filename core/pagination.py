@@ -0,0 +1,50 @@
+# core/pagination.py
+
+from datetime import datetime
+
+from django.core import signing
+from django.db.models import Q
+
+
+CURSOR_SALT = "core.pagination.cursor"
+
+
+def encode_cursor(created_at: datetime, pk: int, **extra) -> str:
+    """
+    (created_at, id) 위치를 URL에 넣을 수 있는 문자열로 만든다.
+    extra에는 다음 페이지 계산에 필요한 값(예: 누적잔액)을 함께 실어 보낼 수 있다 (JSON 직렬화 가능 값만).
+    SECRET_KEY 로 서명하므로(django.core.signing) 클라이언트가 값을 바꾸면 decode_cursor 가 버린다.
+    """
+    payload = {"t": created_at.isoformat(), "id": pk, **extra}
+    return signing.dumps(payload, salt=CURSOR_SALT)
+
+
+def decode_cursor(cursor: str) -> dict | None:
+    """잘못된/빈/서명이 안 맞는 cursor는 None (= 첫 페이지)."""
+    if not cursor:
+        return None
+    try:
+        payload = signing.loads(cursor, salt=CURSOR_SALT)
+        payload["t"] = datetime.fromisoformat(payload["t"])
+        payload["id"] = int(payload["id"])
+        return payload
+    except (signing.BadSignature, ValueError, TypeError, KeyError):
+        return None
+
+
+def keyset_page(queryset, cursor: dict | None, *, page_size: int, field: str = "created_at"):
+    """
+    (field, id) 내림차순 keyset 페이지네이션.
+    OFFSET 없이 "cursor 보다 오래된 것" 조건 + LIMIT 이므로 몇 번째 페이지든 인덱스 범위 조회 1번이다.
+    (field, id) 복합 인덱스가 있어야 한다.
+
+    반환: (items, has_more)
+    """
+    qs = queryset.order_by(f"-{field}", "-id")
+    if cursor is not None:
+        qs = qs.filter(
+            Q(**{f"{field}__lt": cursor["t"]}) |
+            Q(**{field: cursor["t"], "id__lt": cursor["id"]})
+        )
+    items = list(qs[:page_size + 1])
+    return items[:page_size], len(items) > page_size
@@ -1,3 +1,96 @@
+import re
+import unittest
+from datetime import date
+
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
 
-# Create your tests here.
+from inventory.models import InventoryLot, StockMovement
+from pricing.models import QuoteLine
+from sales.models import LotAllocation, SalesInvoice
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite specific")
+class HotQueryPlanTests(TestCase):
+    """
+    자주 도는 조회(중복 OUT/IN 검사, 제안가 조회, 리포트 필터)가
+    인덱스를 타는지 EXPLAIN QUERY PLAN으로 확인한다.
+    인덱스가 빠지면 'SCAN <table>' (전체 스캔)이 나오므로 실패한다.
+    """
+
+    def assertNoFullScan(self, queryset, table: str):
+        plan = queryset.explain()
+        full_scan = re.search(rf"\bSCAN {table}\b(?! USING (COVERING )?INDEX)", plan)
+        self.assertIsNone(full_scan, f"Full table scan on {table}:\n{plan}")
+        self.assertRegex(plan, rf"SEARCH {table} USING (COVERING )?INDEX", plan)
+
+    def test_invoice_movement_duplicate_check_uses_index(self):
+        for movement_type in (StockMovement.OUT, StockMovement.IN):
+            qs = StockMovement.objects.filter(
+                movement_type=movement_type,
+                ref_table="sales_salesinvoice",
+                ref_id=1,
+            )
+            self.assertNoFullScan(qs, "inventory_stockmovement")
+
+    def test_suggested_price_lookup_uses_index(self):
+        qs = (
+            QuoteLine.objects
+            .filter(batch_id=1, product_id=1)
+            .order_by("-created_at")[:1]
+        )
+        self.assertNoFullScan(qs, "pricing_quoteline")
+
+    def test_sales_report_filter_uses_index(self):
+        qs = (
+            SalesInvoice.objects
+            .filter(status=SalesInvoice.ISSUED, issue_date__gte=date(2026, 1, 1), issue_date__lte=date(2026, 1, 31))
+            .order_by("-issue_date", "-id")
+        )
+        self.assertNoFullScan(qs, "sales_salesinvoice")
+
+    def test_customer_report_filter_uses_index(self):
+        qs = (
+            SalesInvoice.objects
+            .filter(
+                status=SalesInvoice.ISSUED,
+                customer_id=1,
+                issue_date__gte=date(2026, 1, 1),
+                issue_date__lte=date(2026, 1, 31),
+            )
+            .order_by("-issue_date", "-id")
+        )
+        self.assertNoFullScan(qs, "sales_salesinvoice")
+
+    def test_stock_card_page_uses_index(self):
+        qs = StockMovement.objects.filter(product_id=1).order_by("-created_at", "-id")[:200]
+        self.assertNoFullScan(qs, "inventory_stockmovement")
+
+    def test_fifo_open_lot_lookup_uses_index(self):
+        qs = (
+            InventoryLot.objects
+            .filter(product_id__in=[1, 2], qty_units_remaining__gt=0)
+            .order_by("product_id", "received_date", "id")
+        )
+        self.assertNoFullScan(qs, "inventory_inventorylot")
+
+    def test_lot_trace_uses_index(self):
+        qs = LotAllocation.objects.filter(lot_id=1).values("invoice_line__invoice__customer_id")
+        self.assertNoFullScan(qs, "sales_lotallocation")
+
+    def test_fefo_open_lot_lookup_uses_index(self):
+        qs = (
+            InventoryLot.objects
+            .filter(product_id__in=[1, 2], qty_units_remaining__gt=0)
+            .order_by("product_id", F("expiry_date").asc(nulls_last=True), "received_date", "id")
+        )
+        self.assertNoFullScan(qs, "inventory_inventorylot")
+
+    def test_expiring_lots_report_uses_index(self):
+        qs = InventoryLot.objects.filter(
+            qty_units_remaining__gt=0,
+            expiry_date__isnull=False,
+            expiry_date__lte=date(2026, 1, 31),
+        ).order_by("expiry_date", "id")
+        self.assertNoFullScan(qs, "inventory_inventorylot")
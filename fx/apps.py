@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class FxConfig(AppConfig):
     name = 'fx'
+
+    def ready(self):
+        import fx.signals  # noqa: F401
@@ -0,0 +1,24 @@
+# fx/management/commands/rebuild_fx_calendar.py
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from fx.services import daily_rate_horizon, rebuild_daily_rates
+
+
+class Command(BaseCommand):
+    help = (
+        "FXRatePeriod 를 날짜별 FXDailyRate 달력으로 펼친다.\n"
+        "기본: 오늘 ~ horizon 구간만 다시 만든다 (끝이 없는 기간을 매일 연장, cron 으로 실행).\n"
+        "--full: 전체를 다시 만든다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Rebuild the whole calendar")
+
+    def handle(self, *args, **opts):
+        if opts["full"]:
+            count = rebuild_daily_rates()
+        else:
+            count = rebuild_daily_rates(timezone.localdate(), daily_rate_horizon())
+        self.stdout.write(self.style.SUCCESS(f"FX calendar: {count} day(s) written (horizon {daily_rate_horizon()})."))
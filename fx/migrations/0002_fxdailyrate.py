@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fx', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FXDailyRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('krw_to_php', models.DecimalField(decimal_places=6, max_digits=12)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fx', '0002_fxdailyrate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fxrateperiod',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
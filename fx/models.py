@@ -18,6 +18,8 @@ class FXRatePeriod(models.Model):
     is_locked = models.BooleanField(default=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # 다른 프로세스의 환율 인덱스가 바뀐 행을 알아채는 stamp (fx.services.get_index)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-start_date"]
@@ -31,3 +33,20 @@ class FXRatePeriod(models.Model):
         if self.end_date is None:
             return self.start_date <= date_value
         return self.start_date <= date_value <= self.end_date
+
+
+class FXDailyRate(models.Model):
+    """
+    FXRatePeriod 를 날짜별로 펼친 달력 (fx.services.rebuild_daily_rates 가 관리, 직접 수정하지 않음).
+    리포트가 issue_date/received_date 로 join 해서 집계 쿼리 안에서 바로 환산할 수 있게 한다.
+    끝이 없는(open-ended) 기간은 오늘 + FX_DAILY_RATE_HORIZON_DAYS 까지만 펼친다.
+    """
+
+    date = models.DateField(unique=True)
+    krw_to_php = models.DecimalField(max_digits=12, decimal_places=6)
+
+    class Meta:
+        ordering = ["date"]
+
+    def __str__(self) -> str:
+        return f"FX {self.date.isoformat()} : {self.krw_to_php}"
@@ -0,0 +1,243 @@
+# fx/services.py
+
+import logging
+import threading
+import time
+from bisect import bisect_right
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from fx.models import FXDailyRate, FXRatePeriod
+
+
+logger = logging.getLogger(__name__)
+
+
+class FXRateNotFound(LookupError):
+    """날짜를 포함하는 FXRatePeriod 가 없음 (첫 기간 이전, 기간 사이 공백 등)."""
+
+
+class FXRateIndex:
+    """
+    FXRatePeriod 전체를 start_date 순으로 정렬해 둔 메모리 구간 인덱스.
+    날짜 → 환율은 start_date 목록에 bisect 1번 (DB 조회 없음).
+
+    만들 때 기간을 검사해서 problems 에 남긴다 (경고 로그도 남김):
+      - 겹침: 두 기간이 같은 날짜를 포함 → start_date 가 늦은(같으면 id 가 큰) 기간이 이긴다
+      - 공백: 앞 기간들이 끝난 다음날 < 다음 기간 start_date → 그 사이 날짜는 FXRateNotFound
+    """
+
+    def __init__(self, periods):
+        # periods: (id, start_date, end_date, krw_to_php) — start_date, id 순
+        self._starts, self._ends, self._rates = [], [], []
+        self._by_id = {}
+        self.problems = []
+        self._has_overlap = False
+
+        reach = reach_id = None  # 지금까지 기간들이 덮는 마지막 날짜 (open-ended 면 date.max)
+        for pid, start, end, rate in periods:
+            rate = Decimal(rate)
+            if reach is not None:
+                if reach >= start:
+                    self._has_overlap = True
+                    self.problems.append(f"FX period #{pid} (from {start}) overlaps #{reach_id}")
+                elif reach + timedelta(days=1) < start:
+                    self.problems.append(f"FX gap: {reach + timedelta(days=1)} ~ {start - timedelta(days=1)}")
+            if reach is None or (end or date.max) > reach:
+                reach, reach_id = end or date.max, pid
+
+            self._starts.append(start)
+            self._ends.append(end)
+            self._rates.append(rate)
+            self._by_id[pid] = rate
+
+        for problem in self.problems:
+            logger.warning(problem)
+
+    def __len__(self):
+        return len(self._starts)
+
+    @property
+    def first_date(self) -> date | None:
+        return self._starts[0] if self._starts else None
+
+    @property
+    def last_closed_date(self) -> date | None:
+        """끝 날짜가 있는 기간 중 가장 늦은 end_date."""
+        return max((e for e in self._ends if e is not None), default=None)
+
+    def rate_for(self, d: date) -> Decimal:
+        i = bisect_right(self._starts, d) - 1
+        while i >= 0:
+            end = self._ends[i]
+            if end is None or d <= end:
+                return self._rates[i]
+            if not self._has_overlap:
+                break
+            # 겹침이 있을 때만: 더 일찍 시작해서 d 까지 이어지는 기간을 찾는다
+            i -= 1
+        raise FXRateNotFound(f"No FX rate period covers {d}")
+
+    def period_rate(self, period_id: int) -> Decimal:
+        try:
+            return self._by_id[period_id]
+        except KeyError:
+            raise FXRateNotFound(f"FX period #{period_id} does not exist")
+
+
+_lock = threading.Lock()
+_index: FXRateIndex | None = None
+
+
+def _stamp_of(rows) -> tuple:
+    """(행 수, 최대 id, 최대 updated_at) — 추가/삭제/수정(save) 중 하나라도 있으면 바뀐다."""
+    return (
+        len(rows),
+        max((r[0] for r in rows), default=None),
+        max((r[4] for r in rows), default=None),
+    )
+
+
+def _current_stamp() -> tuple:
+    row = FXRatePeriod.objects.aggregate(n=Count("id"), last_id=Max("id"), last_updated=Max("updated_at"))
+    return row["n"], row["last_id"], row["last_updated"]
+
+
+def _load_index() -> FXRateIndex:
+    rows = list(
+        FXRatePeriod.objects
+        .order_by("start_date", "id")
+        .values_list("id", "start_date", "end_date", "krw_to_php", "updated_at")
+    )
+    index = FXRateIndex(r[:4] for r in rows)
+    index.stamp = _stamp_of(rows)
+    index.checked_at = time.monotonic()
+    return index
+
+
+def get_index(*, check: bool = False) -> FXRateIndex:
+    """
+    프로세스 단위 인덱스. 처음 쓸 때 1쿼리로 만든다.
+    - 이 프로세스에서 FXRatePeriod 를 저장/삭제하면 커밋 후 버린다 (invalidate_index)
+    - 다른 프로세스(워커)의 변경은 FX_INDEX_CHECK_SECONDS 마다 stamp 1쿼리(행 수, 최대 id, 최대 updated_at)로
+      확인해서 바뀌었으면 다시 만든다. check=True 면 시간과 관계없이 바로 확인한다.
+    stamp 는 save() 가 채우는 updated_at 을 보므로, QuerySet.update() 로 환율을 바꾸면 updated_at 도 같이 바꿔야 한다.
+    """
+    global _index
+    index = _index
+    if index is None:
+        with _lock:
+            if _index is None:
+                _index = _load_index()
+            return _index
+
+    if check or time.monotonic() - index.checked_at >= settings.FX_INDEX_CHECK_SECONDS:
+        stamp = _current_stamp()
+        with _lock:
+            if _index is index:
+                if stamp == index.stamp:
+                    index.checked_at = time.monotonic()
+                else:
+                    _index = _load_index()
+            index = _index
+    return index
+
+
+def reset_index() -> None:
+    global _index
+    with _lock:
+        _index = None
+
+
+def invalidate_index() -> None:
+    """기간 저장/삭제 직후 호출 (fx.signals). 커밋된 뒤에 버려서, 커밋 전 값으로 다시 채워지지 않게 한다."""
+    transaction.on_commit(reset_index)
+
+
+def _lookup(func):
+    """
+    인덱스에서 찾고, 없으면(FXRateNotFound) stamp 를 바로 확인해서 다른 프로세스가 기간을 추가/수정했으면
+    다시 만든 인덱스로 한 번 더 찾는다 (그래도 없으면 FXRateNotFound).
+    """
+    index = get_index()
+    try:
+        return func(index)
+    except FXRateNotFound:
+        fresh = get_index(check=True)
+        if fresh is index:
+            raise
+        return func(fresh)
+
+
+def rate_for(d: date) -> Decimal:
+    """d 날짜에 적용되는 KRW→PHP 환율. 없으면 FXRateNotFound."""
+    return _lookup(lambda index: index.rate_for(d))
+
+
+def rates_for(dates) -> dict[date, Decimal]:
+    """여러 날짜 한 번에: {date: rate}. 하나라도 없으면 빠진 날짜를 모두 담아 FXRateNotFound."""
+    dates = set(dates)
+
+    def lookup(index: FXRateIndex) -> dict[date, Decimal]:
+        rates, missing = {}, []
+        for d in dates:
+            try:
+                rates[d] = index.rate_for(d)
+            except FXRateNotFound:
+                missing.append(d)
+        if missing:
+            raise FXRateNotFound(f"No FX rate period covers {', '.join(str(d) for d in sorted(missing))}")
+        return rates
+
+    return _lookup(lookup)
+
+
+def period_rate(period_id: int) -> Decimal:
+    """FXRatePeriod id → 환율 (QuoteBatch.fx_period 를 따라가는 조회를 쿼리 없이)."""
+    return _lookup(lambda index: index.period_rate(period_id))
+
+
+def daily_rate_horizon(today: date | None = None) -> date:
+    """끝이 없는 기간을 FXDailyRate 로 펼치는 마지막 날짜."""
+    return (today or timezone.localdate()) + timedelta(days=settings.FX_DAILY_RATE_HORIZON_DAYS)
+
+
+@transaction.atomic
+def rebuild_daily_rates(start: date | None = None, end: date | None = None) -> int:
+    """
+    FXDailyRate 를 [start, end] 구간만 다시 만든다 (구간 delete 1회 + bulk_create).
+    - start 기본: 첫 기간 시작일 / end 기본: max(horizon, 끝 날짜가 있는 기간의 마지막 end_date)
+    - 둘 다 비우면 전체를 다시 만든다 (구간 밖 남은 행도 지움)
+    기간 저장/삭제 트랜잭션 안에서도 불리므로, 캐시된 인덱스가 아니라 DB에서 새로 읽은 인덱스를 쓴다.
+    어느 기간에도 속하지 않는 날짜(공백)는 행을 만들지 않는다.
+    반환: 만든 행 수
+    """
+    full = start is None and end is None
+    index = _load_index()
+    if index.first_date is None:
+        FXDailyRate.objects.all().delete()
+        return 0
+
+    last = max(daily_rate_horizon(), index.last_closed_date or date.min)
+    start = start or index.first_date
+    end = end or last
+
+    # 지우는 구간은 요청한 그대로 (삭제된 기간 자리는 비워야 함), 만드는 구간은 기간이 있는 범위로 자른다
+    stale = FXDailyRate.objects.all() if full else FXDailyRate.objects.filter(date__gte=start, date__lte=end)
+    stale.delete()
+
+    rows = []
+    d = max(start, index.first_date)
+    while d <= min(end, last):
+        try:
+            rows.append(FXDailyRate(date=d, krw_to_php=index.rate_for(d)))
+        except FXRateNotFound:
+            pass
+        d += timedelta(days=1)
+    FXDailyRate.objects.bulk_create(rows, batch_size=2000)
+    return len(rows)
@@ -0,0 +1,33 @@
+# fx/signals.py
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from fx.models import FXRatePeriod
+from fx.services import invalidate_index, rebuild_daily_rates
+
+
+@receiver(pre_save, sender=FXRatePeriod)
+def fx_period_saving(sender, instance: FXRatePeriod, **kwargs):
+    """바뀌기 전 기간 범위 (FXDailyRate 에서 다시 만들 구간 계산용)."""
+    instance._previous_range = (
+        FXRatePeriod.objects.filter(pk=instance.pk).values_list("start_date", "end_date").first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=FXRatePeriod)
+def fx_period_saved(sender, instance: FXRatePeriod, **kwargs):
+    """환율 구간 인덱스는 커밋 후 다시 만들고, 날짜별 달력은 바뀐 구간(이전 ∪ 현재 범위)만 다시 만든다."""
+    invalidate_index()
+    starts, ends = [instance.start_date], [instance.end_date]
+    if getattr(instance, "_previous_range", None):
+        starts.append(instance._previous_range[0])
+        ends.append(instance._previous_range[1])
+    rebuild_daily_rates(min(starts), None if None in ends else max(ends))
+
+
+@receiver(post_delete, sender=FXRatePeriod)
+def fx_period_deleted(sender, instance: FXRatePeriod, **kwargs):
+    invalidate_index()
+    rebuild_daily_rates(instance.start_date, instance.end_date)
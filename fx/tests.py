@@ -1,3 +1,136 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from fx.models import FXDailyRate, FXRatePeriod
+from fx.services import (
+    FXRateIndex,
+    FXRateNotFound,
+    daily_rate_horizon,
+    period_rate,
+    rate_for,
+    rates_for,
+    reset_index,
+)
+
+
+class FXRateIndexTests(TestCase):
+    """날짜 → 환율 구간 인덱스: 경계, 공백/겹침 검출, 기간 저장/삭제 후 재구성, 조회 시 쿼리 없음."""
+
+    def setUp(self):
+        reset_index()
+        self.jan = FXRatePeriod.objects.create(
+            start_date=date(2026, 1, 1), end_date=date(2026, 1, 31), krw_to_php=Decimal("0.042000"),
+        )
+        self.feb = FXRatePeriod.objects.create(start_date=date(2026, 2, 1), krw_to_php=Decimal("0.044000"))
+
+    def tearDown(self):
+        reset_index()
+
+    def test_lookup_boundaries(self):
+        self.assertEqual(rate_for(date(2026, 1, 31)), Decimal("0.042000"))
+        self.assertEqual(rate_for(date(2026, 2, 1)), Decimal("0.044000"))
+        self.assertEqual(rate_for(date(2030, 1, 1)), Decimal("0.044000"))
+        with self.assertRaises(FXRateNotFound):
+            rate_for(date(2025, 12, 31))
+
+        with self.assertNumQueries(0):
+            rates = rates_for([date(2026, 1, 1), date(2026, 3, 1), date(2026, 1, 1)])
+        self.assertEqual(rates, {date(2026, 1, 1): Decimal("0.042000"), date(2026, 3, 1): Decimal("0.044000")})
+
+    def test_problems_detected_at_load(self):
+        with self.assertLogs("fx.services", "WARNING"):
+            index = FXRateIndex([
+                (1, date(2026, 1, 1), None, "0.040"),
+                (2, date(2026, 2, 1), date(2026, 2, 10), "0.050"),
+            ])
+        self.assertEqual(len(index.problems), 1)
+        self.assertIn("overlaps", index.problems[0])
+        # 겹치는 구간은 늦게 시작한 기간, 그 뒤는 다시 열린 기간
+        self.assertEqual(index.rate_for(date(2026, 2, 5)), Decimal("0.050"))
+        self.assertEqual(index.rate_for(date(2026, 3, 1)), Decimal("0.040"))
+
+        with self.assertLogs("fx.services", "WARNING"):
+            gapped = FXRateIndex([
+                (1, date(2026, 1, 1), date(2026, 1, 31), "0.040"),
+                (2, date(2026, 3, 1), None, "0.050"),
+            ])
+        self.assertEqual(gapped.problems, ["FX gap: 2026-02-01 ~ 2026-02-28"])
+        with self.assertRaises(FXRateNotFound):
+            gapped.rate_for(date(2026, 2, 15))
+
+    def test_index_rebuilt_after_save_and_delete(self):
+        rate_for(date(2026, 1, 1))  # 인덱스 만들어 둠
+        with self.captureOnCommitCallbacks(execute=True):
+            self.feb.krw_to_php = Decimal("0.043000")
+            self.feb.save()
+        self.assertEqual(rate_for(date(2026, 2, 15)), Decimal("0.043000"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jan.delete()
+        with self.assertRaises(FXRateNotFound):
+            rate_for(date(2026, 1, 15))
+
+    def test_changes_from_other_process_picked_up(self):
+        """다른 워커가 저장한 변경 (이 프로세스의 시그널/on_commit 은 안 돎): stamp 확인 주기 또는 조회 실패 시 다시 읽는다."""
+        self.assertEqual(period_rate(self.feb.id), Decimal("0.044000"))
+
+        # 다른 프로세스: 2월 환율 수정 + 기간 닫기 (save() 와 같이 updated_at 도 바뀜) + 3월 기간 추가
+        FXRatePeriod.objects.filter(pk=self.feb.pk).update(
+            krw_to_php=Decimal("0.050000"), end_date=date(2026, 2, 28), updated_at=timezone.now(),
+        )
+        [mar] = FXRatePeriod.objects.bulk_create([
+            FXRatePeriod(start_date=date(2026, 3, 1), krw_to_php=Decimal("0.051000")),
+        ])
+
+        # 확인 주기 안: 아는 기간은 쿼리 없이 (이전 값), 모르는 기간은 바로 확인해서 다시 읽음
+        with self.assertNumQueries(0):
+            self.assertEqual(period_rate(self.feb.id), Decimal("0.044000"))
+        with self.assertNumQueries(2):  # stamp 1 + 인덱스 다시 읽기 1
+            self.assertEqual(period_rate(mar.id), Decimal("0.051000"))
+        self.assertEqual(period_rate(self.feb.id), Decimal("0.050000"))
+
+        with self.assertNumQueries(1), self.assertRaises(FXRateNotFound):  # 정말 없는 기간: stamp 만 확인
+            period_rate(mar.id + 1)
+
+        # 확인 주기가 지나면 조회 전에 stamp 를 확인 (삭제도 행 수로 알아챔)
+        self.assertEqual(rate_for(date(2026, 1, 15)), Decimal("0.042000"))
+        FXRatePeriod.objects.filter(pk=self.jan.pk).delete()
+        with override_settings(FX_INDEX_CHECK_SECONDS=0):
+            with self.assertRaises(FXRateNotFound):
+                rate_for(date(2026, 1, 15))
+            with self.assertNumQueries(1):  # 바뀐 게 없으면 stamp 만
+                self.assertEqual(rate_for(date(2026, 3, 15)), Decimal("0.051000"))
+
+
+@override_settings(FX_DAILY_RATE_HORIZON_DAYS=10)
+class FXDailyRateTests(TestCase):
+    """기간 저장/삭제 시 FXDailyRate 달력이 바뀐 구간만 다시 만들어지는지, 끝 없는 기간은 horizon 까지."""
+
+    def _rates(self):
+        return dict(FXDailyRate.objects.values_list("date", "krw_to_php"))
+
+    def test_calendar_follows_period_changes(self):
+        horizon = daily_rate_horizon()
+        start = horizon - timedelta(days=29)
+        period = FXRatePeriod.objects.create(start_date=start, krw_to_php=Decimal("0.040000"))
+        rates = self._rates()
+        self.assertEqual((min(rates), max(rates), len(rates)), (start, horizon, 30))
+
+        # 기간을 닫고 새 기간 추가 → 경계 이후만 새 환율
+        cut = start + timedelta(days=9)
+        period.end_date = cut
+        period.save()
+        FXRatePeriod.objects.create(start_date=cut + timedelta(days=1), krw_to_php=Decimal("0.050000"))
+        rates = self._rates()
+        self.assertEqual(len(rates), 30)
+        self.assertEqual(rates[cut], Decimal("0.040000"))
+        self.assertEqual(rates[cut + timedelta(days=1)], Decimal("0.050000"))
+
+        # 삭제하면 그 구간은 공백 (행 없음)
+        period.delete()
+        rates = self._rates()
+        self.assertNotIn(start, rates)
+        self.assertEqual(min(rates), cut + timedelta(days=1))
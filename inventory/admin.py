@@ -1,9 +1,60 @@
-from django.contrib import admin
-from .models import Product, InventoryBalance, InventoryLot, StockMovement
+import io
+
+from django import forms
+from django.contrib import admin, messages
+from django.db.models import Q
+from django.shortcuts import redirect, render
+from django.urls import path
+
+from .models import Product, InventoryBalance, InventoryLot, ReplenishmentSuggestion, StockMovement, StockMovementArchive
+from .services.balance_cache import invalidate_balances
+from .services.product_import import OPTIONAL_COLUMNS, REQUIRED_COLUMNS, import_products
+from .services.search import fts_enabled, product_filter
+from .services.valuation import invalidate_valuation
+
+
+class InvalidatesValuationMixin:
+    """admin에서 직접 고친 값도 평가액 캐시에 바로 반영되도록."""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_valuation()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_valuation()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        invalidate_valuation()
+
+
+class ProductSearchMixin:
+    """
+    검색창: SKU/EN/KO는 FTS5 인덱스로 검색 (icontains 전체 스캔 대신).
+    search_fields 의 나머지 필드(원산지 등)는 예전처럼 icontains 로 OR.
+    """
+    product_search_prefix = ""
+    FTS_FIELDS = ("sku_code", "name_en", "name_ko")
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip() or not fts_enabled():
+            return super().get_search_results(request, queryset, search_term)
+        condition = product_filter(search_term, self.product_search_prefix)
+        indexed = {f"{self.product_search_prefix}{f}" for f in self.FTS_FIELDS}
+        for field in self.search_fields:
+            if field not in indexed:
+                condition |= Q(**{f"{field}__icontains": search_term.strip()})
+        return queryset.filter(condition), False
+
+
+class ProductImportForm(forms.Form):
+    csv_file = forms.FileField(label="CSV file")
+    dry_run = forms.BooleanField(required=False, help_text="Validate and count only, write nothing")
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(ProductSearchMixin, InvalidatesValuationMixin, admin.ModelAdmin):
     list_display = (
         "sku_code",
         "name_en",
@@ -18,14 +69,70 @@ class ProductAdmin(admin.ModelAdmin):
     search_fields = ("sku_code", "name_en", "name_ko", "origin_country", "origin_name")
     ordering = ("sku_code",)
     list_per_page = 50
+    change_list_template = "admin/inventory/product/change_list.html"
+
+    def get_urls(self):
+        return [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_csv_view),
+                name="inventory_product_import",
+            ),
+        ] + super().get_urls()
+
+    def import_csv_view(self, request):
+        """상품 마스터 CSV 업로드 → import_products (sku_code 기준 upsert)."""
+        if not self.has_add_permission(request) or not self.has_change_permission(request):
+            return redirect("admin:inventory_product_changelist")
+
+        form = ProductImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = io.TextIOWrapper(form.cleaned_data["csv_file"].file, encoding="utf-8-sig", newline="")
+            try:
+                result = import_products(upload, dry_run=form.cleaned_data["dry_run"])
+            except (ValueError, UnicodeDecodeError) as e:
+                messages.error(request, f"Import failed: {e}")
+            else:
+                for message in result.errors:
+                    messages.warning(request, message)
+                prefix = "Dry run: " if form.cleaned_data["dry_run"] else ""
+                messages.success(request, (
+                    f"{prefix}inserted={result.inserted} updated={result.updated} "
+                    f"unchanged={result.unchanged} skipped={result.error_count}"
+                ))
+                return redirect("admin:inventory_product_changelist")
+
+        return render(request, "admin/inventory/product/import_csv.html", {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Import products from CSV",
+            "form": form,
+            "required_columns": REQUIRED_COLUMNS,
+            "optional_columns": OPTIONAL_COLUMNS,
+        })
 
 
 @admin.register(InventoryBalance)
-class InventoryBalanceAdmin(admin.ModelAdmin):
+class InventoryBalanceAdmin(ProductSearchMixin, InvalidatesValuationMixin, admin.ModelAdmin):
+    product_search_prefix = "product__"
     list_display = ("product", "on_hand_qty_units", "avg_cost_php_per_unit", "last_updated_at")
     search_fields = ("product__sku_code", "product__name_en", "product__name_ko")
     list_per_page = 50
 
+    # 직접 고친 balance는 읽기 캐시(get_balances)에서도 지운다
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_balances([obj.product_id])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_balances([obj.product_id])
+
+    def delete_queryset(self, request, queryset):
+        product_ids = list(queryset.values_list("product_id", flat=True))
+        super().delete_queryset(request, queryset)
+        invalidate_balances(product_ids)
+
 
 @admin.register(InventoryLot)
 class InventoryLotAdmin(admin.ModelAdmin):
@@ -33,11 +140,13 @@ class InventoryLotAdmin(admin.ModelAdmin):
         "received_date",
         "product",
         "supplier",
+        "expiry_date",
         "qty_units_received",
+        "qty_units_remaining",
         "landed_cost_php_per_unit",
         "transport_mode",
     )
-    list_filter = ("transport_mode", "received_date")
+    list_filter = ("transport_mode", "received_date", "expiry_date")
     search_fields = ("product__sku_code", "supplier__name", "supplier__name_ko")
     list_per_page = 50
 
@@ -45,4 +154,29 @@ class InventoryLotAdmin(admin.ModelAdmin):
 class StockMovementAdmin(admin.ModelAdmin):
     list_display = ("created_at", "movement_type", "product", "qty_units", "ref_table", "ref_id", "memo")
     list_filter = ("movement_type", "created_at")
-    search_fields = ("product__sku_code", "product__name_en", "product__name_ko", "ref_table", "memo")
\ No newline at end of file
+    search_fields = ("product__sku_code", "product__name_en", "product__name_ko", "ref_table", "memo")
+
+@admin.register(StockMovementArchive)
+class StockMovementArchiveAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "movement_type", "product", "qty_units", "ref_table", "ref_id", "memo", "archived_at")
+    list_filter = ("movement_type",)
+    search_fields = ("product__sku_code", "ref_table", "memo")
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ReplenishmentSuggestion)
+class ReplenishmentSuggestionAdmin(admin.ModelAdmin):
+    list_display = (
+        "plan_date", "product", "transport_mode", "on_hand_qty_units", "daily_velocity",
+        "days_of_cover", "reorder_point", "suggested_qty",
+    )
+    list_filter = ("plan_date", "transport_mode")
+    search_fields = ("product__sku_code", "product__name_en", "product__name_ko")
+    list_select_related = ("product",)
+    list_per_page = 50
@@ -6,4 +6,4 @@ class InventoryConfig(AppConfig):
     name = "inventory"
 
     def ready(self):
-        import inventory.signals  # ✅ 추가
\ No newline at end of file
+        import inventory.signals  # noqa: F401
@@ -0,0 +1,51 @@
+# inventory/management/commands/archive_movements.py
+
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from inventory.models import StockMovement
+from inventory.services.archive import archive_movements, default_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        "마감 기간 이전 StockMovement를 StockMovementArchive로 옮기고 품목별 이월 행(ADJ)을 남긴다.\n"
+        "기본 cutoff = 오늘 - INVENTORY_CLOSED_PERIOD_DAYS 가 속한 달의 1일. 월 1회 cron 으로 실행."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", help="Archive movements created before this date (YYYY-MM-DD, local)")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived")
+
+    def handle(self, *args, **opts):
+        if opts["before"]:
+            before = parse_date(opts["before"])
+            if before is None:
+                raise CommandError("--before must be YYYY-MM-DD")
+            cutoff = timezone.make_aware(datetime.combine(before, time.min))
+        else:
+            cutoff = default_cutoff()
+
+        if cutoff > timezone.now():
+            raise CommandError(f"Cutoff {cutoff:%Y-%m-%d} is in the future.")
+
+        label = f"{timezone.localtime(cutoff):%Y-%m-%d}"
+        if opts["dry_run"]:
+            count = (
+                StockMovement.objects
+                .filter(created_at__lt=cutoff)
+                .exclude(ref_table=StockMovement.OPENING_REF_TABLE)
+                .count()
+            )
+            self.stdout.write(f"[dry-run] {count} movement(s) before {label} would be archived.")
+            return
+
+        result = archive_movements(cutoff, batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {result.archived} movement(s) before {label}; "
+            f"{result.openings} opening row(s) carried forward."
+        ))
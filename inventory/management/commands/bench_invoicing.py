@@ -0,0 +1,150 @@
+# inventory/management/commands/bench_invoicing.py
+
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Sum
+
+from inventory.models import InventoryBalance, Product, StockMovement
+from partners.models import Partner
+from sales.models import SalesInvoice, SalesInvoiceLine
+from sales.services.invoicing import issue_invoice
+
+
+@transaction.atomic
+def _issue_line_by_line(invoice_id: int):
+    """비교용: 예전 방식(라인 순서대로 가격 save, balance 1건씩 잠금 → 검사 → save → movement 1건)."""
+    invoice = SalesInvoice.objects.select_for_update().get(id=invoice_id)
+    lines = list(invoice.lines.select_related("product").select_for_update().order_by("id"))
+    for ln in lines:
+        ln.final_unit_price_php = ln.manual_unit_price_php
+        ln.save(update_fields=["suggested_unit_price_php", "final_unit_price_php"])
+    for ln in lines:
+        balance = InventoryBalance.objects.select_for_update().get(product_id=ln.product_id)
+        if balance.on_hand_qty_units < ln.qty_units:
+            raise ValueError(f"Insufficient stock for {ln.product.sku_code}.")
+        balance.on_hand_qty_units -= ln.qty_units
+        balance.save(update_fields=["on_hand_qty_units"])
+        StockMovement.objects.create(
+            product_id=ln.product_id,
+            movement_type=StockMovement.OUT,
+            qty_units=ln.qty_units,
+            ref_table="sales_salesinvoice",
+            ref_id=invoice.id,
+        )
+    invoice.status = SalesInvoice.ISSUED
+    invoice.save(update_fields=["status"])
+
+
+class Command(BaseCommand):
+    help = (
+        "인보이스 ISSUE 동시성 벤치마크: 여러 스레드가 같은 SKU들을 서로 다른 순서로 담은 인보이스를 동시에 발행.\n"
+        "예전 라인별 잠금 방식(line) vs MovementJournal 방식(journal)의 invoices/sec, 실패 사유, 초과 출고 여부를 비교한다.\n"
+        "실제 DB에 BENCH-INV-* 데이터를 만들고 끝나면 지운다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--invoices", type=int, default=200)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--lines", type=int, default=5, help="Lines per invoice")
+        parser.add_argument("--products", type=int, default=10)
+        parser.add_argument("--stock", type=int, default=300, help="Starting on-hand qty per SKU")
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **opts):
+        self.stdout.write(f"{'mode':<8} {'issued':>7} {'short':>6} {'errors':>7} {'sec':>7} {'inv/sec':>8}  oversell")
+        for mode, fn in (("line", _issue_line_by_line), ("journal", issue_invoice)):
+            product_ids, invoice_ids = self._setup(opts)
+            try:
+                outcome, seconds = self._run(fn, invoice_ids, opts["threads"])
+                oversold = self._oversold(product_ids, opts["stock"])
+                self.stdout.write(
+                    f"{mode:<8} {outcome['ok']:>7} {outcome['short']:>6} {outcome['error']:>7} "
+                    f"{seconds:>7.2f} {outcome['ok'] / seconds:>8.1f}  {', '.join(oversold) or 'none'}"
+                )
+            finally:
+                self._cleanup(product_ids, invoice_ids)
+
+    @staticmethod
+    def _run(fn, invoice_ids, threads):
+        def work(invoice_id):
+            try:
+                fn(invoice_id)
+                return "ok"
+            except ValueError:
+                return "short"
+            except DatabaseError:
+                return "error"  # deadlock / lock timeout
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            outcome = Counter(pool.map(work, invoice_ids))
+        return outcome, time.perf_counter() - started
+
+    @staticmethod
+    def _setup(opts):
+        rnd = random.Random(opts["seed"])
+        customer = Partner.objects.create(partner_type="CUSTOMER", name="BENCH-INV CUSTOMER")
+        products = Product.objects.bulk_create([
+            Product(
+                sku_code=f"BENCH-INV-{i:04d}",
+                name_en=f"Bench invoice product {i}",
+                base_unit="pack",
+                net_weight_kg_per_unit=Decimal("1.0000"),
+            )
+            for i in range(opts["products"])
+        ])
+        product_ids = [p.id for p in products]
+        InventoryBalance.objects.bulk_create([
+            InventoryBalance(product_id=pid, on_hand_qty_units=Decimal(opts["stock"]), avg_cost_php_per_unit=Decimal("100"))
+            for pid in product_ids
+        ])
+
+        invoices = SalesInvoice.objects.bulk_create([
+            SalesInvoice(invoice_no=f"BENCH-INV-{i:06d}", customer=customer)
+            for i in range(opts["invoices"])
+        ])
+        invoice_ids = [inv.id for inv in invoices]
+
+        lines = []
+        for invoice_id in invoice_ids:
+            # 같은 SKU 집합을 인보이스마다 다른 순서로
+            for pid in rnd.sample(product_ids, min(opts["lines"], len(product_ids))):
+                lines.append(SalesInvoiceLine(
+                    invoice_id=invoice_id,
+                    product_id=pid,
+                    qty_units=Decimal(rnd.randint(1, 5)),
+                    manual_unit_price_php=Decimal("150"),
+                ))
+        SalesInvoiceLine.objects.bulk_create(lines, batch_size=2000)
+        return product_ids, invoice_ids
+
+    @staticmethod
+    def _oversold(product_ids, stock) -> list[str]:
+        shipped = dict(
+            StockMovement.objects
+            .filter(product_id__in=product_ids, movement_type=StockMovement.OUT)
+            .values("product_id").annotate(qty=Sum("qty_units")).values_list("product_id", "qty")
+        )
+        bad = []
+        for b in InventoryBalance.objects.filter(product_id__in=product_ids).select_related("product"):
+            out = Decimal(shipped.get(b.product_id) or 0)
+            if b.on_hand_qty_units < 0 or out > stock or b.on_hand_qty_units != stock - out:
+                bad.append(b.product.sku_code)
+        return bad
+
+    @staticmethod
+    def _cleanup(product_ids, invoice_ids):
+        with transaction.atomic():
+            StockMovement.objects.filter(product_id__in=product_ids).delete()
+            SalesInvoice.objects.filter(id__in=invoice_ids).delete()
+            InventoryBalance.objects.filter(product_id__in=product_ids).delete()
+            Product.objects.filter(id__in=product_ids).delete()
+            Partner.objects.filter(name="BENCH-INV CUSTOMER").delete()
@@ -0,0 +1,81 @@
+# inventory/management/commands/bench_receiving.py
+
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from inventory.models import Product
+from inventory.services.costing import create_inventory_lot, create_inventory_lots_bulk
+from partners.models import Partner
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "입고 벤치마크: 로트 수(N)별로 단건 입고 반복 vs create_inventory_lots_bulk 의 쿼리 수/시간 비교.\n"
+        "모든 쓰기는 트랜잭션 롤백되므로 DB에 흔적이 남지 않는다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[1, 10, 100, 300])
+        parser.add_argument("--products", type=int, default=50, help="Distinct SKUs the lots are spread over")
+
+    def handle(self, *args, **opts):
+        self.stdout.write(f"{'lots':>6} | {'single q':>9} {'single ms':>10} | {'bulk q':>7} {'bulk ms':>8}")
+        self.stdout.write("-" * 52)
+        for n in opts["sizes"]:
+            single_q, single_ms = self._run(n, opts["products"], bulk=False)
+            bulk_q, bulk_ms = self._run(n, opts["products"], bulk=True)
+            self.stdout.write(f"{n:>6} | {single_q:>9} {single_ms:>10.1f} | {bulk_q:>7} {bulk_ms:>8.1f}")
+
+    def _run(self, n: int, n_products: int, *, bulk: bool):
+        result = {}
+        try:
+            with transaction.atomic():
+                supplier = Partner.objects.create(partner_type="SUPPLIER", name="BENCH SUPPLIER")
+                products = Product.objects.bulk_create([
+                    Product(
+                        sku_code=f"BENCH-{i:05d}",
+                        name_en=f"Bench product {i}",
+                        base_unit="pack",
+                        net_weight_kg_per_unit=Decimal("1.0000"),
+                    )
+                    for i in range(min(n, n_products))
+                ])
+                rows = [self._row(products[i % len(products)], supplier.id) for i in range(n)]
+
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    if bulk:
+                        create_inventory_lots_bulk(rows)
+                    else:
+                        for row in rows:
+                            create_inventory_lot(**row)
+                    result["ms"] = (time.perf_counter() - started) * 1000
+                result["queries"] = len(ctx.captured_queries)
+                raise _Rollback()
+        except _Rollback:
+            pass
+        return result["queries"], result["ms"]
+
+    @staticmethod
+    def _row(product, supplier_id) -> dict:
+        return {
+            "product": product,
+            "supplier_id": supplier_id,
+            "received_date": date.today(),
+            "qty_units_received": Decimal("10"),
+            "fx_rate_snapshot": Decimal("0.045000"),
+            "supplier_cost_krw_per_unit": Decimal("10000"),
+            "supplier_markup_rate_snapshot": Decimal("0.05"),
+            "transport_mode": "OCEAN",
+            "transport_krw_per_kg_snapshot": Decimal("2200"),
+            "billable_weight_kg_total": Decimal("12.0"),
+        }
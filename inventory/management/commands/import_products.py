@@ -0,0 +1,41 @@
+# inventory/management/commands/import_products.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.services.product_import import (
+    IMPORT_CHUNK_SIZE,
+    OPTIONAL_COLUMNS,
+    REQUIRED_COLUMNS,
+    import_products,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "상품 마스터 CSV를 sku_code 기준으로 upsert 한다 (공급사 카탈로그 동기화용).\n"
+        "필수 컬럼: " + ", ".join(REQUIRED_COLUMNS) + "\n"
+        "선택 컬럼: " + ", ".join(OPTIONAL_COLUMNS) + " (파일에 없는 컬럼은 기존 값 유지)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Rows per upsert batch")
+        parser.add_argument("--dry-run", action="store_true", help="Validate and count only, write nothing")
+
+    def handle(self, *args, **opts):
+        try:
+            with open(opts["csv_path"], newline="", encoding="utf-8-sig") as f:
+                result = import_products(f, chunk_size=opts["chunk_size"], dry_run=opts["dry_run"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for message in result.errors:
+            self.stdout.write(self.style.WARNING(message))
+        if result.error_count > len(result.errors):
+            self.stdout.write(self.style.WARNING(f"... and {result.error_count - len(result.errors)} more error(s)"))
+
+        prefix = "Dry run: " if opts["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}inserted={result.inserted} updated={result.updated} "
+            f"unchanged={result.unchanged} skipped={result.error_count}"
+        ))
@@ -0,0 +1,19 @@
+# inventory/management/commands/rebuild_product_search.py
+
+from django.core.management.base import BaseCommand
+
+from inventory.models import Product
+from inventory.services.search import fts_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "상품 검색 인덱스(FTS5)를 Product 테이블 기준으로 다시 만든다 (raw SQL/bulk 작업으로 어긋났을 때)."
+
+    def handle(self, *args, **opts):
+        if not fts_enabled():
+            self.stdout.write(self.style.WARNING("Product search index is SQLite only; nothing to rebuild."))
+            return
+        count = rebuild_index(
+            Product.objects.values_list("id", "sku_code", "name_en", "name_ko").iterator(chunk_size=2000)
+        )
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} product(s)."))
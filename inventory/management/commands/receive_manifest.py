@@ -0,0 +1,150 @@
+# inventory/management/commands/receive_manifest.py
+
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from fx.services import FXRateNotFound, rate_for
+from inventory.models import Product
+from inventory.services.costing import create_inventory_lots_bulk
+from partners.models import Partner
+
+
+REQUIRED_COLUMNS = [
+    "sku_code",
+    "qty_units_received",
+    "supplier_cost_krw_per_unit",
+    "billable_weight_kg_total",
+    "transport_krw_per_kg_snapshot",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "CSV 입고 매니페스트(컨테이너 1건 등)를 읽어 로트를 한 트랜잭션에서 일괄 생성한다.\n"
+        "필수 컬럼: " + ", ".join(REQUIRED_COLUMNS) + "\n"
+        "선택 컬럼: supplier_id, received_date, fx_rate_snapshot, supplier_markup_rate_snapshot, "
+        "transport_mode, other_cost_php_total, expiry_date, memo (비어 있으면 옵션 값 사용)\n"
+        "fx_rate_snapshot 이 컬럼에도 --fx-rate 에도 없으면 입고일의 FXRatePeriod 환율을 쓴다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path")
+        parser.add_argument("--supplier-id", type=int, help="Default supplier (Partner id)")
+        parser.add_argument("--received-date", help="Default received date (YYYY-MM-DD)")
+        parser.add_argument("--fx-rate", help="Default KRW->PHP rate snapshot (default: FX period of received date)")
+        parser.add_argument("--markup-rate", default="0.05", help="Default supplier markup rate")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only, write nothing")
+
+    def handle(self, *args, **opts):
+        with open(opts["csv_path"], newline="", encoding="utf-8-sig") as f:
+            raw_rows = list(csv.DictReader(f))
+
+        if not raw_rows:
+            raise CommandError("Manifest is empty.")
+
+        missing_cols = [c for c in REQUIRED_COLUMNS if c not in raw_rows[0]]
+        if missing_cols:
+            raise CommandError(f"Missing columns: {', '.join(missing_cols)}")
+
+        # 1) SKU / 공급사는 한 번에 조회 (행마다 조회하지 않음)
+        skus = {(r["sku_code"] or "").strip() for r in raw_rows}
+        products = Product.objects.in_bulk(skus, field_name="sku_code")
+        unknown = sorted(skus - set(products))
+        if unknown:
+            raise CommandError(f"Unknown SKU(s): {', '.join(unknown)}")
+
+        supplier_ids = {
+            int(r["supplier_id"]) for r in raw_rows if (r.get("supplier_id") or "").strip().isdigit()
+        }
+        if opts["supplier_id"]:
+            supplier_ids.add(opts["supplier_id"])
+        found = set(Partner.objects.filter(id__in=supplier_ids).values_list("id", flat=True))
+        if supplier_ids - found:
+            raise CommandError(f"Unknown supplier id(s): {sorted(supplier_ids - found)}")
+
+        # 2) 행 파싱/검증
+        rows = []
+        errors = []
+        for line_no, r in enumerate(raw_rows, start=2):
+            try:
+                rows.append(self._parse_row(r, products, opts))
+            except (ValueError, InvalidOperation, FXRateNotFound) as e:
+                errors.append(f"line {line_no}: {e}")
+
+        if errors:
+            raise CommandError("Manifest has errors:\n" + "\n".join(errors))
+
+        if opts["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"OK (dry-run): {len(rows)} lot(s) validated."))
+            return
+
+        lots = create_inventory_lots_bulk(rows)
+        self.stdout.write(self.style.SUCCESS(
+            f"Received {len(lots)} lot(s) for {len({lot.product_id for lot in lots})} product(s)."
+        ))
+
+    def _parse_row(self, r, products, opts) -> dict:
+        def value(key, default=None):
+            v = (r.get(key) or "").strip()
+            return v if v else default
+
+        def dec(key, default=None):
+            v = value(key, default)
+            if v is None:
+                raise ValueError(f"{key} is required")
+            try:
+                return Decimal(str(v))
+            except InvalidOperation:
+                raise ValueError(f"invalid {key}: {v}") from None
+
+        def day(raw):
+            # parse_date: 형식이 틀리면 None, 형식은 맞지만 없는 날짜(2026-13-01)면 ValueError
+            try:
+                return parse_date(raw or "")
+            except ValueError:
+                return None
+
+        product = products[value("sku_code")]
+
+        supplier_id = value("supplier_id", opts["supplier_id"])
+        if supplier_id is None:
+            raise ValueError("supplier_id is required (column or --supplier-id)")
+
+        received_date = day(value("received_date", opts["received_date"]))
+        if received_date is None:
+            raise ValueError("received_date is required (YYYY-MM-DD, column or --received-date)")
+
+        expiry_raw = value("expiry_date")
+        expiry_date = day(expiry_raw) if expiry_raw else None
+        if expiry_raw and expiry_date is None:
+            raise ValueError(f"invalid expiry_date: {expiry_raw} (YYYY-MM-DD)")
+
+        qty = dec("qty_units_received")
+        if qty <= 0:
+            raise ValueError("qty_units_received must be > 0")
+
+        # 환율: 컬럼 → --fx-rate → 입고일 FX 기간 (메모리 인덱스, 쿼리 없음)
+        fx_rate = dec("fx_rate_snapshot", opts["fx_rate"]) if value("fx_rate_snapshot", opts["fx_rate"]) else rate_for(received_date)
+
+        transport_mode = value("transport_mode", product.default_transport_mode).upper()
+        if transport_mode not in {"OCEAN", "AIR"}:
+            raise ValueError(f"invalid transport_mode: {transport_mode}")
+
+        return {
+            "product": product,
+            "supplier_id": int(supplier_id),
+            "received_date": received_date,
+            "expiry_date": expiry_date,
+            "qty_units_received": qty,
+            "fx_rate_snapshot": fx_rate,
+            "supplier_cost_krw_per_unit": dec("supplier_cost_krw_per_unit"),
+            "supplier_markup_rate_snapshot": dec("supplier_markup_rate_snapshot", opts["markup_rate"]),
+            "transport_mode": transport_mode,
+            "transport_krw_per_kg_snapshot": dec("transport_krw_per_kg_snapshot"),
+            "billable_weight_kg_total": dec("billable_weight_kg_total"),
+            "other_cost_php_total": dec("other_cost_php_total", "0"),
+            "memo": value("memo", ""),
+        }
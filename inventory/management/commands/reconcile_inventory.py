@@ -0,0 +1,36 @@
+# inventory/management/commands/reconcile_inventory.py
+
+from django.core.management.base import BaseCommand
+
+from inventory.services.reconcile import find_drift, repair_drift
+
+
+class Command(BaseCommand):
+    help = (
+        "StockMovement(ledger) 합계와 InventoryBalance(캐시)를 비교해 어긋난 SKU를 보고한다.\n"
+        "--repair 를 주면 balance 수량을 ledger 값으로 맞춘다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repair", action="store_true", help="Overwrite drifted balances with ledger qty")
+        parser.add_argument("--show", type=int, default=50, help="Max drifted SKUs to print (0 = all)")
+
+    def handle(self, *args, **opts):
+        drifts = find_drift()
+
+        if not drifts:
+            self.stdout.write(self.style.SUCCESS("No drift: every InventoryBalance matches the ledger."))
+            return
+
+        self.stdout.write(self.style.WARNING(f"Drifted SKUs: {len(drifts)}"))
+        self.stdout.write(f"{'SKU':<20} {'balance':>14} {'ledger':>14} {'diff':>14}")
+        shown = drifts if opts["show"] == 0 else drifts[:opts["show"]]
+        for d in shown:
+            balance = "(none)" if d.balance_qty is None else str(d.balance_qty)
+            self.stdout.write(f"{d.sku_code:<20} {balance:>14} {str(d.ledger_qty):>14} {str(d.diff):>14}")
+        if len(shown) < len(drifts):
+            self.stdout.write(f"... and {len(drifts) - len(shown)} more")
+
+        if opts["repair"]:
+            fixed = repair_drift(drifts)
+            self.stdout.write(self.style.SUCCESS(f"Repaired {fixed} balance(s)."))
@@ -0,0 +1,52 @@
+# inventory/management/commands/snapshot_inventory.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from inventory.models import InventorySnapshot
+from inventory.services.snapshots import build_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "품목별 재고 스냅샷을 만든다 (직전 스냅샷 + 이후 movement 증분).\n"
+        "기본값은 어제(현지 날짜) 마감. 매일 또는 월말에 cron 으로 실행."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Snapshot date (YYYY-MM-DD). Default: yesterday")
+        parser.add_argument(
+            "--month-end", action="store_true",
+            help="Snapshot the last day of the previous month instead",
+        )
+
+    def handle(self, *args, **opts):
+        today = timezone.localdate()
+
+        if opts["date"]:
+            snapshot_date = parse_date(opts["date"])
+            if snapshot_date is None:
+                raise CommandError("--date must be YYYY-MM-DD")
+        elif opts["month_end"]:
+            snapshot_date = today.replace(day=1) - timedelta(days=1)
+        else:
+            snapshot_date = today - timedelta(days=1)
+
+        if snapshot_date >= today:
+            self.stdout.write(self.style.WARNING(
+                f"{snapshot_date} is not closed yet; movements later today will not be included."
+            ))
+
+        count = build_snapshot(snapshot_date)
+        total = (
+            InventorySnapshot.objects
+            .filter(snapshot_date=snapshot_date)
+            .aggregate(total=Sum("inventory_value_php"))["total"]
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot {snapshot_date}: {count} product(s), value={total or 0} PHP"
+        ))
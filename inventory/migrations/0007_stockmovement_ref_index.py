@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_stockmovement_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['ref_table', 'ref_id', 'movement_type'], name='inv_move_ref_idx'),
+        ),
+    ]
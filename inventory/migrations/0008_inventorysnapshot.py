@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_stockmovement_ref_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField()),
+                ('on_hand_qty_units', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('avg_cost_php_per_unit', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('inventory_value_php', models.DecimalField(decimal_places=4, max_digits=18)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.product')),
+            ],
+            options={
+                'ordering': ['-snapshot_date', 'product_id'],
+                'constraints': [models.UniqueConstraint(fields=('snapshot_date', 'product'), name='inv_snapshot_date_product_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_inventorysnapshot'),
+        ('partners', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventorylot',
+            index=models.Index(condition=models.Q(('qty_units_remaining__gt', 0)), fields=['product', 'received_date', 'id'], name='inv_lot_open_fifo_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_inventorylot_open_fifo_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovementArchive',
+            fields=[
+                ('movement_type', models.CharField(choices=[('IN', 'IN'), ('OUT', 'OUT'), ('ADJ', 'ADJ')], max_length=3)),
+                ('qty_units', models.DecimalField(decimal_places=4, max_digits=12)),
+                ('ref_table', models.CharField(blank=True, default='', max_length=50)),
+                ('ref_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('memo', models.CharField(blank=True, default='', max_length=200)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='inventory.product')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['created_at', 'id'], name='inv_arch_created_idx'), models.Index(fields=['product', 'created_at', 'id'], name='inv_arch_product_created_idx')],
+            },
+        ),
+    ]
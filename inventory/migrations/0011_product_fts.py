@@ -0,0 +1,67 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:20
+
+import re
+from itertools import islice
+
+from django.db import migrations
+
+
+FTS_TABLE = "inventory_product_fts"
+
+# 인덱스 보조 토큰 규칙 (이 마이그레이션 시점의 inventory.services.search._extra_terms 와 같음).
+# 앱 코드를 import 하지 않는다: 나중에 서비스가 바뀌어도 이 마이그레이션은 그대로 동작해야 한다.
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_HANGUL_RE = re.compile(r"[가-힣]")
+
+
+def _extra_terms(sku_code, name_ko):
+    terms = []
+    for word in _TOKEN_RE.findall(name_ko or ""):
+        if _HANGUL_RE.search(word):
+            terms.extend(word[i:] for i in range(1, len(word)))
+    compact = "".join(_TOKEN_RE.findall(sku_code or ""))
+    if compact and compact != sku_code:
+        terms.append(compact)
+    return " ".join(terms)
+
+
+def create_fts(apps, schema_editor):
+    """SQLite FTS5 상품 검색 인덱스 (다른 DB에서는 만들지 않고 icontains 로 검색)."""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "sku_code, name_en, name_ko, terms, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3')"
+    )
+
+    Product = apps.get_model("inventory", "Product")
+    rows = Product.objects.values_list("id", "sku_code", "name_en", "name_ko").iterator(chunk_size=2000)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        while chunk := list(islice(rows, 2000)):
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, sku_code, name_en, name_ko, terms) VALUES (%s, %s, %s, %s, %s)",
+                [
+                    (pk, sku_code or "", name_en or "", name_ko or "", _extra_terms(sku_code, name_ko))
+                    for pk, sku_code, name_en, name_ko in chunk
+                ],
+            )
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_stockmovementarchive'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
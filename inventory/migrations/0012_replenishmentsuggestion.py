@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_product_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplenishmentSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plan_date', models.DateField()),
+                ('transport_mode', models.CharField(max_length=10)),
+                ('lead_time_days', models.PositiveIntegerField()),
+                ('on_hand_qty_units', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('velocity_7d', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('velocity_30d', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('velocity_90d', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('daily_velocity', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('days_of_cover', models.DecimalField(blank=True, decimal_places=1, max_digits=10, null=True)),
+                ('reorder_point', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('target_qty', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('suggested_qty', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='replenishment_suggestions', to='inventory.product')),
+            ],
+            options={
+                'ordering': ['-plan_date', 'days_of_cover'],
+                'indexes': [models.Index(fields=['plan_date', 'suggested_qty'], name='inv_replenish_date_qty_idx')],
+                'constraints': [models.UniqueConstraint(fields=('plan_date', 'product'), name='inv_replenish_date_product_uniq')],
+            },
+        ),
+    ]
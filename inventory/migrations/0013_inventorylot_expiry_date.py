@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_replenishmentsuggestion'),
+        ('partners', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventorylot',
+            name='expiry_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='inventorylot',
+            index=models.Index(condition=models.Q(('qty_units_remaining__gt', 0)), fields=['product', 'expiry_date', 'id'], name='inv_lot_open_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorylot',
+            index=models.Index(condition=models.Q(('expiry_date__isnull', False), ('qty_units_remaining__gt', 0)), fields=['expiry_date'], name='inv_lot_open_expiry_date_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_inventorylot_expiry_date'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='net_weight_kg_per_unit',
+            field=models.DecimalField(decimal_places=4, max_digits=10),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import ExpressionWrapper, F
 from django.utils import timezone
 
 
@@ -65,6 +66,14 @@ class InventoryBalance(models.Model):
     def inventory_value_php(self):
         return self.on_hand_qty_units * self.avg_cost_php_per_unit
 
+    @staticmethod
+    def value_expression():
+        """inventory_value_php()의 DB 식 버전 (annotate/Sum 집계용)."""
+        return ExpressionWrapper(
+            F("on_hand_qty_units") * F("avg_cost_php_per_unit"),
+            output_field=models.DecimalField(max_digits=18, decimal_places=4),
+        )
+
     def __str__(self) -> str:
         return f"Balance({self.product.sku_code}) qty={self.on_hand_qty_units} avg={self.avg_cost_php_per_unit}"
 
@@ -73,9 +82,11 @@ from .receiving_models import InventoryLot  # noqa: F401
 # inventory/models.py
 
 from django.db import models
+from django.db.models import Case, F, When
 from django.utils import timezone
 
-class StockMovement(models.Model):
+class StockMovementBase(models.Model):
+    """StockMovement(최근)와 StockMovementArchive(마감 기간)가 공유하는 필드/도우미."""
     IN = "IN"
     OUT = "OUT"
     ADJ = "ADJ"
@@ -94,4 +105,120 @@ class StockMovement(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
+        abstract = True
         ordering = ["-created_at"]
+
+    @property
+    def signed_qty_units(self):
+        """재고 증감 방향을 반영한 수량 (IN +, OUT -, ADJ는 저장된 부호 그대로)."""
+        if self.movement_type == self.OUT:
+            return -self.qty_units
+        return self.qty_units
+
+    @classmethod
+    def signed_qty_expression(cls):
+        """signed_qty_units의 DB 식 버전 (Sum(...) 등 집계용)."""
+        return Case(
+            When(movement_type=cls.OUT, then=-F("qty_units")),
+            default=F("qty_units"),
+            output_field=models.DecimalField(max_digits=14, decimal_places=4),
+        )
+
+
+class StockMovement(StockMovementBase):
+    """
+    재고 이동 ledger (최근/열린 기간).
+    마감 기간 이전 행은 archive_movements 가 StockMovementArchive로 옮기고,
+    품목별 이월 행(ADJ, ref_table=OPENING_REF_TABLE) 하나로 대신한다.
+    """
+    OPENING_REF_TABLE = "inventory_archive_opening"
+
+    class Meta(StockMovementBase.Meta):
+        indexes = [
+            # keyset 페이지네이션 (최근 이동 목록 / 품목별 재고카드)
+            models.Index(fields=["created_at", "id"], name="inv_move_created_idx"),
+            models.Index(fields=["product", "created_at", "id"], name="inv_move_product_created_idx"),
+            # issue/cancel 중복 방지 검사: filter(movement_type, ref_table, ref_id).exists()
+            models.Index(fields=["ref_table", "ref_id", "movement_type"], name="inv_move_ref_idx"),
+        ]
+
+
+class StockMovementArchive(StockMovementBase):
+    """
+    마감 기간(settings.INVENTORY_CLOSED_PERIOD_DAYS 이전)의 StockMovement.
+    id는 원래 StockMovement.id 그대로 (cursor/참조가 옮긴 뒤에도 유효하도록).
+    이월 행(OPENING_REF_TABLE)은 옮기지 않는다: archive + 최근(이월 행 제외) = 전체 이력.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta(StockMovementBase.Meta):
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="inv_arch_created_idx"),
+            models.Index(fields=["product", "created_at", "id"], name="inv_arch_product_created_idx"),
+        ]
+
+
+class InventorySnapshot(models.Model):
+    """
+    품목별 특정일(마감) 재고 스냅샷.
+    - manage.py snapshot_inventory 가 직전 스냅샷 + 그 이후 movement 증분으로 채운다.
+    - 과거 시점 재고/평가액은 '가장 가까운 스냅샷 + 짧은 movement replay'로 계산한다 (inventory.services.snapshots).
+    """
+    product = models.ForeignKey("inventory.Product", on_delete=models.CASCADE, related_name="snapshots")
+    snapshot_date = models.DateField()
+
+    on_hand_qty_units = models.DecimalField(max_digits=14, decimal_places=4)
+    avg_cost_php_per_unit = models.DecimalField(max_digits=14, decimal_places=4)
+    inventory_value_php = models.DecimalField(max_digits=18, decimal_places=4)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-snapshot_date", "product_id"]
+        constraints = [
+            models.UniqueConstraint(fields=["snapshot_date", "product"], name="inv_snapshot_date_product_uniq"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Snapshot({self.product_id}) {self.snapshot_date} qty={self.on_hand_qty_units} value={self.inventory_value_php}"
+
+
+class ReplenishmentSuggestion(models.Model):
+    """
+    plan_replenishment 이 매일 만드는 품목별 발주 제안 (판매 속도 × 운송 리드타임).
+    - daily_velocity: 최근 7/30/90일 순출고(OUT - 취소 복구)의 가중 평균 (단위/일)
+    - reorder_point = daily_velocity × (리드타임 + 안전재고일수)
+    - suggested_qty = 재고가 reorder_point 이하일 때 (리드타임 + 안전재고 + 검토주기)일치까지 채우는 수량, 아니면 0
+    """
+    product = models.ForeignKey("inventory.Product", on_delete=models.CASCADE, related_name="replenishment_suggestions")
+    plan_date = models.DateField()
+
+    transport_mode = models.CharField(max_length=10)
+    lead_time_days = models.PositiveIntegerField()
+
+    on_hand_qty_units = models.DecimalField(max_digits=14, decimal_places=4)
+    velocity_7d = models.DecimalField(max_digits=14, decimal_places=4)
+    velocity_30d = models.DecimalField(max_digits=14, decimal_places=4)
+    velocity_90d = models.DecimalField(max_digits=14, decimal_places=4)
+    daily_velocity = models.DecimalField(max_digits=14, decimal_places=4)
+
+    days_of_cover = models.DecimalField(max_digits=10, decimal_places=1, null=True, blank=True)
+    reorder_point = models.DecimalField(max_digits=14, decimal_places=4)
+    target_qty = models.DecimalField(max_digits=14, decimal_places=4)
+    suggested_qty = models.DecimalField(max_digits=14, decimal_places=4)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-plan_date", "days_of_cover"]
+        constraints = [
+            models.UniqueConstraint(fields=["plan_date", "product"], name="inv_replenish_date_product_uniq"),
+        ]
+        indexes = [
+            # 화면: 최신 plan_date 의 발주 필요 품목
+            models.Index(fields=["plan_date", "suggested_qty"], name="inv_replenish_date_qty_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Replenish({self.product_id}) {self.plan_date} suggest={self.suggested_qty}"
@@ -15,6 +15,8 @@ class InventoryLot(models.Model):
     supplier = models.ForeignKey("partners.Partner", on_delete=models.PROTECT)
 
     received_date = models.DateField()
+    # 유통기한/소비기한 (신선/냉동 로트). FEFO 출고와 임박 리포트에 사용
+    expiry_date = models.DateField(null=True, blank=True)
 
     qty_units_received = models.DecimalField(max_digits=14, decimal_places=4)
     qty_units_remaining = models.DecimalField(max_digits=14, decimal_places=4)
@@ -46,6 +48,26 @@ class InventoryLot(models.Model):
 
     class Meta:
         ordering = ["-received_date", "-created_at"]
+        indexes = [
+            # FIFO 출고: 품목별 남은 로트를 입고일 순으로 (남은 수량 있는 로트만 인덱스에 포함)
+            models.Index(
+                fields=["product", "received_date", "id"],
+                condition=models.Q(qty_units_remaining__gt=0),
+                name="inv_lot_open_fifo_idx",
+            ),
+            # FEFO 출고: 품목별 남은 로트를 유통기한 순으로
+            models.Index(
+                fields=["product", "expiry_date", "id"],
+                condition=models.Q(qty_units_remaining__gt=0),
+                name="inv_lot_open_expiry_idx",
+            ),
+            # 유통기한 임박 리포트: 전체 품목에서 expiry_date 범위
+            models.Index(
+                fields=["expiry_date"],
+                condition=models.Q(qty_units_remaining__gt=0, expiry_date__isnull=False),
+                name="inv_lot_open_expiry_date_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Lot({self.product.sku_code}) {self.received_date} qty={self.qty_units_received} cost={self.landed_cost_php_per_unit}"
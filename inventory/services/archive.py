@@ -0,0 +1,125 @@
+# inventory/services/archive.py
+
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.exports import chunked
+from core.pagination import keyset_page
+from inventory.models import StockMovement, StockMovementArchive
+
+
+OPENING_REF_TABLE = StockMovement.OPENING_REF_TABLE
+ARCHIVE_FIELDS = ("id", "product_id", "movement_type", "qty_units", "ref_table", "ref_id", "memo", "created_at")
+
+
+@dataclass
+class ArchiveResult:
+    cutoff: datetime
+    archived: int
+    openings: int
+
+
+def default_cutoff() -> datetime:
+    """마감 기간(INVENTORY_CLOSED_PERIOD_DAYS) 이전, 그 달 1일 00:00 (현지 시간, aware)."""
+    closed = timezone.localdate() - timedelta(days=settings.INVENTORY_CLOSED_PERIOD_DAYS)
+    return timezone.make_aware(datetime.combine(closed.replace(day=1), time.min))
+
+
+def history_movements():
+    """이월 행을 뺀 최근 movement (archive와 합치면 전체 이력)."""
+    return StockMovement.objects.exclude(ref_table=OPENING_REF_TABLE)
+
+
+def archived_movements():
+    return StockMovementArchive.objects.all()
+
+
+@transaction.atomic
+def archive_movements(cutoff: datetime, *, batch_size: int = 5000) -> ArchiveResult:
+    """
+    created_at < cutoff 인 StockMovement를 StockMovementArchive로 옮기고,
+    품목별로 옮긴 수량 합계(+ 기존 이월 행)를 이월 행(ADJ) 하나로 남긴다.
+
+    - 이월 행 created_at = cutoff 직전 → 최근 테이블만 합산해도 재고/누적잔액이 그대로 맞다
+    - 기존 이월 행은 archive로 옮기지 않고 새 이월 행에 합쳐진다 (archive + 최근(이월 제외) = 전체 이력)
+    - 같은 cutoff로 다시 돌려도 결과는 같다
+    """
+    cold = StockMovement.objects.filter(created_at__lt=cutoff)
+
+    carry = dict(
+        cold.values("product_id")
+        .annotate(qty=Sum(StockMovement.signed_qty_expression()))
+        .values_list("product_id", "qty")
+    )
+
+    now = timezone.now()
+    archived = 0
+    rows = (
+        cold.exclude(ref_table=OPENING_REF_TABLE)
+        .order_by("id")
+        .values_list(*ARCHIVE_FIELDS)
+        .iterator(chunk_size=batch_size)
+    )
+    for chunk in chunked(rows, batch_size):
+        StockMovementArchive.objects.bulk_create([
+            StockMovementArchive(**dict(zip(ARCHIVE_FIELDS, r)), archived_at=now)
+            for r in chunk
+        ])
+        archived += len(chunk)
+
+    cold.delete()
+
+    opening_at = cutoff - timedelta(microseconds=1)
+    openings = [
+        StockMovement(
+            product_id=pid,
+            movement_type=StockMovement.ADJ,
+            qty_units=Decimal(qty),
+            ref_table=OPENING_REF_TABLE,
+            memo=f"Opening balance carried forward (archived before {timezone.localtime(cutoff):%Y-%m-%d})",
+            created_at=opening_at,
+        )
+        for pid, qty in carry.items()
+        if qty
+    ]
+    StockMovement.objects.bulk_create(openings, batch_size=2000)
+
+    return ArchiveResult(cutoff=cutoff, archived=archived, openings=len(openings))
+
+
+def movements_page(cursor: dict | None, *, page_size: int, **filters):
+    """
+    최근 + archive 를 이어서 (created_at, id) 내림차순 keyset 페이지로.
+    archive 행은 전부 최근 행보다 오래됐으므로 같은 cursor로 최근 → archive 순서로 이어 읽으면 된다.
+    반환: (items, has_more)
+    """
+    items, has_more = keyset_page(
+        history_movements().select_related("product").filter(**filters), cursor, page_size=page_size,
+    )
+    if has_more:
+        return items, True
+
+    remaining = page_size - len(items)
+    archived, archive_more = keyset_page(
+        archived_movements().select_related("product").filter(**filters), cursor, page_size=max(remaining, 1),
+    )
+    if remaining == 0:
+        return items, bool(archived)
+    return items + archived, archive_more
+
+
+def iter_movement_values(*fields, chunk_size: int = 2000, **filters):
+    """export용: 최근(이월 제외) → archive 순서로 created_at 내림차순 values_list 스트리밍."""
+    for qs in (history_movements(), archived_movements()):
+        yield from (
+            qs.filter(**filters)
+            .order_by("-created_at", "-id")
+            .values_list(*fields)
+            .iterator(chunk_size=chunk_size)
+        )
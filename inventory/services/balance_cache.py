@@ -0,0 +1,117 @@
+# inventory/services/balance_cache.py
+
+import threading
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from core.exports import chunked
+from inventory.models import InventoryBalance
+
+
+KEY_PREFIX = "inventory:balance:"
+
+
+class CachedBalance(NamedTuple):
+    on_hand_qty_units: Decimal
+    avg_cost_php_per_unit: Decimal
+
+
+EMPTY_BALANCE = CachedBalance(Decimal("0"), Decimal("0"))
+
+
+class _Counters:
+    """프로세스 단위 hit/miss 카운터 (여러 스레드에서 읽으므로 lock)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, hits: int, misses: int) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+_counters = _Counters()
+
+
+def _cache():
+    return caches[settings.INVENTORY_BALANCE_CACHE]
+
+
+def _key(product_id: int) -> str:
+    return f"{KEY_PREFIX}{product_id}"
+
+
+def get_balances(product_ids) -> dict[int, CachedBalance]:
+    """
+    품목별 (수량, 평균원가) 읽기 전용 조회. 캐시에 없는 품목만 DB에서 한 번에 읽어 채운다
+    (get_many 1회 + 누락분 id__in 조회 + set_many 1회).
+    balance 행이 없는 품목은 EMPTY_BALANCE 로 캐시한다 (없는 품목도 매번 DB를 보지 않도록).
+
+    재고 검사/차감에는 쓰지 않는다: 쓰기는 MovementJournal 이 DB 행을 잠그고 검사한다.
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    if not product_ids:
+        return {}
+
+    cache = _cache()
+    cached = cache.get_many([_key(pid) for pid in product_ids])
+    result = {pid: cached[_key(pid)] for pid in product_ids if _key(pid) in cached}
+    missing = [pid for pid in product_ids if pid not in result]
+    _counters.add(len(result), len(missing))
+
+    if missing:
+        loaded = {pid: EMPTY_BALANCE for pid in missing}
+        for ids in chunked(missing, 5000):
+            rows = (
+                InventoryBalance.objects
+                .filter(product_id__in=ids)
+                .values_list("product_id", "on_hand_qty_units", "avg_cost_php_per_unit")
+            )
+            loaded.update({pid: CachedBalance(qty, avg) for pid, qty, avg in rows})
+        cache.set_many({_key(pid): b for pid, b in loaded.items()})
+        result.update(loaded)
+
+    return result
+
+
+def get_balance(product_id: int) -> CachedBalance:
+    return get_balances([product_id])[product_id]
+
+
+def invalidate_balances(product_ids) -> None:
+    """
+    balance 쓰기 직후 호출. invalidate_valuation 과 같이 커밋된 뒤에 지운다
+    (롤백되면 캐시는 그대로, 커밋 전에 다른 요청이 옛 값으로 다시 채우는 것도 방지).
+    """
+    keys = [_key(pid) for pid in product_ids]
+    if keys:
+        transaction.on_commit(lambda: _cache().delete_many(keys))
+
+
+def cache_stats() -> dict:
+    """{"hits", "misses", "hit_rate"} (이 프로세스 기준, reset_cache_stats() 이후 누적)."""
+    return _counters.snapshot()
+
+
+def reset_cache_stats() -> None:
+    _counters.reset()
@@ -1,8 +1,11 @@
 from decimal import Decimal
 from django.db import transaction
-from django.utils import timezone
 
+from core.fixedpoint import div_half_even, field_places, from_fixed, to_fixed
+from fx.services import rate_for, rates_for
 from inventory.models import InventoryBalance, Product, InventoryLot
+from inventory.services.journal import MovementJournal
+from partners.models import Partner
 
 
 def ceil_to_nearest(value: Decimal, unit: Decimal) -> Decimal:
@@ -17,29 +20,91 @@ def ceil_to_nearest(value: Decimal, unit: Decimal) -> Decimal:
 
 
 @transaction.atomic
-def apply_receiving_to_balance(*, product: Product, in_qty: Decimal, in_unit_cost_php: Decimal) -> InventoryBalance:
+def apply_receiving_to_balance(
+    *, product: Product, in_qty: Decimal, in_unit_cost_php: Decimal, memo: str = "Manual receiving correction",
+) -> InventoryBalance:
     """
-    입고가 발생했을 때 InventoryBalance(수량/평균원가)를 갱신한다.
-    평균원가 공식:
-      new_avg = (old_qty*old_avg + in_qty*in_cost) / (old_qty + in_qty)
+    로트 없이 재고를 수동 보정한다 (수량 + 평균원가). balance 는 직접 쓰지 않고 MovementJournal 을 거치므로
+    항상 movement(ref_table="manual")가 남고, ledger 합계 == balance 가 유지된다 (reconcile 드리프트 없음).
+      - in_qty > 0: 원가 있는 IN → 이동평균원가 반영
+        new_avg = (old_qty*old_avg + in_qty*in_cost) / (old_qty + in_qty)
+      - in_qty < 0: ADJ (평균원가 그대로). 재고가 음수가 되면 InsufficientStock, 아무것도 쓰지 않는다.
+    일반 입고는 create_inventory_lot() 을 쓴다.
     """
-    balance, _ = InventoryBalance.objects.select_for_update().get_or_create(product=product)
+    with MovementJournal() as journal:
+        if in_qty > 0:
+            journal.add_in(product_id=product.pk, qty_units=in_qty, unit_cost_php=in_unit_cost_php,
+                           ref_table="manual", memo=memo)
+        else:
+            journal.add_adj(product_id=product.pk, qty_units=in_qty, ref_table="manual", memo=memo)
+    return InventoryBalance.objects.get_or_create(product=product)[0]
 
-    old_qty = balance.on_hand_qty_units
-    old_avg = balance.avg_cost_php_per_unit
 
-    new_qty = old_qty + in_qty
-    if new_qty == 0:
-        balance.on_hand_qty_units = Decimal("0")
-        balance.avg_cost_php_per_unit = Decimal("0")
-    else:
-        new_avg = (old_qty * old_avg + in_qty * in_unit_cost_php) / new_qty
-        balance.on_hand_qty_units = new_qty
-        balance.avg_cost_php_per_unit = new_avg
+_QTY = field_places(InventoryLot, "qty_units_received")
+_FX = field_places(InventoryLot, "fx_rate_snapshot")
+_COST = field_places(InventoryLot, "supplier_cost_krw_per_unit")
+_RATE = field_places(InventoryLot, "supplier_markup_rate_snapshot")
+_KRW_PER_KG = field_places(InventoryLot, "transport_krw_per_kg_snapshot")
+_WEIGHT = field_places(InventoryLot, "billable_weight_kg_total")
+_OTHER = field_places(InventoryLot, "other_cost_php_total")
+_TRANSPORT_PLACES = _WEIGHT + _KRW_PER_KG + _FX
+_TOTAL_PLACES = _COST + _RATE + _FX + _QTY
+_OUT = {
+    name: field_places(InventoryLot, name)
+    for name in ("transport_cost_php_total_snapshot", "landed_cost_php_total", "landed_cost_php_per_unit")
+}
 
-    balance.last_updated_at = timezone.now()
-    balance.save()
-    return balance
+
+def compute_landed_cost(
+    *,
+    qty_units_received: Decimal,
+    fx_rate_snapshot: Decimal,
+    supplier_cost_krw_per_unit: Decimal,
+    supplier_markup_rate_snapshot: Decimal,
+    transport_krw_per_kg_snapshot: Decimal,
+    billable_weight_kg_total: Decimal,
+    other_cost_php_total: Decimal = Decimal("0"),
+) -> dict:
+    """
+    입고 1건의 landed cost(PHP)를 계산한다. DB 접근 없음.
+    단건(create_inventory_lot)과 대량(create_inventory_lots_bulk) 입고가 같은 식을 쓰도록 분리.
+    입력 컬럼 자릿수의 정수(core.fixedpoint)로 정확히 계산하고, 결과는 InventoryLot 컬럼 자릿수로 한 번만 반올림한다
+    (평균원가 계산과 스냅샷 replay 가 저장된 로트 단가와 같은 값을 쓰도록).
+    """
+    if qty_units_received <= 0:
+        raise ValueError("qty_units_received must be > 0")
+
+    qty = to_fixed(qty_units_received, _QTY)
+    fx = to_fixed(fx_rate_snapshot, _FX)
+
+    # 1) supplier pay PHP per unit = supplier_cost * (1 + markup) * fx
+    supplier_pay = to_fixed(supplier_cost_krw_per_unit, _COST) * (
+        10 ** _RATE + to_fixed(supplier_markup_rate_snapshot, _RATE)
+    ) * fx
+
+    # 2) transport cost PHP total = (billable_weight * krw_per_kg) * fx
+    transport = to_fixed(billable_weight_kg_total, _WEIGHT) * to_fixed(transport_krw_per_kg_snapshot, _KRW_PER_KG) * fx
+
+    # 3) landed cost PHP total = supplier pay * qty + transport + other  (자릿수 _TOTAL_PLACES)
+    total = (
+        supplier_pay * qty
+        + transport * 10 ** (_TOTAL_PLACES - _TRANSPORT_PLACES)
+        + to_fixed(other_cost_php_total, _OTHER) * 10 ** (_TOTAL_PLACES - _OTHER)
+    )
+
+    # 4) 컬럼 자릿수로: 총액/운송비는 그대로, 단가는 qty 로 나눈 값
+    out_transport = _OUT["transport_cost_php_total_snapshot"]
+    out_total = _OUT["landed_cost_php_total"]
+    out_unit = _OUT["landed_cost_php_per_unit"]
+    return {
+        "transport_cost_php_total_snapshot": from_fixed(
+            div_half_even(transport, 10 ** (_TRANSPORT_PLACES - out_transport)), out_transport
+        ),
+        "landed_cost_php_total": from_fixed(div_half_even(total, 10 ** (_TOTAL_PLACES - out_total)), out_total),
+        "landed_cost_php_per_unit": from_fixed(
+            div_half_even(total, qty * 10 ** (_TOTAL_PLACES - _QTY - out_unit)), out_unit
+        ),
+    }
 
 
 @transaction.atomic
@@ -49,7 +114,7 @@ def create_inventory_lot(
     supplier_id: int,
     received_date,
     qty_units_received: Decimal,
-    fx_rate_snapshot: Decimal,
+    fx_rate_snapshot: Decimal | None,
     supplier_cost_krw_per_unit: Decimal,
     supplier_markup_rate_snapshot: Decimal,
     transport_mode: str,
@@ -57,35 +122,34 @@ def create_inventory_lot(
     billable_weight_kg_total: Decimal,
     other_cost_php_total: Decimal = Decimal("0"),
     memo: str = "",
+    expiry_date=None,
 ) -> InventoryLot:
     """
     입고 로트를 생성하고, 평균원가/재고를 갱신한다.
     - 여기서 landed_cost(입고 총원가)를 확정해 스냅샷으로 저장한다.
+    - fx_rate_snapshot 이 None 이면 입고일의 FXRatePeriod 환율을 쓴다 (fx.services.rate_for, 쿼리 없음).
     """
+    if fx_rate_snapshot is None:
+        fx_rate_snapshot = rate_for(received_date)
 
-    # 1) supplier pay KRW per unit = supplier_cost * (1 + markup)
-    supplier_pay_krw_per_unit = supplier_cost_krw_per_unit * (Decimal("1") + supplier_markup_rate_snapshot)
-
-    # 2) supplier pay PHP per unit
-    supplier_pay_php_per_unit = supplier_pay_krw_per_unit * fx_rate_snapshot
-
-    # 3) transport cost PHP total = (billable_weight * krw_per_kg) * fx
-    transport_cost_php_total = (billable_weight_kg_total * transport_krw_per_kg_snapshot) * fx_rate_snapshot
-
-    # 4) landed cost PHP total
-    supplier_total_php = supplier_pay_php_per_unit * qty_units_received
-    landed_cost_php_total = supplier_total_php + transport_cost_php_total + other_cost_php_total
-
-    # 5) unit landed cost
-    if qty_units_received == 0:
-        raise ValueError("qty_units_received must be > 0")
-
-    landed_cost_php_per_unit = landed_cost_php_total / qty_units_received
+    costs = compute_landed_cost(
+        qty_units_received=qty_units_received,
+        fx_rate_snapshot=fx_rate_snapshot,
+        supplier_cost_krw_per_unit=supplier_cost_krw_per_unit,
+        supplier_markup_rate_snapshot=supplier_markup_rate_snapshot,
+        transport_krw_per_kg_snapshot=transport_krw_per_kg_snapshot,
+        billable_weight_kg_total=billable_weight_kg_total,
+        other_cost_php_total=other_cost_php_total,
+    )
+    transport_cost_php_total = costs["transport_cost_php_total_snapshot"]
+    landed_cost_php_total = costs["landed_cost_php_total"]
+    landed_cost_php_per_unit = costs["landed_cost_php_per_unit"]
 
     lot = InventoryLot.objects.create(
         product=product,
         supplier_id=supplier_id,
         received_date=received_date,
+        expiry_date=expiry_date,
         qty_units_received=qty_units_received,
         qty_units_remaining=qty_units_received,
 
@@ -106,7 +170,99 @@ def create_inventory_lot(
         memo=memo,
     )
 
-    # 평균원가 반영
-    apply_receiving_to_balance(product=product, in_qty=qty_units_received, in_unit_cost_php=landed_cost_php_per_unit)
+    # IN movement + 재고/평균원가 반영 (balance 쓰기는 1번)
+    with MovementJournal() as journal:
+        journal.add_in(
+            product_id=product.id,
+            qty_units=qty_units_received,
+            unit_cost_php=landed_cost_php_per_unit,
+            ref_table="inventory_inventorylot",
+            ref_id=lot.id,
+            memo=f"Received from {lot.supplier}",
+        )
 
     return lot
+
+
+@transaction.atomic
+def create_inventory_lots_bulk(rows) -> list[InventoryLot]:
+    """
+    여러 입고 로트를 한 트랜잭션에서 한 번에 생성한다 (컨테이너 입고 등).
+
+    rows: create_inventory_lot()과 같은 키를 가진 dict의 iterable.
+      (product, supplier_id, received_date, qty_units_received, fx_rate_snapshot, ...)
+
+    fx_rate_snapshot 이 없는(None) 행은 입고일 환율을 쓴다 (fx.services.rates_for, 쿼리 없음).
+
+    쿼리 수 (savepoint 제외):
+      - 로트 bulk_create: SQLite 는 bind 변수 한도(999) 때문에 약 50행마다 INSERT 1회
+      - 공급사 이름 조회 1회
+      - MovementJournal.commit(): balance 잠금 조회 1회 (balance 없는 품목이 있으면 bulk_create + 재조회 1회씩)
+        + 품목별 조건부 UPDATE 1회씩 + IN movement bulk_create (약 140행마다 INSERT 1회)
+    즉 로트 수가 아니라 품목 수에 비례한다.
+    bench_receiving --products 1 기준 (savepoint 포함) 1 / 10 / 100 / 300 로트 → 12 / 11 / 12 / 18 쿼리,
+    --products 5 기준 12 / 15 / 16 / 22 쿼리.
+    """
+
+    rows = list(rows)
+    fx_rates = rates_for(r["received_date"] for r in rows if r.get("fx_rate_snapshot") is None)
+
+    # 1) landed cost 일괄 계산 (DB 접근 없음)
+    lots = []
+    for row in rows:
+        fx_rate = row.get("fx_rate_snapshot")
+        if fx_rate is None:
+            fx_rate = fx_rates[row["received_date"]]
+        qty = row["qty_units_received"]
+        other_cost = row.get("other_cost_php_total", Decimal("0"))
+        costs = compute_landed_cost(
+            qty_units_received=qty,
+            fx_rate_snapshot=fx_rate,
+            supplier_cost_krw_per_unit=row["supplier_cost_krw_per_unit"],
+            supplier_markup_rate_snapshot=row["supplier_markup_rate_snapshot"],
+            transport_krw_per_kg_snapshot=row["transport_krw_per_kg_snapshot"],
+            billable_weight_kg_total=row["billable_weight_kg_total"],
+            other_cost_php_total=other_cost,
+        )
+        lots.append(InventoryLot(
+            product=row["product"],
+            supplier_id=row["supplier_id"],
+            received_date=row["received_date"],
+            expiry_date=row.get("expiry_date"),
+            qty_units_received=qty,
+            qty_units_remaining=qty,
+
+            fx_rate_snapshot=fx_rate,
+            supplier_cost_krw_per_unit=row["supplier_cost_krw_per_unit"],
+            supplier_markup_rate_snapshot=row["supplier_markup_rate_snapshot"],
+
+            transport_mode=row["transport_mode"],
+            transport_krw_per_kg_snapshot=row["transport_krw_per_kg_snapshot"],
+            billable_weight_kg_total=row["billable_weight_kg_total"],
+
+            other_cost_php_total=other_cost,
+
+            memo=row.get("memo", ""),
+            **costs,
+        ))
+
+    if not lots:
+        return []
+
+    # 2) 로트 저장 (PK가 채워져야 movement ref_id로 쓸 수 있음)
+    InventoryLot.objects.bulk_create(lots)
+
+    # 3) IN movement + 품목별 재고/평균원가 반영 (memo용 공급사 이름도 한 번에 조회)
+    suppliers = Partner.objects.in_bulk({lot.supplier_id for lot in lots})
+    with MovementJournal() as journal:
+        for lot in lots:
+            journal.add_in(
+                product_id=lot.product_id,
+                qty_units=lot.qty_units_received,
+                unit_cost_php=lot.landed_cost_php_per_unit,
+                ref_table="inventory_inventorylot",
+                ref_id=lot.id,
+                memo=f"Received from {suppliers.get(lot.supplier_id)}",
+            )
+
+    return lots
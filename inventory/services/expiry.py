@@ -0,0 +1,32 @@
+# inventory/services/expiry.py
+
+from datetime import date, timedelta
+
+from django.db import models
+from django.db.models import ExpressionWrapper, F
+from django.utils import timezone
+
+from inventory.models import InventoryLot
+
+
+def expiring_lots(within_days: int, today: date | None = None):
+    """
+    남은 수량이 있고 유통기한이 today + within_days 이하인 로트 (이미 지난 것 포함), 유통기한 순.
+    쿼리 1번 (inv_lot_open_expiry_date_idx 범위 조회 + product/supplier PK 조인).
+    각 로트에 remaining_value_php(남은 수량 × 로트 원가)를 붙인다.
+    """
+    today = today or timezone.localdate()
+    return (
+        InventoryLot.objects
+        .filter(
+            qty_units_remaining__gt=0,
+            expiry_date__isnull=False,
+            expiry_date__lte=today + timedelta(days=within_days),
+        )
+        .select_related("product", "supplier")
+        .annotate(remaining_value_php=ExpressionWrapper(
+            F("qty_units_remaining") * F("landed_cost_php_per_unit"),
+            output_field=models.DecimalField(max_digits=18, decimal_places=4),
+        ))
+        .order_by("expiry_date", "id")
+    )
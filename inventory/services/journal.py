@@ -0,0 +1,186 @@
+# inventory/services/journal.py
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.fixedpoint import average_cost
+from inventory.models import InventoryBalance, StockMovement
+from inventory.services.balance_cache import invalidate_balances
+from inventory.services.valuation import invalidate_valuation
+
+
+class InsufficientStock(ValueError):
+    """OUT/ADJ 반영 후 재고가 음수가 되는 경우."""
+
+
+class MovementJournal:
+    """
+    재고 이동(IN/OUT/ADJ)을 한 작업 단위 동안 모았다가 commit()에서 한 번에 반영한다.
+
+    commit() 시:
+      - InventoryBalance: 관련 품목 잠금 조회 1회 (product_id 순) (+ 없는 품목 bulk_create 1회)
+        + 품목별 조건부 UPDATE 1회 (on_hand = on_hand + delta WHERE on_hand >= 차감량)
+      - StockMovement: bulk_create 1회
+    품목별로 수량을 합산해서 한 번만 쓰므로, 같은 품목이 여러 줄이어도 balance row 쓰기는 1번이다.
+    잠금은 항상 product_id 순서로 한 번에 잡으므로, 같은 품목들을 다른 순서로 담은 인보이스끼리도 교착되지 않는다.
+
+    수량 규칙:
+      - IN: qty > 0. unit_cost_php가 있으면 이동평균원가에 반영, 없으면(취소 복구 등) 현재 평균원가로 들어온 것으로 본다.
+      - OUT: qty > 0. 평균원가는 바뀌지 않는다.
+      - ADJ: qty는 부호 있는 증감값(+/-). 평균원가는 바뀌지 않는다.
+    반영 후 재고가 음수가 되는 품목이 있으면 InsufficientStock을 올리고 아무것도 쓰지 않는다.
+
+    사용 예:
+        with MovementJournal() as journal:
+            journal.add_out(product_id=..., qty_units=..., ref_table="sales_salesinvoice", ref_id=invoice.id)
+        # with 블록이 예외 없이 끝나면 commit()
+    """
+
+    def __init__(self):
+        self._entries: list[StockMovement] = []
+        self._in_costs: dict[int, list] = defaultdict(list)  # product_id -> [(qty, unit_cost or None)]
+        self.committed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        return False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add_in(self, *, product_id: int, qty_units: Decimal, unit_cost_php: Decimal | None = None,
+               ref_table: str = "", ref_id: int | None = None, memo: str = "") -> None:
+        if not qty_units or qty_units <= 0:
+            return
+        self._in_costs[product_id].append((qty_units, unit_cost_php))
+        self._add(StockMovement.IN, product_id, qty_units, ref_table, ref_id, memo)
+
+    def add_out(self, *, product_id: int, qty_units: Decimal,
+                ref_table: str = "", ref_id: int | None = None, memo: str = "") -> None:
+        if not qty_units or qty_units <= 0:
+            return
+        self._add(StockMovement.OUT, product_id, qty_units, ref_table, ref_id, memo)
+
+    def add_adj(self, *, product_id: int, qty_units: Decimal,
+                ref_table: str = "", ref_id: int | None = None, memo: str = "") -> None:
+        if not qty_units:
+            return
+        self._add(StockMovement.ADJ, product_id, qty_units, ref_table, ref_id, memo)
+
+    def _add(self, movement_type, product_id, qty_units, ref_table, ref_id, memo):
+        if self.committed:
+            raise RuntimeError("MovementJournal already committed.")
+        self._entries.append(StockMovement(
+            product_id=product_id,
+            movement_type=movement_type,
+            qty_units=qty_units,
+            ref_table=ref_table,
+            ref_id=ref_id,
+            memo=memo,
+        ))
+
+    def deltas(self) -> dict[int, Decimal]:
+        """품목별 순증감 수량 (IN +, OUT -, ADJ 부호 그대로)."""
+        out = defaultdict(lambda: Decimal("0"))
+        for m in self._entries:
+            out[m.product_id] += m.signed_qty_units
+        return dict(out)
+
+    @transaction.atomic
+    def commit(self) -> list[StockMovement]:
+        if self.committed:
+            raise RuntimeError("MovementJournal already committed.")
+        self.committed = True
+
+        if not self._entries:
+            return []
+
+        now = timezone.now()
+        deltas = self.deltas()
+
+        # 1) 관련 balance를 product_id 순으로 한 번에 잠금 조회, 없으면 한 번에 생성
+        balances = self._lock_balances(deltas)
+        missing = [pid for pid in deltas if pid not in balances]
+        if missing:
+            InventoryBalance.objects.bulk_create([
+                InventoryBalance(
+                    product_id=pid,
+                    on_hand_qty_units=Decimal("0"),
+                    avg_cost_php_per_unit=Decimal("0"),
+                    last_updated_at=now,
+                )
+                for pid in missing
+            ], ignore_conflicts=True)  # 동시에 다른 트랜잭션이 만든 경우
+            balances.update(self._lock_balances(missing))
+
+        # 2) 품목별 재고 검사/평균원가 계산 (메모리)
+        for pid, delta in deltas.items():
+            balance = balances[pid]
+            old_qty = Decimal(balance.on_hand_qty_units)
+            old_avg = Decimal(balance.avg_cost_php_per_unit)
+
+            new_qty = old_qty + delta
+            if new_qty < 0:
+                raise self._insufficient(balance, old_qty, delta)
+
+            receipts = self._in_costs.get(pid)
+            if receipts:
+                # new_avg = (old_qty*old_avg + Σ in_qty*in_cost) / (old_qty + Σ in_qty)
+                # 정확히 계산한 뒤 InventoryBalance 자릿수(4)로 한 번만 반올림 (core.fixedpoint)
+                in_qty = sum((q for q, _ in receipts), Decimal("0"))
+                in_value = sum((q * (old_avg if c is None else c) for q, c in receipts), Decimal("0"))
+                balance.avg_cost_php_per_unit = average_cost(old_qty, old_avg, in_qty, in_value)
+
+            balance.on_hand_qty_units = new_qty
+            balance.last_updated_at = now
+
+        # 3) balance 쓰기: 품목별 조건부 UPDATE (수량은 F() 로 DB에서 증감, 차감분이 없으면 0 row → 롤백)
+        for pid in sorted(deltas):
+            delta = deltas[pid]
+            balance = balances[pid]
+            fields = {"on_hand_qty_units": F("on_hand_qty_units") + delta, "last_updated_at": now}
+            if pid in self._in_costs:
+                fields["avg_cost_php_per_unit"] = balance.avg_cost_php_per_unit
+            elif delta == 0:
+                continue
+
+            qs = InventoryBalance.objects.filter(pk=balance.pk)
+            if delta < 0:
+                qs = qs.filter(on_hand_qty_units__gte=-delta)
+            if qs.update(**fields) == 0:
+                current = InventoryBalance.objects.filter(pk=balance.pk).values_list("on_hand_qty_units", flat=True).first()
+                raise self._insufficient(balance, Decimal(current or 0), delta)
+
+        # 4) movement 쓰기 1회
+        StockMovement.objects.bulk_create(self._entries)
+        invalidate_balances(deltas)
+        invalidate_valuation()
+        return self._entries
+
+    @staticmethod
+    def _lock_balances(product_ids) -> dict:
+        return {
+            b.product_id: b
+            for b in (
+                InventoryBalance.objects
+                .select_for_update(of=("self",))
+                .select_related("product")
+                .filter(product_id__in=list(product_ids))
+                .order_by("product_id")
+            )
+        }
+
+    @staticmethod
+    def _insufficient(balance, on_hand: Decimal, delta: Decimal) -> InsufficientStock:
+        return InsufficientStock(
+            f"Insufficient stock for {balance.product.sku_code}. "
+            f"On hand={on_hand}, required={-delta}"
+        )
@@ -0,0 +1,188 @@
+# inventory/services/product_import.py
+
+import csv
+import re
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from core.exports import chunked
+from inventory.models import Product
+from inventory.services.search import index_products
+from inventory.services.valuation import invalidate_valuation
+
+
+REQUIRED_COLUMNS = ["sku_code", "name_en", "base_unit", "net_weight_kg_per_unit"]
+OPTIONAL_COLUMNS = [
+    "name_ko",
+    "origin_country",
+    "origin_name",
+    "packaging_note",
+    "memo",
+    "is_active",
+    "default_transport_mode",
+]
+IMPORT_CHUNK_SIZE = 2000
+MAX_ERROR_MESSAGES = 200  # 이보다 많으면 개수만 센다
+
+WEIGHT_QUANT = Decimal("0.0001")  # Product.net_weight_kg_per_unit 소수 자릿수와 동일
+COUNTRY_RE = re.compile(r"^[A-Z]{2}$")
+TRANSPORT_MODES = set(Product.DefaultTransportMode.values)
+TRUE_VALUES = {"1", "true", "t", "yes", "y"}
+FALSE_VALUES = {"0", "false", "f", "no", "n"}
+
+
+@dataclass
+class ProductImportResult:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    error_count: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def add_error(self, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_ERROR_MESSAGES:
+            self.errors.append(message)
+
+
+def _max_length(name: str) -> int | None:
+    return Product._meta.get_field(name).max_length
+
+
+def _text(r: dict, name: str, *, required: bool = False) -> str:
+    value = (r.get(name) or "").strip()
+    if required and not value:
+        raise ValueError(f"{name} is required")
+    limit = _max_length(name)
+    if limit and len(value) > limit:
+        raise ValueError(f"{name} is longer than {limit} characters")
+    return value
+
+
+def _parse_row(r: dict) -> dict:
+    """CSV 1행 → Product 필드 dict. 파일에 있는 컬럼만 담는다 (없는 컬럼은 기존 값 유지 / 새 품목은 모델 기본값)."""
+    values = {
+        "sku_code": _text(r, "sku_code", required=True),
+        "name_en": _text(r, "name_en", required=True),
+        "base_unit": _text(r, "base_unit", required=True),
+    }
+    try:
+        weight = Decimal(_text(r, "net_weight_kg_per_unit", required=True)).quantize(WEIGHT_QUANT)
+    except InvalidOperation:
+        raise ValueError("net_weight_kg_per_unit is not a number")
+    if weight < 0:
+        raise ValueError("net_weight_kg_per_unit must be >= 0")
+    values["net_weight_kg_per_unit"] = weight
+
+    for name in ("name_ko", "packaging_note", "memo"):
+        if name in r:
+            values[name] = _text(r, name)
+
+    # 원산지는 nullable: 빈 칸 = NULL
+    if "origin_country" in r:
+        country = (r["origin_country"] or "").strip().upper()
+        if country and not COUNTRY_RE.match(country):
+            raise ValueError(f"origin_country must be a 2-letter ISO code: {country!r}")
+        values["origin_country"] = country or None
+    if "origin_name" in r:
+        values["origin_name"] = _text(r, "origin_name") or None
+
+    if "is_active" in r:
+        flag = (r["is_active"] or "").strip().lower()
+        if flag and flag not in TRUE_VALUES | FALSE_VALUES:
+            raise ValueError(f"is_active must be true/false: {flag!r}")
+        values["is_active"] = flag not in FALSE_VALUES
+
+    if "default_transport_mode" in r:
+        mode = _text(r, "default_transport_mode").upper() or Product.DefaultTransportMode.OCEAN
+        if mode not in TRANSPORT_MODES:
+            raise ValueError(f"default_transport_mode must be one of {', '.join(sorted(TRANSPORT_MODES))}: {mode!r}")
+        values["default_transport_mode"] = mode
+
+    return values
+
+
+def _upsert_chunk(parsed: list[dict], fields: list[str], result: ProductImportResult, *, dry_run: bool) -> None:
+    """
+    chunk 1개: 기존 값 조회 1쿼리 → 바뀐 행/새 행만 bulk_create(update_conflicts) 1회 → 검색 인덱스 갱신.
+    값이 같은 행은 쓰지 않는다 (unchanged).
+    """
+    existing = {
+        row[0]: row[1:]
+        for row in Product.objects
+        .filter(sku_code__in=[v["sku_code"] for v in parsed])
+        .values_list("sku_code", *fields)
+    }
+
+    changed = []
+    for values in parsed:
+        current = existing.get(values["sku_code"])
+        if current is None:
+            result.inserted += 1
+        elif tuple(values[f] for f in fields) == current:
+            result.unchanged += 1
+            continue
+        else:
+            result.updated += 1
+        changed.append(Product(**values))
+
+    if dry_run or not changed:
+        return
+
+    Product.objects.bulk_create(
+        changed,
+        update_conflicts=True,
+        unique_fields=["sku_code"],
+        update_fields=fields,
+    )
+    # bulk_create 는 post_save 를 보내지 않으므로 검색 인덱스는 여기서 (새 품목 id 포함해서 다시 읽음)
+    index_products(
+        Product.objects
+        .filter(sku_code__in=[p.sku_code for p in changed])
+        .values_list("id", "sku_code", "name_en", "name_ko")
+    )
+
+
+def import_products(lines, *, chunk_size: int = IMPORT_CHUNK_SIZE, dry_run: bool = False) -> ProductImportResult:
+    """
+    상품 마스터 CSV(lines: 텍스트 줄 iterable, 예: open(..., newline="") 파일)를 sku_code 기준으로 upsert 한다.
+    chunk_size 행씩 읽고 쓰므로 파일 크기와 관계없이 메모리 사용량이 일정하다.
+    - 필수 컬럼: REQUIRED_COLUMNS / 선택 컬럼: OPTIONAL_COLUMNS (파일에 없는 컬럼은 기존 값 유지)
+    - 형식 오류 행과 파일 안에서 중복된 SKU는 건너뛰고 errors 에 "line N: ..." 로 남긴다
+    - dry_run=True: 검증과 집계만 하고 쓰지 않는다
+    전체를 한 트랜잭션으로 실행한다 (중간에 실패하면 아무것도 반영되지 않음).
+    """
+    reader = csv.DictReader(lines)
+    header = reader.fieldnames or []
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    fields = [c for c in REQUIRED_COLUMNS + OPTIONAL_COLUMNS if c in header and c != "sku_code"]
+
+    result = ProductImportResult()
+    seen = set()
+
+    with transaction.atomic():
+        for chunk in chunked(enumerate(reader, start=2), chunk_size):
+            parsed = []
+            for line_no, r in chunk:
+                try:
+                    values = _parse_row(r)
+                except ValueError as e:
+                    result.add_error(f"line {line_no}: {e}")
+                    continue
+                if values["sku_code"] in seen:
+                    result.add_error(f"line {line_no}: duplicate sku_code {values['sku_code']!r} in file")
+                    continue
+                seen.add(values["sku_code"])
+                parsed.append(values)
+            if parsed:
+                _upsert_chunk(parsed, fields, result, dry_run=dry_run)
+
+        if not dry_run and (result.inserted or result.updated):
+            # 원산지/운송수단별 평가액 집계가 바뀔 수 있음
+            invalidate_valuation()
+
+    return result
@@ -0,0 +1,111 @@
+# inventory/services/reconcile.py
+
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.exports import chunked
+from inventory.models import InventoryBalance, Product, StockMovement
+from inventory.services.balance_cache import invalidate_balances
+from inventory.services.valuation import invalidate_valuation
+
+
+QTY_QUANT = Decimal("0.0001")  # InventoryBalance.on_hand_qty_units 소수 자릿수와 동일
+
+
+@dataclass
+class BalanceDrift:
+    product_id: int
+    sku_code: str
+    balance_qty: Decimal | None  # None = InventoryBalance row 없음
+    ledger_qty: Decimal
+
+    @property
+    def diff(self) -> Decimal:
+        return (self.balance_qty or Decimal("0")) - self.ledger_qty
+
+
+def ledger_on_hand(product_ids=None) -> dict:
+    """StockMovement 기준 품목별 재고 = GROUP BY product 집계 1쿼리 (product_ids 를 주면 그 품목만)."""
+    qs = StockMovement.objects.all()
+    if product_ids is not None:
+        qs = qs.filter(product_id__in=product_ids)
+    rows = (
+        qs.values("product_id")
+        .annotate(qty=Sum(StockMovement.signed_qty_expression()))
+        .values_list("product_id", "qty")
+        .iterator(chunk_size=5000)
+    )
+    return {pid: Decimal(qty or 0).quantize(QTY_QUANT) for pid, qty in rows}
+
+
+def find_drift() -> list[BalanceDrift]:
+    """
+    ledger(StockMovement 합계)와 InventoryBalance(캐시)를 비교해서 어긋난 품목 목록.
+    쿼리: ledger 집계 1 + balance 읽기 1 + (어긋난 품목) SKU 조회(5000개 단위). 품목별 루프 쿼리 없음.
+    """
+    ledger = ledger_on_hand()
+    balances = dict(
+        InventoryBalance.objects.values_list("product_id", "on_hand_qty_units").iterator(chunk_size=5000)
+    )
+
+    drifted = {}
+    for pid in ledger.keys() | balances.keys():
+        ledger_qty = ledger.get(pid, Decimal("0"))
+        balance_qty = balances.get(pid)
+        if balance_qty is None and ledger_qty == 0:
+            continue
+        if balance_qty != ledger_qty:
+            drifted[pid] = (balance_qty, ledger_qty)
+
+    skus = {}
+    for ids in chunked(drifted, 5000):
+        skus.update(Product.objects.filter(id__in=ids).values_list("id", "sku_code"))
+    return sorted(
+        (BalanceDrift(pid, skus.get(pid, f"#{pid}"), bal, led) for pid, (bal, led) in drifted.items()),
+        key=lambda d: d.sku_code,
+    )
+
+
+@transaction.atomic
+def repair_drift(drifts: list[BalanceDrift]) -> int:
+    """
+    어긋난 품목의 on_hand_qty_units를 ledger 값으로 맞춘다 (bulk_update 1회, 없는 행은 bulk_create 1회).
+    find_drift 이후 커밋된 입고/출고를 덮어쓰지 않도록, balance 를 잠근 뒤 그 품목들의 ledger 합계를 다시 구해서 쓴다
+    (그 사이 맞춰진 품목은 건너뜀). 평균원가는 건드리지 않는다.
+    반환: 실제로 고친 품목 수
+    """
+    if not drifts:
+        return 0
+
+    now = timezone.now()
+    product_ids = [d.product_id for d in drifts]
+
+    existing, ledger = [], {}
+    for ids in chunked(product_ids, 5000):
+        existing.extend(InventoryBalance.objects.select_for_update().filter(product_id__in=ids).order_by("product_id"))
+        ledger.update(ledger_on_hand(ids))
+
+    stale = []
+    for b in existing:
+        qty = ledger.get(b.product_id, Decimal("0"))
+        if b.on_hand_qty_units != qty:
+            b.on_hand_qty_units = qty
+            b.last_updated_at = now
+            stale.append(b)
+    InventoryBalance.objects.bulk_update(stale, ["on_hand_qty_units", "last_updated_at"], batch_size=2000)
+
+    have = {b.product_id for b in existing}
+    created = InventoryBalance.objects.bulk_create([
+        InventoryBalance(product_id=pid, on_hand_qty_units=ledger[pid], avg_cost_php_per_unit=Decimal("0"), last_updated_at=now)
+        for pid in product_ids
+        if pid not in have and ledger.get(pid)
+    ], batch_size=2000, ignore_conflicts=True)  # 그 사이 journal 이 만든 행은 journal 값이 ledger 와 맞다
+
+    repaired = [b.product_id for b in stale] + [b.product_id for b in created]
+    invalidate_balances(repaired)
+    invalidate_valuation()
+    return len(repaired)
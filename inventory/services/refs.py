@@ -0,0 +1,62 @@
+# inventory/services/refs.py
+
+from collections import defaultdict
+
+from django.apps import apps
+
+
+# ref_table -> (resolver(ids) -> {id: display}, 없는 ref일 때 표시)
+_RESOLVERS = {}
+
+
+def register_ref_resolver(ref_table: str, *, missing: str = "(missing)"):
+    """
+    StockMovement.ref_table 별로 거래처 표시 이름을 찾는 함수를 등록한다.
+    resolver는 ref_id 목록을 받아 {ref_id: 표시문자열}을 돌려주고, 한 번의 id__in 쿼리로 끝내야 한다.
+    """
+    def decorator(fn):
+        _RESOLVERS[ref_table] = (fn, missing)
+        return fn
+    return decorator
+
+
+def resolve_refs(pairs) -> dict:
+    """
+    (ref_table, ref_id) 목록 → {(ref_table, ref_id): partner_display}
+    ref_table 당 쿼리 1회. 등록되지 않은 테이블/빈 ref는 결과에 넣지 않는다.
+    """
+    ids_by_table = defaultdict(set)
+    for ref_table, ref_id in pairs:
+        if ref_id is not None and ref_table in _RESOLVERS:
+            ids_by_table[ref_table].add(ref_id)
+
+    out = {}
+    for ref_table, ids in ids_by_table.items():
+        resolver, missing = _RESOLVERS[ref_table]
+        found = resolver(ids)
+        for ref_id in ids:
+            out[(ref_table, ref_id)] = found.get(ref_id, missing)
+    return out
+
+
+def attach_partner_display(movements) -> list:
+    """
+    StockMovement 목록(이미 필터/슬라이스된 한 페이지)에 m.partner_display를 붙여 돌려준다.
+    """
+    movements = list(movements)
+    resolved = resolve_refs((m.ref_table, m.ref_id) for m in movements)
+    for m in movements:
+        m.partner_display = resolved.get((m.ref_table, m.ref_id), "-")
+    return movements
+
+
+@register_ref_resolver("sales_salesinvoice", missing="(missing invoice)")
+def _resolve_sales_invoices(ids) -> dict:
+    SalesInvoice = apps.get_model("sales", "SalesInvoice")
+    return dict(SalesInvoice.objects.filter(id__in=ids).values_list("id", "customer__name"))
+
+
+@register_ref_resolver("inventory_inventorylot", missing="(missing supplier)")
+def _resolve_inventory_lots(ids) -> dict:
+    InventoryLot = apps.get_model("inventory", "InventoryLot")
+    return dict(InventoryLot.objects.filter(id__in=ids).values_list("id", "supplier__name"))
@@ -0,0 +1,115 @@
+# inventory/services/replenishment.py
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, When
+from django.utils import timezone
+
+from inventory.models import Product, ReplenishmentSuggestion, StockMovement
+from inventory.services.costing import ceil_to_nearest
+
+
+# (기간 일수, 가중치): 최근 판매에 더 무게를 둔다
+VELOCITY_WINDOWS = ((7, Decimal("0.5")), (30, Decimal("0.3")), (90, Decimal("0.2")))
+QTY_QUANT = Decimal("0.0001")
+ORDER_UNIT = Decimal("1")  # 제안 수량은 단위 올림
+
+
+def _demand_expression():
+    """순출고: 판매 OUT +qty, 인보이스 취소 복구 IN -qty."""
+    return Case(
+        When(movement_type=StockMovement.OUT, then=F("qty_units")),
+        default=-F("qty_units"),
+        output_field=DecimalField(max_digits=14, decimal_places=4),
+    )
+
+
+def sales_velocity(plan_date: date) -> dict:
+    """
+    품목별 7/30/90일 일평균 순출고. plan_date 마감까지, 집계 1쿼리 (조건부 SUM 3개).
+    반환: {product_id: {7: v7, 30: v30, 90: v90}}
+    """
+    end = timezone.make_aware(datetime.combine(plan_date + timedelta(days=1), time.min))
+    longest = max(days for days, _ in VELOCITY_WINDOWS)
+    demand = _demand_expression()
+
+    sums = {
+        f"d{days}": Sum(Case(
+            When(created_at__gte=end - timedelta(days=days), then=demand),
+            output_field=DecimalField(max_digits=14, decimal_places=4),
+        ))
+        for days, _ in VELOCITY_WINDOWS
+    }
+    rows = (
+        StockMovement.objects
+        .filter(created_at__gte=end - timedelta(days=longest), created_at__lt=end)
+        .filter(Q(movement_type=StockMovement.OUT) | Q(movement_type=StockMovement.IN, ref_table="sales_salesinvoice"))
+        .values("product_id")
+        .annotate(**sums)
+        .iterator(chunk_size=5000)
+    )
+    return {
+        r["product_id"]: {
+            days: max(Decimal(r[f"d{days}"] or 0), Decimal("0")) / days
+            for days, _ in VELOCITY_WINDOWS
+        }
+        for r in rows
+    }
+
+
+def _suggestion(product_id, mode, on_hand, velocities, plan_date) -> ReplenishmentSuggestion:
+    lead = settings.INVENTORY_LEAD_TIME_DAYS.get(mode, max(settings.INVENTORY_LEAD_TIME_DAYS.values()))
+    safety = settings.INVENTORY_SAFETY_STOCK_DAYS
+    review = settings.INVENTORY_REVIEW_PERIOD_DAYS
+
+    daily = sum((velocities[days] * weight for days, weight in VELOCITY_WINDOWS), Decimal("0"))
+    reorder_point = daily * (lead + safety)
+    target = daily * (lead + safety + review)
+    suggested = ceil_to_nearest(target - on_hand, ORDER_UNIT) if on_hand <= reorder_point else Decimal("0")
+
+    return ReplenishmentSuggestion(
+        product_id=product_id,
+        plan_date=plan_date,
+        transport_mode=mode,
+        lead_time_days=lead,
+        on_hand_qty_units=on_hand,
+        velocity_7d=velocities[7].quantize(QTY_QUANT),
+        velocity_30d=velocities[30].quantize(QTY_QUANT),
+        velocity_90d=velocities[90].quantize(QTY_QUANT),
+        daily_velocity=daily.quantize(QTY_QUANT),
+        days_of_cover=(on_hand / daily).quantize(Decimal("0.1")) if daily else None,
+        reorder_point=reorder_point.quantize(QTY_QUANT),
+        target_qty=target.quantize(QTY_QUANT),
+        suggested_qty=max(suggested, Decimal("0")),
+    )
+
+
+@transaction.atomic
+def plan_replenishment(plan_date: date) -> int:
+    """
+    plan_date 기준 발주 제안을 다시 만든다 (같은 날짜 기존 제안은 교체).
+    쿼리 수는 품목 수와 무관: 판매속도 집계 1 + 활성 품목/재고 1 (+ 5000개 단위 chunk) + 삭제 1 + bulk_create.
+    최근 90일 판매가 없는 품목은 제안하지 않는다.
+    반환: 저장한 행 수
+    """
+    velocity = sales_velocity(plan_date)
+
+    products = (
+        Product.objects
+        .filter(is_active=True)
+        .values_list("id", "default_transport_mode", "balance__on_hand_qty_units")
+        .iterator(chunk_size=5000)
+    )
+
+    rows = [
+        _suggestion(pid, mode, Decimal(on_hand or 0), velocity[pid], plan_date)
+        for pid, mode, on_hand in products
+        if pid in velocity and any(velocity[pid].values())
+    ]
+
+    ReplenishmentSuggestion.objects.filter(plan_date=plan_date).delete()
+    ReplenishmentSuggestion.objects.bulk_create(rows, batch_size=2000)
+    return len(rows)
@@ -0,0 +1,154 @@
+# inventory/services/search.py
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from core.exports import chunked
+
+
+FTS_TABLE = "inventory_product_fts"
+RANK_MAX_MATCHES = 200  # 자동완성 정렬 후보 수
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_HANGUL_RE = re.compile(r"[가-힣]")
+
+
+def fts_enabled() -> bool:
+    """FTS5 인덱스는 SQLite 전용. 다른 DB에서는 icontains 로 되돌아간다."""
+    return connection.vendor == "sqlite"
+
+
+def _extra_terms(sku_code: str, name_ko: str) -> str:
+    """
+    prefix 검색만으로는 안 잡히는 경우를 위한 보조 토큰.
+    - 한글 이름: 단어마다 모든 접미사 ("훈제연어" → "제연어 연어 어") → "연어*" 가 붙여쓴 합성어 안에서도 맞는다
+    - SKU: 구분자를 뺀 형태 ("SALMON-001" → "SALMON001")
+    """
+    terms = []
+    for word in _TOKEN_RE.findall(name_ko or ""):
+        if _HANGUL_RE.search(word):
+            terms.extend(word[i:] for i in range(1, len(word)))
+    compact = "".join(_TOKEN_RE.findall(sku_code or ""))
+    if compact and compact != sku_code:
+        terms.append(compact)
+    return " ".join(terms)
+
+
+def _row(pk, sku_code, name_en, name_ko):
+    return (pk, sku_code or "", name_en or "", name_ko or "", _extra_terms(sku_code, name_ko))
+
+
+def index_products(rows) -> None:
+    """rows: (id, sku_code, name_en, name_ko) 목록. 같은 id가 있으면 교체한다."""
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        for chunk in chunked(rows, 2000):
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(r[0],) for r in chunk])
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, sku_code, name_en, name_ko, terms) VALUES (%s, %s, %s, %s, %s)",
+                [_row(*r) for r in chunk],
+            )
+
+
+def remove_products(product_ids) -> None:
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in product_ids])
+
+
+def rebuild_index(rows) -> int:
+    """인덱스를 비우고 rows(id, sku_code, name_en, name_ko) 로 다시 채운다."""
+    if not fts_enabled():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        count = 0
+        for chunk in chunked(rows, 2000):
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, sku_code, name_en, name_ko, terms) VALUES (%s, %s, %s, %s, %s)",
+                [_row(*r) for r in chunk],
+            )
+            count += len(chunk)
+    return count
+
+
+def match_expression(q: str) -> str:
+    """
+    검색어 → FTS5 MATCH 식. 토큰마다 prefix 검색("tok"*), 모두 AND.
+    따옴표로 감싸므로 사용자가 넣은 FTS 연산자(AND/OR/NEAR, *, :)는 그냥 글자로 취급된다.
+    """
+    return " ".join(f'"{tok}"*' for tok in _TOKEN_RE.findall(q.lower()))
+
+
+def product_filter(q: str, prefix: str = "") -> Q:
+    """
+    Product(또는 prefix="product__" 로 Product FK를 가진 모델) 검색 조건.
+    SQLite: FTS5 인덱스 서브쿼리 (id IN (SELECT rowid ... MATCH ...)), 그 외: SKU/EN/KO icontains.
+    """
+    if not fts_enabled():
+        return (
+            Q(**{f"{prefix}sku_code__icontains": q}) |
+            Q(**{f"{prefix}name_en__icontains": q}) |
+            Q(**{f"{prefix}name_ko__icontains": q})
+        )
+    expr = match_expression(q)
+    if not expr:
+        return Q(pk__in=[])
+    return Q(**{f"{prefix}id__in": RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expr])})
+
+
+def _relevance(q: str, sku_code: str, name_en: str, name_ko: str) -> tuple:
+    """자동완성 정렬 키 (작을수록 앞): SKU 일치 > SKU 시작 > 이름 시작 > 그 외, 같으면 짧은 SKU 순."""
+    q = q.lower()
+    sku = sku_code.lower()
+    if sku == q:
+        tier = 0
+    elif sku.startswith(q):
+        tier = 1
+    elif name_en.lower().startswith(q) or name_ko.startswith(q):
+        tier = 2
+    else:
+        tier = 3
+    return tier, len(sku_code), sku_code
+
+
+def ranked_product_ids(q: str, limit: int = 10) -> list[int]:
+    """
+    관련도 순 상위 product id.
+    FTS5 bm25 정렬은 매치 전체를 훑으므로(넓은 검색어면 수십 ms) 쓰지 않고,
+    인덱스에서 앞 RANK_MAX_MATCHES 개 후보만 읽어 메모리에서 _relevance 로 정렬한다.
+    """
+    expr = match_expression(q)
+    if not expr or not fts_enabled():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, sku_code, name_en, name_ko FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT %s",
+            [expr, RANK_MAX_MATCHES],
+        )
+        candidates = cursor.fetchall()
+    candidates.sort(key=lambda r: _relevance(q.strip(), r[1], r[2], r[3]))
+    return [r[0] for r in candidates[:limit]]
+
+
+def autocomplete(q: str, limit: int = 10) -> list[dict]:
+    """자동완성: 관련도 순 [{"sku_code", "name_en", "name_ko", "base_unit"}, ...]"""
+    from inventory.models import Product
+
+    fields = ("id", "sku_code", "name_en", "name_ko", "base_unit")
+    if not fts_enabled():
+        return list(
+            Product.objects.filter(product_filter(q)).order_by("sku_code").values(*fields[1:])[:limit]
+        )
+    ids = ranked_product_ids(q, limit)
+    by_id = {p["id"]: p for p in Product.objects.filter(id__in=ids).values(*fields)}
+    return [
+        {k: v for k, v in by_id[pk].items() if k != "id"}
+        for pk in ids
+        if pk in by_id
+    ]
@@ -0,0 +1,136 @@
+# inventory/services/snapshots.py
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.exports import chunked
+from core.fixedpoint import average_cost
+from inventory.models import InventoryLot, InventorySnapshot, StockMovement
+from inventory.services.archive import archived_movements, history_movements
+
+
+def _day_end(d: date) -> datetime:
+    """d 날짜(현지 시간)가 끝나는 시각 = 다음날 00:00 (aware)."""
+    return timezone.make_aware(datetime.combine(d + timedelta(days=1), time.min))
+
+
+def _movements_between(after: date | None, until: date, product_ids=None):
+    """
+    (after, until] 기간(현지 날짜 기준) movement를 시간순으로.
+    created_at 범위 조건이라 (created_at, id) / (product, created_at, id) 인덱스를 탄다.
+    archive(마감 기간) → 최근(이월 행 제외) 순서로 이어 읽으므로 archive 이후에도 원가 replay가 그대로다.
+    """
+    filters = {"created_at__lt": _day_end(until)}
+    if after is not None:
+        filters["created_at__gte"] = _day_end(after)
+    if product_ids is not None:
+        filters["product_id__in"] = product_ids
+    for qs in (archived_movements(), history_movements()):
+        yield from (
+            qs.filter(**filters)
+            .order_by("created_at", "id")
+            .values_list("product_id", "movement_type", "qty_units", "ref_table", "ref_id")
+            .iterator(chunk_size=5000)
+        )
+
+
+def replay_movements(state: dict, movements) -> dict:
+    """
+    state {product_id: [qty, avg_cost]} 에 movement를 시간순으로 반영한다 (MovementJournal과 같은 규칙).
+    - 로트 입고(IN, inventory_inventorylot): 이동평균원가 갱신 (journal 과 같은 core.fixedpoint.average_cost)
+    - 그 외 IN(취소 복구 등)/OUT/ADJ: 수량만 변경 (재고가 0 이어도 평균원가는 남는다)
+    로트 원가는 chunk 마다 id__in 1쿼리로 읽는다.
+    """
+    for chunk in chunked(movements, 5000):
+        lot_ids = [ref_id for _, mtype, _, ref_table, ref_id in chunk
+                   if mtype == StockMovement.IN and ref_table == "inventory_inventorylot"]
+        lot_costs = dict(
+            InventoryLot.objects.filter(id__in=lot_ids).values_list("id", "landed_cost_php_per_unit")
+        ) if lot_ids else {}
+
+        for product_id, mtype, qty, ref_table, ref_id in chunk:
+            cur = state.setdefault(product_id, [Decimal("0"), Decimal("0")])
+            if mtype == StockMovement.OUT:
+                cur[0] -= qty
+                continue
+
+            cost = lot_costs.get(ref_id) if ref_table == "inventory_inventorylot" and mtype == StockMovement.IN else None
+            if cost is not None:
+                cur[1] = average_cost(cur[0], cur[1], qty, qty * cost)
+            cur[0] += qty
+    return state
+
+
+def _snapshot_state(snapshot_date: date, product_ids=None) -> dict:
+    qs = InventorySnapshot.objects.filter(snapshot_date=snapshot_date)
+    if product_ids is not None:
+        qs = qs.filter(product_id__in=product_ids)
+    return {
+        pid: [qty, avg]
+        for pid, qty, avg in qs.values_list("product_id", "on_hand_qty_units", "avg_cost_php_per_unit").iterator()
+    }
+
+
+def latest_snapshot_date(on_or_before: date | None = None) -> date | None:
+    qs = InventorySnapshot.objects.all()
+    if on_or_before is not None:
+        qs = qs.filter(snapshot_date__lte=on_or_before)
+    return qs.order_by("-snapshot_date").values_list("snapshot_date", flat=True).first()
+
+
+@transaction.atomic
+def build_snapshot(snapshot_date: date) -> int:
+    """
+    snapshot_date 마감 스냅샷을 만든다 (같은 날짜가 이미 있으면 다시 만든다).
+    직전 스냅샷 + (직전 스냅샷일, snapshot_date] movement 증분만 읽는다.
+    직전 스냅샷이 없으면 처음부터 전체 ledger를 한 번 replay 한다.
+    수량 0 인 품목도 평균원가가 있으면 저장한다 (재고가 0 이 된 뒤 취소 복구 IN 이 그 평균원가로 들어오므로).
+    수량과 평균원가가 모두 0 인 품목만 뺀다.
+
+    날짜 순서대로 쌓는 것을 전제로 한다. 과거 날짜를 다시 만들면 그 이후 스냅샷은 다시 만들어야 한다.
+    반환: 저장한 행 수
+    """
+    prev = latest_snapshot_date(on_or_before=snapshot_date - timedelta(days=1))
+    state = _snapshot_state(prev) if prev else {}
+    replay_movements(state, _movements_between(prev, snapshot_date))
+
+    InventorySnapshot.objects.filter(snapshot_date=snapshot_date).delete()
+    rows = [
+        InventorySnapshot(
+            product_id=pid,
+            snapshot_date=snapshot_date,
+            on_hand_qty_units=qty,
+            avg_cost_php_per_unit=avg,
+            inventory_value_php=qty * avg,
+        )
+        for pid, (qty, avg) in state.items()
+        if qty != 0 or avg != 0
+    ]
+    InventorySnapshot.objects.bulk_create(rows, batch_size=2000)
+    return len(rows)
+
+
+def inventory_as_of(as_of: date, product_ids=None) -> dict:
+    """
+    as_of 날짜 마감 기준 품목별 재고/평가액.
+    가장 가까운 이전 스냅샷 + (스냅샷일, as_of] 기간 movement만 replay 하므로
+    전체 ledger를 읽지 않는다.
+
+    반환: {product_id: {"qty": Decimal, "avg_cost": Decimal, "value": Decimal}} (수량 0 제외)
+    """
+    if product_ids is not None:
+        product_ids = list(product_ids)
+
+    base = latest_snapshot_date(on_or_before=as_of)
+    state = _snapshot_state(base, product_ids) if base else {}
+    if base != as_of:
+        replay_movements(state, _movements_between(base, as_of, product_ids))
+
+    return {
+        pid: {"qty": qty, "avg_cost": avg, "value": qty * avg}
+        for pid, (qty, avg) in state.items()
+        if qty != 0
+    }
@@ -0,0 +1,187 @@
+# inventory/services/valuation.py
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db import models
+from django.db.models import Count, ExpressionWrapper, F, Subquery, Sum
+from django.db.models.functions import Abs
+from django.utils import timezone
+
+from core.exports import iter_values
+from fx.models import FXDailyRate
+from fx.services import FXRateNotFound
+from inventory.models import InventoryBalance, InventoryLot
+
+
+VALUATION_CACHE_KEY = "inventory:valuation"
+TOP_SKU_COUNT = 50
+VALUE_QUANT = Decimal("0.0001")  # SQLite는 곱셈 결과를 소수 자릿수 없이 돌려준다
+
+GROUP_FIELDS = ("product__origin_country", "product__default_transport_mode", "product__base_unit")
+
+
+def stocked_balances():
+    """재고가 있는 balance만 (수량 0 은 평가액 0 이라 제외)."""
+    return InventoryBalance.objects.exclude(on_hand_qty_units=0)
+
+
+def _rollup(groups: list[dict], key: str) -> list[dict]:
+    totals = defaultdict(lambda: {"skus": 0, "qty": Decimal("0"), "value": Decimal("0")})
+    for g in groups:
+        t = totals[g[key]]
+        t["skus"] += g["skus"]
+        t["qty"] += g["qty"]
+        t["value"] += g["value"]
+    return sorted(
+        ({"key": k or "-", **v} for k, v in totals.items()),
+        key=lambda r: r["value"], reverse=True,
+    )
+
+
+def compute_valuation() -> dict:
+    """
+    재고 평가액 집계.
+    - (원산지, 기본 운송수단, 단위) 조합별 SKU 수/수량/평가액: GROUP BY 집계 1쿼리
+    - 원산지별/운송수단별/단위별 소계와 총계는 그 결과를 메모리에서 합산
+    - 평가액 상위 TOP_SKU_COUNT 개 SKU: 1쿼리
+    수량(qty)은 같은 단위끼리만 의미가 있으므로 화면에서는 단위별 소계에만 보여준다.
+    """
+    value = InventoryBalance.value_expression()
+    groups = [
+        {
+            "origin_country": row["product__origin_country"] or "",
+            "transport_mode": row["product__default_transport_mode"] or "",
+            "base_unit": row["product__base_unit"] or "",
+            "skus": row["skus"],
+            "qty": Decimal(row["qty"] or 0).quantize(VALUE_QUANT),
+            "value": Decimal(row["value"] or 0).quantize(VALUE_QUANT),
+        }
+        for row in (
+            stocked_balances()
+            .values(*GROUP_FIELDS)
+            .annotate(skus=Count("id"), qty=Sum("on_hand_qty_units"), value=Sum(value))
+            .order_by(*GROUP_FIELDS)
+        )
+    ]
+
+    top_skus = list(
+        stocked_balances()
+        .annotate(value=value)
+        .order_by("-value", "product__sku_code")
+        .values("product__sku_code", "product__name_en", "product__base_unit",
+                "on_hand_qty_units", "avg_cost_php_per_unit", "value")[:TOP_SKU_COUNT]
+    )
+    for r in top_skus:
+        r["value"] = Decimal(r["value"] or 0).quantize(VALUE_QUANT)
+
+    return {
+        "computed_at": timezone.now(),
+        "total_skus": sum(g["skus"] for g in groups),
+        "total_value": sum((g["value"] for g in groups), Decimal("0")),
+        "groups": groups,
+        "by_origin_country": _rollup(groups, "origin_country"),
+        "by_transport_mode": _rollup(groups, "transport_mode"),
+        "by_base_unit": _rollup(groups, "base_unit"),
+        "top_skus": top_skus,
+    }
+
+
+def iter_sku_values(balances, *fields):
+    """balances에 평가액(value)을 붙여 (*fields, value) 튜플로 스트리밍."""
+    rows = iter_values(balances.annotate(value=InventoryBalance.value_expression()), *fields, "value")
+    for *head, value in rows:
+        yield (*head, Decimal(value or 0).quantize(VALUE_QUANT))
+
+
+def _cache():
+    return caches[settings.INVENTORY_VALUATION_CACHE]
+
+
+def get_valuation() -> dict:
+    """
+    캐시된 평가액 집계 (settings.INVENTORY_VALUATION_CACHE, 만료는 그 캐시의 TIMEOUT).
+    이 프로세스의 balance 쓰기는 invalidate_valuation()으로 바로 지워지고,
+    다른 프로세스의 쓰기는 TIMEOUT 이 지나야 보인다.
+    """
+    cache = _cache()
+    result = cache.get(VALUATION_CACHE_KEY)
+    if result is None:
+        result = compute_valuation()
+        cache.set(VALUATION_CACHE_KEY, result)
+    return result
+
+
+def invalidate_valuation() -> None:
+    """
+    balance 쓰기 직후 호출. 트랜잭션 안이면 커밋된 뒤에 지운다
+    (롤백되면 캐시는 그대로, 커밋 전에 다른 요청이 옛 값으로 다시 채우는 것도 방지).
+    """
+    transaction.on_commit(lambda: _cache().delete(VALUATION_CACHE_KEY))
+
+
+_MONEY = models.DecimalField(max_digits=18, decimal_places=4)
+REVALUATION_FIELDS = ("qty", "krw_value", "book_value", "revalued_value", "difference")
+
+
+def _fx_revaluation_sums(as_of) -> dict:
+    """
+    남은 로트 평가: 장부(로트 landed cost = 입고 당시 fx_rate_snapshot) vs as_of 날짜 환율로 다시 환산.
+    KRW 부분(공급가×(1+마크업) + 운송비/단위)만 환율을 바꾸고 other_cost_php 는 그대로 둔다.
+    as_of 환율은 FXDailyRate 에서 Subquery 로 읽어 집계 쿼리 안에서 곱한다 (행마다 Python 조회 없음).
+    """
+    rate = Subquery(FXDailyRate.objects.filter(date=as_of).values("krw_to_php")[:1], output_field=_MONEY)
+    remaining = F("qty_units_remaining")
+    krw_per_unit = ExpressionWrapper(
+        F("supplier_cost_krw_per_unit") * (1 + F("supplier_markup_rate_snapshot"))
+        + F("transport_krw_per_kg_snapshot") * F("billable_weight_kg_total") / F("qty_units_received"),
+        output_field=_MONEY,
+    )
+    other_per_unit = ExpressionWrapper(F("other_cost_php_total") / F("qty_units_received"), output_field=_MONEY)
+    book = ExpressionWrapper(remaining * F("landed_cost_php_per_unit"), output_field=_MONEY)
+    revalued = ExpressionWrapper(remaining * (krw_per_unit * rate + other_per_unit), output_field=_MONEY)
+    return {
+        "qty": Sum(remaining),
+        "krw_value": Sum(ExpressionWrapper(remaining * krw_per_unit, output_field=_MONEY)),
+        "book_value": Sum(book),
+        "revalued_value": Sum(revalued),
+        "difference": Sum(revalued) - Sum(book),
+    }
+
+
+def _open_lots():
+    return InventoryLot.objects.filter(qty_units_remaining__gt=0)
+
+
+def _quantize_revaluation(row: dict, as_of) -> dict:
+    if row["qty"] is not None and row["revalued_value"] is None:
+        raise FXRateNotFound(f"No FXDailyRate for {as_of} (run rebuild_fx_calendar)")
+    for k in REVALUATION_FIELDS:
+        row[k] = Decimal(row[k] or 0).quantize(VALUE_QUANT)
+    return row
+
+
+def fx_revaluation_totals(as_of) -> dict:
+    """전체 합계 1쿼리. as_of 환율이 달력에 없으면 FXRateNotFound."""
+    return _quantize_revaluation(_open_lots().aggregate(**_fx_revaluation_sums(as_of)), as_of)
+
+
+def fx_revaluation_by_sku(as_of, *, top: int | None = None):
+    """
+    SKU별 (sku, name, qty, krw_value, book_value, revalued_value, difference) dict 를 스트리밍 (GROUP BY 1쿼리).
+    top 을 주면 평가차이 절댓값이 큰 순으로 top 개.
+    """
+    qs = (
+        _open_lots()
+        .values("product__sku_code", "product__name_en")
+        .annotate(**_fx_revaluation_sums(as_of))
+    )
+    if top is not None:
+        qs = qs.order_by(Abs("difference").desc(), "product__sku_code")[:top]
+    else:
+        qs = qs.order_by("product__sku_code")
+    for row in qs.iterator(chunk_size=2000):
+        yield _quantize_revaluation(row, as_of)
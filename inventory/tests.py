@@ -1,3 +1,939 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import random
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, localcontext
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Max, Sum
+from django.http import StreamingHttpResponse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.fixedpoint import average_cost
+from fx.models import FXRatePeriod
+from fx.services import reset_index
+from inventory.models import (
+    InventoryBalance,
+    InventoryLot,
+    InventorySnapshot,
+    Product,
+    ReplenishmentSuggestion,
+    StockMovement,
+    StockMovementArchive,
+)
+from inventory.services.aging import compute_aging
+from inventory.services.archive import archive_movements, history_movements
+from inventory.services.balance_cache import cache_stats, get_balances, reset_cache_stats
+from inventory.services.costing import (
+    apply_receiving_to_balance,
+    compute_landed_cost,
+    create_inventory_lot,
+    create_inventory_lots_bulk,
+)
+from inventory.services.journal import InsufficientStock, MovementJournal
+from inventory.services.product_import import import_products
+from inventory.services.reconcile import find_drift, ledger_on_hand, repair_drift
+from inventory.services.refs import attach_partner_display, resolve_refs
+from inventory.services.replenishment import plan_replenishment, sales_velocity
+from inventory.services.search import autocomplete, fts_enabled, product_filter
+from inventory.services.snapshots import build_snapshot, inventory_as_of
+from inventory.services.valuation import get_valuation
+from partners.models import Partner
+from sales.models import SalesInvoice, SalesInvoiceLine
+from sales.services.invoicing import issue_invoice
+
+
+class ConcurrentIssueTests(TransactionTestCase):
+    """
+    여러 스레드가 같은 SKU들을 서로 다른 순서로 담은 인보이스를 동시에 ISSUE 해도
+    재고가 초과 출고되지 않고, 교착/잠금 오류 없이 재고 부족(InsufficientStock)으로만 실패하는지 확인한다.
+    스레드마다 별도 DB 연결이 필요하므로, in-memory SQLite 테스트 DB 면 이 테스트 동안만 임시 파일 DB 로 바꾼다.
+    """
+
+    STOCK = Decimal("20")
+    QTY_PER_LINE = Decimal("3")
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self._use_file_database()
+
+        customer = Partner.objects.create(partner_type="CUSTOMER", name="Concurrent customer")
+        self.products = [
+            Product.objects.create(
+                sku_code=f"CONC-{i}",
+                name_en=f"Concurrent product {i}",
+                base_unit="pack",
+                net_weight_kg_per_unit=Decimal("1.0000"),
+            )
+            for i in range(3)
+        ]
+        InventoryBalance.objects.bulk_create([
+            InventoryBalance(product=p, on_hand_qty_units=self.STOCK, avg_cost_php_per_unit=Decimal("100"))
+            for p in self.products
+        ])
+
+        self.invoice_ids = []
+        for i in range(12):
+            invoice = SalesInvoice.objects.create(invoice_no=f"CONC-{i:03d}", customer=customer)
+            ordered = self.products if i % 2 == 0 else self.products[::-1]
+            for p in ordered:
+                SalesInvoiceLine.objects.create(
+                    invoice=invoice,
+                    product=p,
+                    qty_units=self.QTY_PER_LINE,
+                    manual_unit_price_php=Decimal("150"),
+                )
+            self.invoice_ids.append(invoice.id)
+
+    def _use_file_database(self):
+        """
+        in-memory 테스트 DB 의 스키마를 임시 파일로 복사하고 연결 설정(NAME)을 그 파일로 바꾼다.
+        스레드 연결도 같은 settings_dict 로 열리므로 모두 파일 DB 를 본다. 끝나면 in-memory 연결로 되돌린다.
+        """
+        fd, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        target.close()
+
+        memory_db, memory_name = connection.connection, connection.settings_dict["NAME"]
+        connection.connection = None
+        connection.settings_dict["NAME"] = path
+
+        def restore():
+            connection.close()
+            connection.settings_dict["NAME"] = memory_name
+            connection.connection = memory_db
+            os.remove(path)
+
+        self.addCleanup(restore)
+
+    def _issue(self, invoice_id):
+        try:
+            issue_invoice(invoice_id)
+            return "ok"
+        except InsufficientStock:
+            return "short"
+        finally:
+            connection.close()
+
+    def test_concurrent_issue_never_oversells(self):
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(self._issue, self.invoice_ids))
+
+        issued = results.count("ok")
+        # 20 // 3 = 6 인보이스만 가능
+        self.assertEqual(issued, int(self.STOCK // self.QTY_PER_LINE))
+        self.assertEqual(results.count("short"), len(self.invoice_ids) - issued)
+
+        for p in self.products:
+            balance = InventoryBalance.objects.get(product=p)
+            shipped = StockMovement.objects.filter(
+                product=p, movement_type=StockMovement.OUT,
+            ).aggregate(qty=Sum("qty_units"))["qty"]
+            self.assertEqual(Decimal(shipped), self.QTY_PER_LINE * issued)
+            self.assertEqual(balance.on_hand_qty_units, self.STOCK - Decimal(shipped))
+            self.assertGreaterEqual(balance.on_hand_qty_units, 0)
+
+        self.assertEqual(
+            SalesInvoice.objects.filter(id__in=self.invoice_ids, status=SalesInvoice.ISSUED).count(),
+            issued,
+        )
+
+
+class ProductSearchTests(TestCase):
+    """FTS5 상품 검색: Product 저장/삭제와 동기화, 한글 합성어 안의 prefix, SKU 우선 정렬."""
+
+    def setUp(self):
+        if not fts_enabled():
+            self.skipTest("Product search index is SQLite only")
+        self.salmon = Product.objects.create(
+            sku_code="SALMON-001", name_en="Salmon", name_ko="연어", base_unit="pack",
+            net_weight_kg_per_unit=Decimal("1.0000"),
+        )
+        self.smoked = Product.objects.create(
+            sku_code="SMK-SALMON-02", name_en="Smoked salmon", name_ko="훈제연어", base_unit="pack",
+            net_weight_kg_per_unit=Decimal("1.0000"),
+        )
+
+    def _skus(self, q):
+        return [r["sku_code"] for r in autocomplete(q)]
+
+    def test_hangul_prefix_matches_inside_compound_words(self):
+        self.assertEqual(self._skus("연어"), ["SALMON-001", "SMK-SALMON-02"])
+        self.assertEqual(self._skus("훈제"), ["SMK-SALMON-02"])
+        self.assertEqual(
+            set(Product.objects.filter(product_filter("연")).values_list("sku_code", flat=True)),
+            {"SALMON-001", "SMK-SALMON-02"},
+        )
+
+    def test_sku_prefix_ranks_first_and_operators_are_literal(self):
+        self.assertEqual(self._skus("smk-sal")[0], "SMK-SALMON-02")
+        self.assertEqual(self._skus('salmon OR "x" *'), [])
+
+    def test_index_follows_save_and_delete(self):
+        self.salmon.name_ko = "대서양연어"
+        self.salmon.save()
+        self.assertEqual(self._skus("대서양"), ["SALMON-001"])
+
+        self.smoked.delete()
+        self.assertEqual(self._skus("훈제"), [])
+
+    def test_admin_search_covers_origin_fields(self):
+        Product.objects.filter(pk=self.smoked.pk).update(origin_country="NO", origin_name="Norway")
+        model_admin = admin.site._registry[Product]
+        for term, expected in (("norw", {"SMK-SALMON-02"}), ("연어", {"SALMON-001", "SMK-SALMON-02"})):
+            qs, _ = model_admin.get_search_results(None, Product.objects.all(), term)
+            self.assertEqual(set(qs.values_list("sku_code", flat=True)), expected, term)
+
+
+class LotAgingTests(TestCase):
+    """로트 나이 구간 경계(30/31, 90/91일)와 남은 수량 × 로트 원가 합계."""
+
+    def test_bucket_boundaries_and_supplier_rollup(self):
+        today = date(2026, 6, 30)
+        supplier = Partner.objects.create(partner_type="SUPPLIER", name="Aging supplier")
+        product = Product.objects.create(
+            sku_code="AGE-001", name_en="Aging product", base_unit="pack",
+            net_weight_kg_per_unit=Decimal("1.0000"),
+        )
+        for age, remaining in ((30, "1"), (31, "2"), (90, "3"), (91, "4"), (200, "0")):
+            InventoryLot.objects.create(
+                product=product, supplier=supplier,
+                received_date=today - timedelta(days=age),
+                qty_units_received=Decimal("10"), qty_units_remaining=Decimal(remaining),
+                fx_rate_snapshot=Decimal("0.042"), supplier_cost_krw_per_unit=Decimal("1000"),
+                transport_mode="AIR", transport_krw_per_kg_snapshot=Decimal("0"),
+                billable_weight_kg_total=Decimal("10"), transport_cost_php_total_snapshot=Decimal("0"),
+                landed_cost_php_total=Decimal("1000"), landed_cost_php_per_unit=Decimal("100"),
+            )
+
+        [row] = compute_aging("sku", today)
+        self.assertEqual(
+            [row[f"qty_{k}"] for k in ("0_30", "31_60", "61_90", "90_plus")],
+            [Decimal("1"), Decimal("2"), Decimal("3"), Decimal("4")],
+        )
+        self.assertEqual(row["value_90_plus"], Decimal("400"))
+        self.assertEqual(row["value_total"], Decimal("1000"))
+
+        [by_supplier] = compute_aging("supplier", today)
+        self.assertEqual(by_supplier["supplier__name"], "Aging supplier")
+        self.assertEqual(by_supplier["value_total"], Decimal("1000"))
+
+
+class ProductImportTests(TestCase):
+    """상품 마스터 CSV upsert: inserted/updated/unchanged 집계, 파일에 없는 컬럼은 유지, 잘못된 행은 건너뜀."""
+
+    HEADER = "sku_code,name_en,base_unit,net_weight_kg_per_unit,origin_country,default_transport_mode\n"
+
+    def _import(self, body, **kwargs):
+        return import_products((self.HEADER + body).splitlines(keepends=True), chunk_size=2, **kwargs)
+
+    def test_upsert_counts_and_validation(self):
+        Product.objects.create(
+            sku_code="IMP-1", name_en="Old", base_unit="pack",
+            net_weight_kg_per_unit=Decimal("1.0000"), memo="keep me",
+        )
+        Product.objects.create(
+            sku_code="IMP-2", name_en="Same", base_unit="pack",
+            net_weight_kg_per_unit=Decimal("1.0000"), origin_country="KR",
+        )
+
+        result = self._import(
+            "IMP-1,New,pack,1,no,AIR\n"
+            "IMP-2,Same,pack,1.0000,KR,OCEAN\n"
+            "IMP-3,Third,kg,0.5,,\n"
+            "IMP-4,Bad country,pack,1,KOR,\n"
+            "IMP-5,Bad mode,pack,1,KR,SHIP\n"
+            "IMP-3,Duplicate,kg,0.5,,\n"
+        )
+        self.assertEqual((result.inserted, result.updated, result.unchanged, result.error_count), (1, 1, 1, 3))
+        self.assertEqual([e.split(":")[0] for e in result.errors], ["line 5", "line 6", "line 7"])
+
+        updated = Product.objects.get(sku_code="IMP-1")
+        self.assertEqual((updated.name_en, updated.origin_country, updated.default_transport_mode), ("New", "NO", "AIR"))
+        self.assertEqual(updated.memo, "keep me")
+        self.assertEqual(Product.objects.get(sku_code="IMP-3").origin_country, None)
+        self.assertFalse(Product.objects.filter(sku_code__in=["IMP-4", "IMP-5"]).exists())
+
+    def test_dry_run_writes_nothing(self):
+        result = self._import("IMP-9,Dry,pack,1,KR,\n", dry_run=True)
+        self.assertEqual(result.inserted, 1)
+        self.assertFalse(Product.objects.filter(sku_code="IMP-9").exists())
+
+
+class BalanceCacheTests(TestCase):
+    """get_balances: 없는 품목만 DB에서 읽고, journal 커밋 후에만 해당 품목 캐시가 지워지는지."""
+
+    def setUp(self):
+        caches[settings.INVENTORY_BALANCE_CACHE].clear()
+        reset_cache_stats()
+        self.products = [
+            Product.objects.create(
+                sku_code=f"CACHE-{i}", name_en=f"Cached {i}", base_unit="pack",
+                net_weight_kg_per_unit=Decimal("1.0000"),
+            )
+            for i in range(2)
+        ]
+        self.ids = [p.id for p in self.products]
+
+    def test_bulk_read_counts_hits_and_misses(self):
+        with self.assertNumQueries(1):
+            first = get_balances(self.ids)
+        self.assertEqual(first[self.ids[0]].on_hand_qty_units, Decimal("0"))
+
+        with self.assertNumQueries(0):
+            get_balances(self.ids)
+        stats = cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 2))
+
+    def test_journal_commit_invalidates_written_products(self):
+        get_balances(self.ids)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with MovementJournal() as journal:
+                journal.add_in(product_id=self.ids[0], qty_units=Decimal("5"), unit_cost_php=Decimal("10"))
+            # 커밋 전에는 옛 값 그대로
+            self.assertEqual(get_balances(self.ids)[self.ids[0]].on_hand_qty_units, Decimal("0"))
+        self.assertTrue(callbacks)
+
+        with self.assertNumQueries(1):
+            balances = get_balances(self.ids)
+        self.assertEqual(balances[self.ids[0]].on_hand_qty_units, Decimal("5"))
+        self.assertEqual(balances[self.ids[0]].avg_cost_php_per_unit, Decimal("10"))
+
+
+class FixedPointCostingTests(TestCase):
+    """landed cost / 이동평균원가: 정수 계산 결과 == 60자리 Decimal 식을 컬럼 자릿수로 quantize 한 값 (seed 고정 무작위)."""
+
+    def test_matches_decimal_formula(self):
+        rng = random.Random(20261018)
+
+        def fixed(lo, hi, places):
+            return Decimal(rng.randint(lo, hi)).scaleb(-places)
+
+        for _ in range(2000):
+            qty = fixed(1, 10 ** rng.randint(1, 9), 4)
+            fx, cost, markup = fixed(1, 2_000_000, 6), fixed(0, 10 ** 9, 2), fixed(0, 9_999, 4)
+            krw_per_kg, weight, other = fixed(0, 10 ** 7, 2), fixed(0, 10 ** 9, 4), fixed(0, 10 ** 8, 2)
+            costs = compute_landed_cost(
+                qty_units_received=qty, fx_rate_snapshot=fx, supplier_cost_krw_per_unit=cost,
+                supplier_markup_rate_snapshot=markup, transport_krw_per_kg_snapshot=krw_per_kg,
+                billable_weight_kg_total=weight, other_cost_php_total=other,
+            )
+            with localcontext() as ctx:
+                ctx.prec = 60
+                transport = weight * krw_per_kg * fx
+                total = cost * (1 + markup) * fx * qty + transport + other
+                per_unit = total / qty
+                old_qty, old_avg = fixed(0, 10 ** 8, 4), fixed(0, 10 ** 8, 4)
+                avg = (old_qty * old_avg + qty * per_unit) / (old_qty + qty)
+
+            self.assertEqual(costs["transport_cost_php_total_snapshot"], transport.quantize(Decimal("0.01")))
+            self.assertEqual(costs["landed_cost_php_total"], total.quantize(Decimal("0.01")))
+            self.assertEqual(costs["landed_cost_php_per_unit"], per_unit.quantize(Decimal("0.0001")))
+            self.assertEqual(average_cost(old_qty, old_avg, qty, qty * per_unit), avg.quantize(Decimal("0.0001")))
+
+
+class BulkReceivingTests(TestCase):
+    """create_inventory_lots_bulk == 단건 create_inventory_lot 반복 (로트 원가, IN movement, 재고/평균원가), 쿼리 수는 로트 수와 무관."""
+
+    def setUp(self):
+        reset_index()
+        FXRatePeriod.objects.create(start_date=date(2026, 1, 1), krw_to_php=Decimal("0.042000"))
+        self.supplier = Partner.objects.create(partner_type="SUPPLIER", name="Bulk supplier")
+        self.bulk_pair, self.single_pair = (
+            [
+                Product.objects.create(
+                    sku_code=f"{prefix}-{i}", name_en=f"{prefix} {i}", base_unit="pack",
+                    net_weight_kg_per_unit=Decimal("1.0000"),
+                )
+                for i in (1, 2)
+            ]
+            for prefix in ("BULK", "ONE")
+        )
+
+    def tearDown(self):
+        reset_index()
+
+    def _rows(self, products):
+        a, b = products
+        rows = []
+        for product, qty, cost, fx, weight, other, expiry in [
+            (a, "10", "1000.00", "0.050000", "12.5000", "0", None),
+            (b, "3.5", "2500.50", None, "4.0000", "15.25", date(2026, 9, 1)),  # 입고일 FX 기간 환율
+            (a, "7", "1333.33", "0.047123", "9.0000", "8.10", date(2026, 8, 1)),
+            (a, "0.0003", "99999.99", "0.050000", "0.0010", "0", None),
+        ]:
+            rows.append({
+                "product": product, "supplier_id": self.supplier.id, "received_date": date(2026, 3, 2),
+                "qty_units_received": Decimal(qty), "fx_rate_snapshot": fx and Decimal(fx),
+                "supplier_cost_krw_per_unit": Decimal(cost), "supplier_markup_rate_snapshot": Decimal("0.05"),
+                "transport_mode": "OCEAN", "transport_krw_per_kg_snapshot": Decimal("1450.00"),
+                "billable_weight_kg_total": Decimal(weight), "other_cost_php_total": Decimal(other),
+                "expiry_date": expiry, "memo": "container 7",
+            })
+        return rows
+
+    @staticmethod
+    def _state(products):
+        lot_fields = [
+            "qty_units_received", "qty_units_remaining", "fx_rate_snapshot", "expiry_date",
+            "transport_cost_php_total_snapshot", "landed_cost_php_total", "landed_cost_php_per_unit", "memo",
+        ]
+        state = []
+        for product in products:
+            lots = list(InventoryLot.objects.filter(product=product).order_by("id").values_list(*lot_fields))
+            lot_ids = list(InventoryLot.objects.filter(product=product).order_by("id").values_list("id", flat=True))
+            movements = list(StockMovement.objects.filter(product=product).order_by("id").values_list(
+                "movement_type", "qty_units", "ref_table", "ref_id", "memo",
+            ))
+            balance = InventoryBalance.objects.get(product=product)
+            state.append({
+                "lots": lots,
+                "movements": [(t, q, table, lot_ids.index(ref_id), memo) for t, q, table, ref_id, memo in movements],
+                "balance": (balance.on_hand_qty_units, balance.avg_cost_php_per_unit),
+            })
+        return state
+
+    def test_matches_single_lot_path(self):
+        lots = create_inventory_lots_bulk(self._rows(self.bulk_pair))
+        self.assertTrue(all(lot.pk for lot in lots))
+        for row in self._rows(self.single_pair):
+            create_inventory_lot(**row)
+
+        bulk, single = self._state(self.bulk_pair), self._state(self.single_pair)
+        self.assertEqual(bulk, single)
+        self.assertEqual(len(bulk[0]["movements"]), 3)
+        self.assertEqual(bulk[0]["movements"][0][:3], ("IN", Decimal("10"), "inventory_inventorylot"))
+        self.assertEqual(bulk[1]["lots"][0][2], Decimal("0.042000"))
+        self.assertEqual(bulk[0]["balance"][0], Decimal("17.0003"))
+
+    def test_query_count_does_not_grow_with_lots(self):
+        create_inventory_lots_bulk(self._rows(self.bulk_pair)[:2])  # balance 행 생성
+
+        def rows(n):
+            base = self._rows(self.bulk_pair)[:2]
+            return [base[i % 2] for i in range(n)]
+
+        # savepoint 4 (서비스 + journal) + 로트 INSERT + 공급사 + balance 잠금 + 품목별 UPDATE 2 + movement INSERT
+        for n in (2, 10, 40):
+            with self.assertNumQueries(10):
+                create_inventory_lots_bulk(rows(n))
+        self.assertEqual(InventoryBalance.objects.get(product=self.bulk_pair[1]).on_hand_qty_units, Decimal("3.5") * 27)
+
+
+class ReceiveManifestTests(TestCase):
+    """receive_manifest: 파싱 오류는 줄 번호와 함께 모아서 CommandError, 오류가 있으면 아무것도 쓰지 않는다."""
+
+    HEADER = "sku_code,qty_units_received,supplier_cost_krw_per_unit,billable_weight_kg_total,transport_krw_per_kg_snapshot"
+
+    def setUp(self):
+        self.supplier = Partner.objects.create(partner_type="SUPPLIER", name="Manifest supplier")
+        Product.objects.create(
+            sku_code="MAN-1", name_en="Manifest product", base_unit="pack", net_weight_kg_per_unit=Decimal("1.0000"),
+        )
+
+    def _run(self, *lines, header=HEADER, **opts):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8") as f:
+            f.write("\n".join([header, *lines]) + "\n")
+        self.addCleanup(os.remove, f.name)
+        out = io.StringIO()
+        call_command(
+            "receive_manifest", f.name, supplier_id=self.supplier.id, received_date="2026-03-02",
+            fx_rate="0.050000", stdout=out, **opts,
+        )
+        return out.getvalue()
+
+    def assertManifestError(self, message, *lines, **kwargs):
+        with self.assertRaisesMessage(CommandError, message):
+            self._run(*lines, **kwargs)
+        self.assertFalse(InventoryLot.objects.exists())
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_row_errors_are_collected_with_line_numbers(self):
+        self.assertManifestError(
+            "Manifest has errors:\n"
+            "line 3: qty_units_received must be > 0\n"
+            "line 4: invalid transport_mode: TRUCK\n"
+            "line 5: invalid expiry_date: 2026-13-01 (YYYY-MM-DD)\n"
+            "line 6: invalid qty_units_received: five\n"
+            "line 7: received_date is required (YYYY-MM-DD, column or --received-date)",
+            "MAN-1,5,1000,5,1450",
+            "MAN-1,0,1000,5,1450",
+            "MAN-1,5,1000,5,1450,truck",
+            "MAN-1,5,1000,5,1450,,2026-13-01",
+            "MAN-1,five,1000,5,1450",
+            "MAN-1,5,1000,5,1450,,,2026-02-30",
+            header=self.HEADER + ",transport_mode,expiry_date,received_date",
+        )
+
+    def test_file_level_errors(self):
+        self.assertManifestError("Manifest is empty.")
+        self.assertManifestError(
+            "Missing columns: billable_weight_kg_total, transport_krw_per_kg_snapshot",
+            "MAN-1,5,1000", header="sku_code,qty_units_received,supplier_cost_krw_per_unit",
+        )
+        self.assertManifestError("Unknown SKU(s): NOPE", "MAN-1,5,1000,5,1450", "NOPE,5,1000,5,1450")
+        self.assertManifestError(
+            "Unknown supplier id(s): [999999]", "MAN-1,5,1000,5,1450,999999",
+            header=self.HEADER + ",supplier_id",
+        )
+
+    def test_dry_run_then_receive(self):
+        lines = ("MAN-1,5,1000,5,1450", "MAN-1,2,1200,2,1450")
+        self.assertIn("OK (dry-run): 2 lot(s) validated.", self._run(*lines, dry_run=True))
+        self.assertFalse(InventoryLot.objects.exists())
+
+        self.assertIn("Received 2 lot(s) for 1 product(s).", self._run(*lines))
+        self.assertEqual(StockMovement.objects.filter(movement_type="IN").count(), 2)
+        self.assertEqual(InventoryBalance.objects.get().on_hand_qty_units, Decimal("7"))
+
+
+class LedgerFixture:
+    """날짜를 지정해서 입고/출고/조정 movement 를 만드는 도우미 (서비스로 쓰고 created_at 만 그 날짜로 옮김)."""
+
+    def setUp(self):
+        self.supplier = Partner.objects.create(partner_type="SUPPLIER", name="Ledger supplier")
+        self.p1, self.p2 = (
+            Product.objects.create(
+                sku_code=f"LED-{i}", name_en=f"Ledger product {i}", base_unit="pack",
+                net_weight_kg_per_unit=Decimal("1.0000"),
+            )
+            for i in (1, 2)
+        )
+
+    @staticmethod
+    def at(d: date) -> datetime:
+        return timezone.make_aware(datetime.combine(d, time(10)))
+
+    def _dated(self, d: date, write):
+        last = StockMovement.objects.aggregate(m=Max("id"))["m"] or 0
+        write()
+        StockMovement.objects.filter(id__gt=last).update(created_at=self.at(d))
+
+    def receive(self, d: date, product, qty, php_per_unit):
+        self._dated(d, lambda: create_inventory_lot(
+            product=product, supplier_id=self.supplier.id, received_date=d,
+            qty_units_received=Decimal(qty), fx_rate_snapshot=Decimal("0.050000"),
+            supplier_cost_krw_per_unit=Decimal(php_per_unit) * 20, supplier_markup_rate_snapshot=Decimal("0"),
+            transport_mode="OCEAN", transport_krw_per_kg_snapshot=Decimal("0"), billable_weight_kg_total=Decimal("0"),
+        ))
+
+    def move(self, d: date, kind: str, product, qty, **kwargs):
+        def write():
+            with MovementJournal() as journal:
+                getattr(journal, f"add_{kind}")(product_id=product.id, qty_units=Decimal(qty), **kwargs)
+        self._dated(d, write)
+
+
+class ArchiveMovementsTests(LedgerFixture, TestCase):
+    """마감 기간 archive: 재고/ledger/재고카드/as-of/export 가 archive 전후로 같고, 다시 돌려도 이월 행이 늘지 않는다."""
+
+    def setUp(self):
+        super().setUp()
+        self.receive(date(2026, 1, 5), self.p1, 10, 100)
+        self.move(date(2026, 1, 20), "out", self.p1, 3)
+        self.receive(date(2026, 2, 10), self.p1, 5, 130)
+        self.receive(date(2026, 2, 15), self.p2, 4, 50)
+        self.move(date(2026, 3, 3), "out", self.p1, 2)
+        self.move(date(2026, 3, 5), "adj", self.p2, -1)
+        self.cutoff = timezone.make_aware(datetime(2026, 3, 1))
+
+    def _observe(self):
+        card = self.client.get(reverse("inventory:product_stock_card", args=[self.p1.sku_code]))
+        export = self.client.get(reverse("inventory:export_movements_csv"))
+        return {
+            "balances": set(InventoryBalance.objects.values_list("product_id", "on_hand_qty_units", "avg_cost_php_per_unit")),
+            "ledger": ledger_on_hand(),
+            "card": [(m.id, m.balance_after) for m in card.context["rows"]],
+            "as_of": [inventory_as_of(d) for d in (date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 10))],
+            "export": b"".join(export.streaming_content).decode("utf-8-sig").splitlines(),
+        }
+
+    def test_archive_keeps_every_view_identical(self):
+        before = self._observe()
+        self.assertEqual(len(before["export"]), 1 + 6)
+        self.assertEqual(before["card"][0][1], Decimal("10"))
+
+        result = archive_movements(self.cutoff)
+        self.assertEqual((result.archived, result.openings), (4, 2))
+        self.assertEqual(StockMovementArchive.objects.count(), 4)
+        openings = dict(
+            StockMovement.objects.filter(ref_table=StockMovement.OPENING_REF_TABLE).values_list("product_id", "qty_units")
+        )
+        self.assertEqual(openings, {self.p1.id: Decimal("12"), self.p2.id: Decimal("4")})
+
+        self.assertEqual(self._observe(), before)
+
+        # history_movements 는 이월 행을 빼고 보여준다 (archive 와 합치면 전체 이력)
+        self.assertFalse(history_movements().filter(ref_table=StockMovement.OPENING_REF_TABLE).exists())
+        self.assertEqual(history_movements().count() + StockMovementArchive.objects.count(), 6)
+
+        # 같은 cutoff 로 다시: 옮길 행 없음, 이월 행은 합쳐서 다시 만들어지므로 중복 없음
+        again = archive_movements(self.cutoff)
+        self.assertEqual((again.archived, again.openings), (0, 2))
+        self.assertEqual(StockMovement.objects.filter(ref_table=StockMovement.OPENING_REF_TABLE).count(), 2)
+        self.assertEqual(self._observe(), before)
+
+        # 더 뒤 cutoff: 기존 이월 행이 새 이월 행에 합쳐짐
+        later = archive_movements(timezone.make_aware(datetime(2026, 4, 1)))
+        self.assertEqual((later.archived, later.openings), (2, 2))
+        self.assertEqual(StockMovementArchive.objects.count(), 6)
+        self.assertEqual(ledger_on_hand(), before["ledger"])
+        self.assertEqual(inventory_as_of(date(2026, 2, 28)), before["as_of"][1])
+
+
+class InventorySnapshotTests(LedgerFixture, TestCase):
+    """스냅샷 + 증분 replay 가 전체 replay 및 InventoryBalance 와 같은지 (재고가 0 이 됐다가 취소 복구되는 경우 포함)."""
+
+    DATES = (date(2026, 1, 10), date(2026, 1, 31), date(2026, 2, 4), date(2026, 2, 28), date(2026, 3, 10))
+
+    def setUp(self):
+        super().setUp()
+        self.receive(date(2026, 1, 5), self.p1, 4, 100)
+        self.receive(date(2026, 1, 6), self.p2, 3, 40)
+        self.move(date(2026, 1, 10), "out", self.p1, 4)  # 재고 0, 평균원가 100 은 남음
+        self.move(date(2026, 2, 3), "in", self.p1, 4, ref_table="sales_salesinvoice")  # 취소 복구: 평균원가로
+        self.receive(date(2026, 2, 5), self.p1, 4, 130)  # (4*100 + 4*130) / 8 = 115
+        self.receive(date(2026, 2, 6), self.p2, 4, 45)  # (3*40 + 4*45) / 7 = 42.857142… → 42.8571
+        self.move(date(2026, 3, 2), "adj", self.p2, -2)
+
+    def test_snapshots_match_full_replay(self):
+        full = {d: inventory_as_of(d) for d in self.DATES}  # 스냅샷 없음 = 처음부터 전체 replay
+        self.assertEqual(full[date(2026, 1, 10)], {self.p2.id: {
+            "qty": Decimal("3"), "avg_cost": Decimal("40"), "value": Decimal("120"),
+        }})
+
+        self.assertEqual(build_snapshot(date(2026, 1, 31)), 2)
+        zero = InventorySnapshot.objects.get(product=self.p1, snapshot_date=date(2026, 1, 31))
+        self.assertEqual((zero.on_hand_qty_units, zero.avg_cost_php_per_unit), (Decimal("0"), Decimal("100")))
+        build_snapshot(date(2026, 2, 28))
+
+        for d in self.DATES:
+            self.assertEqual(inventory_as_of(d), full[d], d)
+        self.assertEqual(inventory_as_of(date(2026, 3, 10), [self.p1.id]), {self.p1.id: full[date(2026, 3, 10)][self.p1.id]})
+
+        latest = full[date(2026, 3, 10)]
+        for b in InventoryBalance.objects.all():
+            self.assertEqual((b.on_hand_qty_units, b.avg_cost_php_per_unit),
+                             (latest[b.product_id]["qty"], latest[b.product_id]["avg_cost"]))
+        self.assertEqual(latest[self.p1.id]["avg_cost"], Decimal("115"))
+        self.assertEqual(latest[self.p2.id]["avg_cost"], Decimal("42.8571"))
+
+
+class MovementRefsTests(LedgerFixture, TestCase):
+    """ref_table 별 거래처 표시: 테이블 섞임, 없는/삭제된 ref, 등록 안 된 테이블, 쿼리 수는 ref_table 당 1회."""
+
+    def setUp(self):
+        super().setUp()
+        self.customers = [Partner.objects.create(partner_type="CUSTOMER", name=f"Refs customer {i}") for i in (1, 2)]
+        self.receive(date(2026, 3, 1), self.p1, "500", "10")
+        self.receive(date(2026, 3, 1), self.p2, "500", "10")
+
+    def _invoice(self, no, customer):
+        invoice = SalesInvoice.objects.create(invoice_no=no, customer=customer)
+        with MovementJournal() as journal:
+            journal.add_out(product_id=self.p1.id, qty_units=Decimal("1"), ref_table="sales_salesinvoice", ref_id=invoice.id)
+        return invoice
+
+    def _displays(self):
+        movements = StockMovement.objects.order_by("id")
+        return [(m.ref_table, m.partner_display) for m in attach_partner_display(movements)]
+
+    def test_mixed_missing_and_unknown_refs(self):
+        self._invoice("REF-1", self.customers[0])
+        self._invoice("REF-2", self.customers[1])
+        deleted = self._invoice("REF-3", self.customers[0])
+        SalesInvoice.objects.filter(id=deleted.id).delete()
+        with MovementJournal() as journal:
+            journal.add_adj(product_id=self.p2.id, qty_units=Decimal("-1"), ref_table="inventory_inventorylot", ref_id=999999)
+            journal.add_adj(product_id=self.p2.id, qty_units=Decimal("-1"), ref_table="stocktake_count", ref_id=1)
+            journal.add_adj(product_id=self.p2.id, qty_units=Decimal("-1"))
+
+        self.assertEqual(self._displays(), [
+            ("inventory_inventorylot", "Ledger supplier"),
+            ("inventory_inventorylot", "Ledger supplier"),
+            ("sales_salesinvoice", "Refs customer 1"),
+            ("sales_salesinvoice", "Refs customer 2"),
+            ("sales_salesinvoice", "(missing invoice)"),
+            ("inventory_inventorylot", "(missing supplier)"),
+            ("stocktake_count", "-"),  # 등록 안 된 ref_table
+            ("", "-"),
+        ])
+        self.assertEqual(resolve_refs([("stocktake_count", 1), ("sales_salesinvoice", None)]), {})
+
+    def test_one_query_per_ref_table(self):
+        def pairs():
+            return list(StockMovement.objects.values_list("ref_table", "ref_id"))
+
+        self._invoice("REF-1", self.customers[0])
+        few_pairs = pairs()
+        with self.assertNumQueries(2):
+            few = resolve_refs(few_pairs)
+        self.assertEqual(len(few), 3)
+
+        for i in range(30):
+            self._invoice(f"REF-{i + 2}", self.customers[i % 2])
+            self.receive(date(2026, 3, 2), self.p2, "1", "10")
+        many_pairs = pairs()
+        with self.assertNumQueries(2):
+            many = resolve_refs(many_pairs)
+        self.assertEqual(len(many), 3 + 30 + 30)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_refs([("stocktake_count", 1)]), {})
+
+    def test_movements_csv_export(self):
+        invoice = self._invoice("REF-1", self.customers[0])
+        lot1, lot2 = (InventoryLot.objects.get(product=p).id for p in (self.p1, self.p2))
+        archive_movements(self.at(date(2026, 3, 2)))  # 3/1 입고는 archive 로 → export 는 최근 → archive 순
+
+        response = self.client.get(reverse("inventory:export_movements_csv"))
+        self.assertIsInstance(response, StreamingHttpResponse)
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode("utf-8-sig"))))
+        self.assertEqual(rows[0], [
+            "Created At", "Type", "SKU", "Product Name(EN)", "Product Name(KO)", "Qty", "Partner", "Ref Table", "Ref ID", "Memo",
+        ])
+        self.assertEqual([(r[1], r[2], Decimal(r[5]), r[6], r[7], r[8]) for r in rows[1:]], [
+            ("OUT", "LED-1", Decimal("1"), "Refs customer 1", "sales_salesinvoice", str(invoice.id)),
+            ("IN", "LED-2", Decimal("500"), "Ledger supplier", "inventory_inventorylot", str(lot2)),
+            ("IN", "LED-1", Decimal("500"), "Ledger supplier", "inventory_inventorylot", str(lot1)),
+        ])
+        self.assertEqual(StockMovementArchive.objects.count(), 2)
+
+        response = self.client.get(reverse("inventory:export_movements_csv"), {"move_type": "IN", "move_to": "2026-03-01"})
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode("utf-8-sig"))))
+        self.assertEqual([(r[1], r[2]) for r in rows[1:]], [("IN", "LED-2"), ("IN", "LED-1")])
+
+
+class ReconcileTests(LedgerFixture, TestCase):
+    """ledger vs balance 드리프트: 찾기 → 고치기 → 다시 확인하면 없음. 찾은 뒤 들어온 입고는 덮어쓰지 않는다."""
+
+    def test_detect_repair_recheck(self):
+        self.receive(date(2026, 1, 5), self.p1, 10, 100)
+        self.receive(date(2026, 1, 6), self.p2, 5, 100)
+        self.assertEqual(find_drift(), [])
+
+        InventoryBalance.objects.filter(product=self.p1).update(on_hand_qty_units=Decimal("7"))
+        InventoryBalance.objects.filter(product=self.p2).delete()
+        drifts = find_drift()
+        self.assertEqual(
+            [(d.sku_code, d.balance_qty, d.ledger_qty, d.diff) for d in drifts],
+            [("LED-1", Decimal("7"), Decimal("10"), Decimal("-3")), ("LED-2", None, Decimal("5"), Decimal("-5"))],
+        )
+
+        # find_drift 이후 커밋된 입고: 수리는 잠근 뒤 다시 구한 ledger(10 + 4)로
+        self.move(date(2026, 1, 7), "in", self.p1, 4, unit_cost_php=Decimal("100"))
+        self.assertEqual(repair_drift(drifts), 2)
+
+        self.assertEqual(find_drift(), [])
+        self.assertEqual(InventoryBalance.objects.get(product=self.p1).on_hand_qty_units, Decimal("14"))
+        self.assertEqual(InventoryBalance.objects.get(product=self.p2).on_hand_qty_units, Decimal("5"))
+        self.assertEqual(repair_drift(drifts), 0)  # 이미 맞는 품목은 건너뜀
+
+    def test_manual_receiving_correction_leaves_movements(self):
+        self.receive(date(2026, 1, 5), self.p1, 10, 100)
+
+        balance = apply_receiving_to_balance(product=self.p1, in_qty=Decimal("10"), in_unit_cost_php=Decimal("130"))
+        self.assertEqual((balance.on_hand_qty_units, balance.avg_cost_php_per_unit), (Decimal("20"), Decimal("115")))
+        balance = apply_receiving_to_balance(product=self.p1, in_qty=Decimal("-5"), in_unit_cost_php=Decimal("999"))
+        self.assertEqual((balance.on_hand_qty_units, balance.avg_cost_php_per_unit), (Decimal("15"), Decimal("115")))
+
+        with self.assertRaises(InsufficientStock):
+            apply_receiving_to_balance(product=self.p1, in_qty=Decimal("-16"), in_unit_cost_php=Decimal("0"))
+        self.assertEqual(
+            list(StockMovement.objects.filter(ref_table="manual").order_by("id").values_list("movement_type", "qty_units")),
+            [("IN", Decimal("10")), ("ADJ", Decimal("-5"))],
+        )
+        self.assertEqual(find_drift(), [])
+
+
+class StockCardTests(LedgerFixture, TestCase):
+    """재고카드 keyset 페이지: 누적잔액이 페이지를 넘어 이어지고, 서명이 안 맞는 cursor 는 첫 페이지로."""
+
+    def setUp(self):
+        super().setUp()
+        self.receive(date(2026, 1, 5), self.p1, 10, 100)
+        self.move(date(2026, 1, 6), "out", self.p1, 3)
+        self.move(date(2026, 1, 7), "out", self.p1, 2)
+
+    def _card(self, **params):
+        with mock.patch("inventory.views.STOCK_CARD_PAGE_SIZE", 2):
+            return self.client.get(reverse("inventory:product_stock_card", args=[self.p1.sku_code]), params)
+
+    def test_running_balance_and_signed_cursor(self):
+        first = self._card()
+        self.assertEqual([m.balance_after for m in first.context["rows"]], [Decimal("5"), Decimal("7")])
+        cursor = first.context["next_cursor"]
+
+        second = self._card(cursor=cursor)
+        self.assertFalse(second.context["is_first_page"])
+        self.assertEqual([m.balance_after for m in second.context["rows"]], [Decimal("10")])
+
+        # bal 을 바꾼 cursor: 서명이 안 맞으므로 버리고 첫 페이지 (DB 합계로 다시 계산)
+        value, signature = cursor.rsplit(":", 1)
+        forged = f"{value}:{signature[::-1]}"
+        page = self._card(cursor=forged)
+        self.assertTrue(page.context["is_first_page"])
+        self.assertEqual([m.balance_after for m in page.context["rows"]], [Decimal("5"), Decimal("7")])
+
+    def test_overview_links_escape_search(self):
+        response = self.client.get(reverse("inventory:inventory_overview"), {"q": "a&b #1"})
+        self.assertContains(response, "?q=a%26b%20%231")
+
+
+class ReplenishmentTests(LedgerFixture, TestCase):
+    """
+    발주 제안 계산: 7/30/90일 가중 판매속도, 운송수단별 리드타임, 안전재고/검토주기.
+    설정: 리드타임 OCEAN 35 / AIR 4, 안전재고 7일, 검토주기 14일.
+    """
+
+    PLAN = date(2026, 6, 30)  # 7일 창 6/24~, 30일 창 6/1~, 90일 창 4/2~
+
+    def setUp(self):
+        super().setUp()
+        Product.objects.filter(id=self.p2.id).update(default_transport_mode="AIR")
+        self.p3 = Product.objects.create(
+            sku_code="LED-3", name_en="Ledger product 3", base_unit="pack", net_weight_kg_per_unit=Decimal("1.0000"),
+        )
+
+        # p1 (OCEAN): 순출고 7일 14 / 30일 60 / 90일 180 → 일평균 모두 2, 재고 70
+        self.receive(date(2026, 3, 1), self.p1, 250, 100)
+        self.move(date(2026, 4, 15), "out", self.p1, 120)
+        self.move(date(2026, 6, 10), "out", self.p1, 46)
+        self.move(date(2026, 6, 28), "out", self.p1, 21)
+        self.move(date(2026, 6, 29), "in", self.p1, 7, ref_table="sales_salesinvoice")  # 인보이스 취소 복구는 판매에서 뺌
+
+        # p2 (AIR): 7일 14 / 30일 30 / 90일 45 → 2, 1, 0.5 → 가중 1.4, 재고 5.5
+        self.receive(date(2026, 3, 1), self.p2, "50.5", 100)
+        self.move(date(2026, 5, 1), "out", self.p2, 15)
+        self.move(date(2026, 6, 15), "out", self.p2, 16)
+        self.move(date(2026, 6, 27), "out", self.p2, 14)
+
+        # p3: 팔았다가 전부 취소 → 판매속도 0, 입고는 판매가 아님
+        self.receive(date(2026, 3, 1), self.p3, 10, 100)
+        self.move(date(2026, 6, 20), "out", self.p3, 5)
+        self.move(date(2026, 6, 21), "in", self.p3, 5, ref_table="sales_salesinvoice")
+
+    def _suggestions(self):
+        return {s.product_id: s for s in ReplenishmentSuggestion.objects.filter(plan_date=self.PLAN)}
+
+    def test_velocity_windows(self):
+        velocity = sales_velocity(self.PLAN)
+        self.assertEqual(velocity[self.p1.id], {7: 2, 30: 2, 90: 2})
+        self.assertEqual(velocity[self.p2.id], {7: 2, 30: 1, 90: Decimal("0.5")})
+        self.assertEqual(velocity[self.p3.id], {7: 0, 30: 0, 90: 0})
+
+    def test_suggested_quantities(self):
+        self.assertEqual(plan_replenishment(self.PLAN), 2)  # 판매속도 0 인 p3 는 제안 없음
+        rows = self._suggestions()
+        self.assertNotIn(self.p3.id, rows)
+
+        # OCEAN: 재주문점 2 × (35+7) = 84 ≥ 재고 70 → 목표 2 × (35+7+14) = 112 → 42
+        p1 = rows[self.p1.id]
+        self.assertEqual((p1.transport_mode, p1.lead_time_days), ("OCEAN", 35))
+        self.assertEqual((p1.daily_velocity, p1.reorder_point, p1.target_qty), (2, 84, 112))
+        self.assertEqual((p1.on_hand_qty_units, p1.days_of_cover, p1.suggested_qty), (70, 35, 42))
+
+        # AIR: 재주문점 1.4 × (4+7) = 15.4 ≥ 재고 5.5 → 목표 1.4 × 25 = 35 → 29.5 를 단위 올림 30
+        p2 = rows[self.p2.id]
+        self.assertEqual((p2.transport_mode, p2.lead_time_days), ("AIR", 4))
+        self.assertEqual((p2.daily_velocity, p2.reorder_point, p2.target_qty), (Decimal("1.4"), Decimal("15.4"), 35))
+        self.assertEqual(p2.suggested_qty, 30)
+
+    def test_settings_drive_reorder_math(self):
+        # 검토주기 28일 → 목표 2 × (35+7+28) = 140 → 70
+        with override_settings(INVENTORY_REVIEW_PERIOD_DAYS=28):
+            plan_replenishment(self.PLAN)
+        self.assertEqual(self._suggestions()[self.p1.id].suggested_qty, 70)
+
+        # 리드타임 20일, 안전재고 0 → 재주문점 40 < 재고 70 → 제안 0 (행은 남음), 같은 날짜로 다시 돌리면 교체
+        with override_settings(INVENTORY_LEAD_TIME_DAYS={"OCEAN": 20, "AIR": 4}, INVENTORY_SAFETY_STOCK_DAYS=0):
+            self.assertEqual(plan_replenishment(self.PLAN), 2)
+        p1 = self._suggestions()[self.p1.id]
+        self.assertEqual((p1.lead_time_days, p1.reorder_point, p1.suggested_qty), (20, 40, 0))
+        self.assertEqual(ReplenishmentSuggestion.objects.filter(plan_date=self.PLAN).count(), 2)
+
+
+class ValuationTests(TestCase):
+    """재고 평가액: 조합별 집계 → 원산지/운송수단/단위 소계, 화면/CSV, balance 쓰기 커밋 후 캐시 무효화."""
+
+    def setUp(self):
+        self.products = {}
+        for sku, origin, mode, unit, qty, cost in [
+            ("VAL-A", "KR", "OCEAN", "pack", "10", "100"),
+            ("VAL-B", "KR", "AIR", "kg", "2.5", "40"),
+            ("VAL-C", None, "OCEAN", "pack", "4", "50"),
+            ("VAL-D", "NO", "AIR", "pack", None, None),  # 재고 없음 → 제외
+        ]:
+            product = Product.objects.create(
+                sku_code=sku, name_en=sku, base_unit=unit, origin_country=origin,
+                default_transport_mode=mode, net_weight_kg_per_unit=Decimal("1.0000"),
+            )
+            self.products[sku] = product
+            if qty:
+                with MovementJournal() as journal:
+                    journal.add_in(product_id=product.id, qty_units=Decimal(qty), unit_cost_php=Decimal(cost))
+        caches[settings.INVENTORY_VALUATION_CACHE].clear()
+
+    @staticmethod
+    def _keys(rows, *fields):
+        return [tuple(r[f] for f in fields) for r in rows]
+
+    def test_rollup_numbers(self):
+        v = get_valuation()
+        self.assertEqual((v["total_skus"], v["total_value"]), (3, Decimal("1300")))
+        self.assertEqual(self._keys(v["by_origin_country"], "key", "skus", "value"), [
+            ("KR", 2, Decimal("1100")), ("-", 1, Decimal("200")),
+        ])
+        self.assertEqual(self._keys(v["by_transport_mode"], "key", "skus", "value"), [
+            ("OCEAN", 2, Decimal("1200")), ("AIR", 1, Decimal("100")),
+        ])
+        self.assertEqual(self._keys(v["by_base_unit"], "key", "qty", "value"), [
+            ("pack", Decimal("14"), Decimal("1200")), ("kg", Decimal("2.5"), Decimal("100")),
+        ])
+        self.assertEqual([r["product__sku_code"] for r in v["top_skus"]], ["VAL-A", "VAL-C", "VAL-B"])
+
+    def test_page_and_csv(self):
+        response = self.client.get(reverse("inventory:inventory_valuation"))
+        self.assertContains(response, "<b>1300.00</b>")
+        self.assertContains(response, "(3 SKUs in stock)")
+
+        response = self.client.get(reverse("inventory:export_valuation_csv"))
+        self.assertIsInstance(response, StreamingHttpResponse)
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode("utf-8-sig"))))
+        self.assertEqual(rows[0][0], "SKU")
+        self.assertEqual([(r[0], r[-1]) for r in rows[1:]], [
+            ("VAL-A", "1000.0000"), ("VAL-B", "100.0000"), ("VAL-C", "200.0000"),
+        ])
+
+        response = self.client.get(reverse("inventory:export_valuation_csv"), {"by": "group"})
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode("utf-8-sig"))))
+        self.assertEqual(len(rows), 1 + 3 + 1)  # 헤더 + (원산지, 운송수단, 단위) 조합 3 + TOTAL
+        self.assertEqual(rows[-1], ["TOTAL", "", "", "3", "", "1300.0000"])
+
+    def test_cached_until_balance_write_commits(self):
+        get_valuation()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_valuation()["total_value"], Decimal("1300"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with MovementJournal() as journal:
+                journal.add_out(product_id=self.products["VAL-A"].id, qty_units=Decimal("4"))
+            self.assertEqual(get_valuation()["total_value"], Decimal("1300"))  # 커밋 전에는 캐시 그대로
+
+        self.assertEqual(get_valuation()["total_value"], Decimal("900"))
+        self.assertEqual(caches[settings.INVENTORY_VALUATION_CACHE].default_timeout, 60)  # 다른 프로세스 쓰기는 TTL
@@ -8,4 +8,16 @@ urlpatterns = [
     path("overview/", views.inventory_overview, name="inventory_overview"),
     path("overview/balances.csv", views.export_balances_csv, name="export_balances_csv"),
     path("overview/movements.csv", views.export_movements_csv, name="export_movements_csv"),
+    path("valuation/", views.inventory_valuation, name="inventory_valuation"),
+    path("valuation.csv", views.export_valuation_csv, name="export_valuation_csv"),
+    path("valuation/fx/", views.fx_revaluation, name="fx_revaluation"),
+    path("valuation/fx.csv", views.export_fx_revaluation_csv, name="export_fx_revaluation_csv"),
+    path("aging/", views.lot_aging_report, name="lot_aging_report"),
+    path("aging.csv", views.export_lot_aging_csv, name="export_lot_aging_csv"),
+    path("expiring/", views.expiring_lots_report, name="expiring_lots_report"),
+    path("expiring.csv", views.export_expiring_lots_csv, name="export_expiring_lots_csv"),
+    path("replenishment/", views.replenishment_overview, name="replenishment_overview"),
+    path("replenishment.csv", views.export_replenishment_csv, name="export_replenishment_csv"),
+    path("products/search.json", views.product_search, name="product_search"),
+    path("product/<str:sku>/card/", views.product_stock_card, name="product_stock_card"),
 ]
@@ -1,26 +1,40 @@
 # inventory/views.py
-from django.db.models import Q
+from decimal import Decimal
 
-from django.shortcuts import render
-from django.http import HttpResponse
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.utils import timezone
 from django.utils.dateparse import parse_date
 
-from inventory.models import InventoryBalance, StockMovement
+from core.exports import chunked, iter_values, stream_csv
+from core.pagination import decode_cursor, encode_cursor
+from fx.services import FXRateNotFound
+
+from inventory.models import InventoryBalance, Product, ReplenishmentSuggestion, StockMovement
 # inventory/views.py
 
-from sales.models import SalesInvoice
-from inventory.models import InventoryLot
+from inventory.services.aging import AGE_BUCKETS, GROUPINGS, get_aging
+from inventory.services.archive import iter_movement_values, movements_page
+from inventory.services.expiry import expiring_lots
+from inventory.services.refs import attach_partner_display, resolve_refs
+from inventory.services.search import autocomplete, product_filter
+from inventory.services.valuation import (
+    VALUE_QUANT,
+    fx_revaluation_by_sku,
+    fx_revaluation_totals,
+    get_valuation,
+    iter_sku_values,
+    stocked_balances,
+)
 
 # inventory/views.py
 
-def _csv_response_with_bom(filename: str) -> HttpResponse:
-    """
-    Excel에서 UTF-8 한글이 깨지지 않도록 BOM을 포함한 CSV 응답을 만든다.
-    """
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    response.write("\ufeff")  # ✅ Excel 호환 UTF-8 BOM
-    return response
+MOVEMENT_PAGE_SIZE = 300
+STOCK_CARD_PAGE_SIZE = 200
+
 
 def inventory_overview(request):
     """
@@ -29,6 +43,7 @@ def inventory_overview(request):
       - move_from=YYYY-MM-DD
       - move_to=YYYY-MM-DD
       - move_type=IN/OUT/ADJ
+      - cursor: movement 목록 다음 페이지 위치 (keyset)
     """
     q = (request.GET.get("q") or "").strip()
     move_from = parse_date(request.GET.get("move_from", "") or "")
@@ -37,44 +52,17 @@ def inventory_overview(request):
 
     balances = InventoryBalance.objects.select_related("product").order_by("product__sku_code")
     if q:
-        balances = balances.filter(
-            Q(product__sku_code__icontains=q) |
-            Q(product__name_en__icontains=q) |
-            Q(product__name_ko__icontains=q)
-        )
+        balances = balances.filter(product_filter(q, prefix="product__"))
 
-    movements = StockMovement.objects.select_related("product").order_by("-created_at")
-    movement_list = []
-
-    for m in movements:
-        partner_display = "-"
-
-        if m.movement_type == "OUT" and m.ref_table == "sales_salesinvoice":
-            try:
-                invoice = SalesInvoice.objects.select_related("customer").get(id=m.ref_id)
-                partner_display = str(invoice.customer)
-            except SalesInvoice.DoesNotExist:
-                partner_display = "(missing invoice)"
-
-        elif m.movement_type == "IN" and m.ref_table == "inventory_inventorylot":
-            try:
-                lot = InventoryLot.objects.select_related("supplier").get(id=m.ref_id)
-                partner_display = str(lot.supplier)
-            except InventoryLot.DoesNotExist:
-                partner_display = "(missing supplier)"
-
-        # 템플릿에서 쓰기 위한 가상 필드
-        m.partner_display = partner_display
-        movement_list.append(m)
-    if move_type in {"IN", "OUT", "ADJ"}:
-        movements = movements.filter(movement_type=move_type)
-    if move_from:
-        movements = movements.filter(created_at__date__gte=move_from)
-    if move_to:
-        movements = movements.filter(created_at__date__lte=move_to)
-
-    # 너무 길어지는 것 방지: 화면에는 최근 300개만
-    movements = movements[:300]
+    # keyset 페이지네이션: 한 페이지 MOVEMENT_PAGE_SIZE 개, "더 이전" 은 cursor로 이어서 (최근 → archive)
+    # 거래처 표시는 필터/슬라이스 이후 ref_table 별 1쿼리로 해결
+    page, has_more = movements_page(
+        decode_cursor(request.GET.get("cursor", "")),
+        page_size=MOVEMENT_PAGE_SIZE,
+        **_movement_filters(move_type, move_from, move_to),
+    )
+    movement_list = attach_partner_display(page)
+    next_cursor = encode_cursor(page[-1].created_at, page[-1].id) if has_more else ""
 
     context = {
         "q": q,
@@ -83,52 +71,352 @@ def inventory_overview(request):
         "move_type": move_type,
         "balances": balances,
         "movements": movement_list,
+        "next_cursor": next_cursor,
+        "is_first_page": not request.GET.get("cursor"),
     }
     return render(request, "inventory/inventory_overview.html", context)
 
 
-def export_balances_csv(request):
+def _movement_filters(move_type: str, move_from, move_to) -> dict:
+    filters = {}
+    if move_type in {"IN", "OUT", "ADJ"}:
+        filters["movement_type"] = move_type
+    if move_from:
+        filters["created_at__date__gte"] = move_from
+    if move_to:
+        filters["created_at__date__lte"] = move_to
+    return filters
+
+
+def product_search(request):
+    """
+    상품 자동완성 JSON: GET ?q=연어&limit=10
+    → {"results": [{"sku_code", "name_en", "name_ko", "base_unit"}, ...]} (관련도 순)
+    """
     q = (request.GET.get("q") or "").strip()
+    try:
+        limit = min(max(int(request.GET.get("limit", 10)), 1), 50)
+    except ValueError:
+        limit = 10
+    return JsonResponse({"results": autocomplete(q, limit) if q else []})
 
-    balances = InventoryBalance.objects.select_related("product").order_by("product__sku_code")
-    if q:
-        balances = balances.filter(
-            product__sku_code__icontains=q
-        ) | balances.filter(product__name_en__icontains=q) | balances.filter(product__name_ko__icontains=q)
 
-    import csv
-    response = _csv_response_with_bom("inventory_balances.csv")
-    w = csv.writer(response)
+def product_stock_card(request, sku: str):
+    """
+    품목별 재고카드: 모든 movement(최신순) + 각 행 이후의 누적 재고.
+
+    - 첫 페이지: 품목 ledger 합계(SUM) 1번으로 마감 잔액을 구한다.
+    - 다음 페이지: 직전 페이지 마지막 행의 '이전 잔액'을 cursor에 실어 보내므로
+      이력이 아무리 길어도 페이지당 인덱스 범위 조회 1번으로 끝난다.
+    """
+    product = get_object_or_404(Product, sku_code=sku)
+
+    cursor = decode_cursor(request.GET.get("cursor", ""))
+    if cursor is not None and "bal" in cursor:
+        running = Decimal(cursor["bal"])
+    else:
+        cursor = None
+        # 최근 테이블 합계 = 이월 행(archive 합계) 포함 현재 잔액
+        running = StockMovement.objects.filter(product=product).aggregate(
+            total=Coalesce(Sum(StockMovement.signed_qty_expression()), Decimal("0"))
+        )["total"]
+
+    page, has_more = movements_page(cursor, page_size=STOCK_CARD_PAGE_SIZE, product=product)
+    rows = attach_partner_display(page)
+    for m in rows:
+        m.balance_after = running
+        running -= m.signed_qty_units
 
-    w.writerow(["SKU", "Name(EN)", "Name(KO)", "Base Unit", "On Hand Qty"])
+    next_cursor = ""
+    if has_more:
+        next_cursor = encode_cursor(page[-1].created_at, page[-1].id, bal=str(running))
 
-    for b in balances:
-        p = b.product
-        w.writerow([p.sku_code, p.name_en, p.name_ko, p.base_unit, str(b.on_hand_qty_units)])
+    balance = InventoryBalance.objects.filter(product=product).first()
 
-    return response
+    return render(request, "inventory/stock_card.html", {
+        "product": product,
+        "balance": balance,
+        "rows": rows,
+        "next_cursor": next_cursor,
+        "is_first_page": cursor is None,
+    })
+
+
+def export_balances_csv(request):
+    q = (request.GET.get("q") or "").strip()
+
+    balances = InventoryBalance.objects.order_by("product__sku_code")
+    if q:
+        balances = balances.filter(product_filter(q, prefix="product__"))
+
+    def rows():
+        yield ["SKU", "Name(EN)", "Name(KO)", "Base Unit", "On Hand Qty", "Avg Cost (PHP)", "Value (PHP)"]
+        yield from iter_sku_values(
+            balances,
+            "product__sku_code", "product__name_en", "product__name_ko", "product__base_unit",
+            "on_hand_qty_units", "avg_cost_php_per_unit",
+        )
+
+    return stream_csv("inventory_balances.csv", rows())
 
 
 def export_movements_csv(request):
+    """
+    전체 기간 export (개수 제한 없음, 최근 → archive 순서). 모델 인스턴스 없이 values_list를 chunk 단위로 스트리밍하고,
+    거래처 이름은 chunk 마다 ref_table 별 1쿼리로 붙인다.
+    """
     move_from = parse_date(request.GET.get("move_from", "") or "")
     move_to = parse_date(request.GET.get("move_to", "") or "")
     move_type = (request.GET.get("move_type") or "").strip()
 
-    movements = StockMovement.objects.select_related("product").order_by("-created_at")
-    if move_type in {"IN", "OUT", "ADJ"}:
-        movements = movements.filter(movement_type=move_type)
-    if move_from:
-        movements = movements.filter(created_at__date__gte=move_from)
-    if move_to:
-        movements = movements.filter(created_at__date__lte=move_to)
+    values = iter_movement_values(
+        "created_at", "movement_type", "product__sku_code", "product__name_en", "product__name_ko",
+        "qty_units", "ref_table", "ref_id", "memo",
+        **_movement_filters(move_type, move_from, move_to),
+    )
+
+    def rows():
+        yield ["Created At", "Type", "SKU", "Product Name(EN)", "Product Name(KO)", "Qty", "Partner", "Ref Table", "Ref ID", "Memo"]
+        for chunk in chunked(values):
+            partners = resolve_refs((r[6], r[7]) for r in chunk)
+            for created_at, mtype, sku, name_en, name_ko, qty, ref_table, ref_id, memo in chunk:
+                partner = partners.get((ref_table, ref_id), "-")
+                yield [created_at, mtype, sku, name_en, name_ko, qty, partner, ref_table, ref_id, memo]
+
+    return stream_csv("stock_movements.csv", rows())
+
+
+def inventory_valuation(request):
+    """
+    재고 평가액 (수량 × 평균원가): 총계 + 원산지/운송수단/단위별 소계 + 상위 SKU.
+    집계는 캐시된다 (inventory.services.valuation): 이 프로세스의 balance 쓰기는 바로,
+    다른 프로세스의 쓰기는 캐시 TIMEOUT 뒤에 반영.
+    """
+    return render(request, "inventory/valuation.html", {"valuation": get_valuation()})
+
+
+def export_valuation_csv(request):
+    """
+    by=sku (기본): SKU별 수량/평균원가/평가액 전체 (DB에서 곱셈, 스트리밍)
+    by=group: (원산지, 운송수단, 단위) 조합별 소계 (캐시된 집계)
+    """
+    if request.GET.get("by") == "group":
+        valuation = get_valuation()
 
-    import csv
-    response = _csv_response_with_bom("stock_movements.csv")
-    w = csv.writer(response)
-    w.writerow(["Created At", "Type", "SKU", "Product Name(EN)", "Product Name(KO)", "Qty", "Ref Table", "Ref ID", "Memo"])
+        def group_rows():
+            yield ["Origin Country", "Transport Mode", "Base Unit", "SKUs", "On Hand Qty", "Value (PHP)"]
+            for g in valuation["groups"]:
+                yield [g["origin_country"], g["transport_mode"], g["base_unit"], g["skus"], g["qty"], g["value"]]
+            yield ["TOTAL", "", "", valuation["total_skus"], "", valuation["total_value"]]
 
-    for m in movements[:2000]:  # CSV는 최근 2000개 제한(초기 안전장치)
-        p = m.product
-        w.writerow([m.created_at, m.movement_type, p.sku_code, p.name_en, p.name_ko, str(m.qty_units), m.ref_table, m.ref_id, m.memo])
+        return stream_csv("inventory_valuation_groups.csv", group_rows())
+
+    balances = stocked_balances().order_by("product__sku_code")
+
+    def rows():
+        yield [
+            "SKU", "Name(EN)", "Origin Country", "Transport Mode", "Base Unit",
+            "On Hand Qty", "Avg Cost (PHP)", "Value (PHP)",
+        ]
+        yield from iter_sku_values(
+            balances,
+            "product__sku_code", "product__name_en", "product__origin_country",
+            "product__default_transport_mode", "product__base_unit",
+            "on_hand_qty_units", "avg_cost_php_per_unit",
+        )
+
+    return stream_csv("inventory_valuation.csv", rows())
+
+
+FX_REVALUATION_TOP = 50
+
+
+def _fx_revaluation_date(request):
+    return parse_date(request.GET.get("date", "") or "") or timezone.localdate()
+
+
+def fx_revaluation(request):
+    """
+    GET: date=YYYY-MM-DD (기본: 오늘)
+    남은 로트를 그 날짜 환율(FXDailyRate)로 다시 환산한 값 vs 장부 landed cost (입고 당시 환율 스냅샷).
+    합계 1쿼리 + 평가차이 큰 SKU 상위 1쿼리.
+    """
+    as_of = _fx_revaluation_date(request)
+    try:
+        totals = fx_revaluation_totals(as_of)
+        top = list(fx_revaluation_by_sku(as_of, top=FX_REVALUATION_TOP))
+        error = ""
+    except FXRateNotFound as e:
+        totals, top, error = None, [], str(e)
+    return render(request, "inventory/fx_revaluation.html", {
+        "as_of": as_of,
+        "totals": totals,
+        "top": top,
+        "top_count": FX_REVALUATION_TOP,
+        "error": error,
+    })
+
+
+def export_fx_revaluation_csv(request):
+    as_of = _fx_revaluation_date(request)
+    try:
+        fx_revaluation_totals(as_of)  # 달력에 환율이 없으면 스트리밍 전에 실패
+    except FXRateNotFound as e:
+        return HttpResponseBadRequest(str(e))
+
+    def rows():
+        yield ["SKU", "Name(EN)", "Remaining Qty", "KRW Cost", "Book Value (PHP)",
+               f"Revalued at {as_of} (PHP)", "Difference (PHP)"]
+        for r in fx_revaluation_by_sku(as_of):
+            yield [r["product__sku_code"], r["product__name_en"], r["qty"], r["krw_value"],
+                   r["book_value"], r["revalued_value"], r["difference"]]
+
+    return stream_csv(f"fx_revaluation_{as_of}.csv", rows())
+
+
+def _replenishment_rows(request):
+    """GET: date=YYYY-MM-DD (기본: 최신 plan), mode=OCEAN/AIR, all=1 (발주 불필요 품목 포함)."""
+    plan_date = parse_date(request.GET.get("date", "") or "") or (
+        ReplenishmentSuggestion.objects.order_by("-plan_date").values_list("plan_date", flat=True).first()
+    )
+    mode = (request.GET.get("mode") or "").strip()
+    show_all = request.GET.get("all") == "1"
+
+    rows = ReplenishmentSuggestion.objects.filter(plan_date=plan_date)
+    if not show_all:
+        rows = rows.filter(suggested_qty__gt=0)
+    if mode in {"OCEAN", "AIR"}:
+        rows = rows.filter(transport_mode=mode)
+    rows = rows.order_by("days_of_cover", "product__sku_code")
+    return plan_date, mode, show_all, rows
+
+
+def replenishment_overview(request):
+    plan_date, mode, show_all, rows = _replenishment_rows(request)
+    return render(request, "inventory/replenishment.html", {
+        "plan_date": plan_date,
+        "mode": mode,
+        "show_all": show_all,
+        "rows": rows.select_related("product"),
+    })
+
+
+def export_replenishment_csv(request):
+    plan_date, _, _, rows = _replenishment_rows(request)
+
+    def csv_rows():
+        yield [
+            "Plan Date", "SKU", "Name(EN)", "Base Unit", "Mode", "Lead Time (days)", "On Hand",
+            "Velocity 7d", "Velocity 30d", "Velocity 90d", "Daily Velocity", "Days of Cover",
+            "Reorder Point", "Target Qty", "Suggested Qty",
+        ]
+        yield from iter_values(
+            rows,
+            "plan_date", "product__sku_code", "product__name_en", "product__base_unit",
+            "transport_mode", "lead_time_days", "on_hand_qty_units",
+            "velocity_7d", "velocity_30d", "velocity_90d", "daily_velocity", "days_of_cover",
+            "reorder_point", "target_qty", "suggested_qty",
+        )
+
+    return stream_csv(f"replenishment_{plan_date or 'none'}.csv", csv_rows())
+
+
+EXPIRY_DEFAULT_DAYS = 14
+
+
+def _expiry_params(request):
+    try:
+        days = max(int(request.GET.get("days", EXPIRY_DEFAULT_DAYS)), 0)
+    except ValueError:
+        days = EXPIRY_DEFAULT_DAYS
+    return days, timezone.localdate()
+
+
+def expiring_lots_report(request):
+    """GET: days=N (기본 14) — N일 안에 유통기한이 끝나는(또는 이미 지난) 남은 로트."""
+    days, today = _expiry_params(request)
+    lots = list(expiring_lots(days, today))
+    for lot in lots:
+        lot.days_left = (lot.expiry_date - today).days
+
+    return render(request, "inventory/expiring_lots.html", {
+        "days": days,
+        "today": today,
+        "lots": lots,
+        "total_value": sum((lot.remaining_value_php for lot in lots), Decimal("0")),
+    })
+
+
+def export_expiring_lots_csv(request):
+    days, today = _expiry_params(request)
+    values = iter_values(
+        expiring_lots(days, today),
+        "expiry_date", "product__sku_code", "product__name_en", "product__name_ko", "supplier__name",
+        "received_date", "qty_units_remaining", "landed_cost_php_per_unit", "remaining_value_php",
+    )
+
+    def rows():
+        yield [
+            "Expiry Date", "Days Left", "SKU", "Name(EN)", "Name(KO)", "Supplier",
+            "Received Date", "Remaining Qty", "Unit Cost (PHP)", "Remaining Value (PHP)",
+        ]
+        for expiry, sku, name_en, name_ko, supplier, received, qty, cost, value in values:
+            value = Decimal(value or 0).quantize(VALUE_QUANT)
+            yield [expiry, (expiry - today).days, sku, name_en, name_ko, supplier, received, qty, cost, value]
+
+    return stream_csv(f"expiring_lots_{today}_{days}d.csv", rows())
+
+
+def _aging_params(request):
+    by = request.GET.get("by", "sku")
+    return (by if by in GROUPINGS else "sku"), request.GET.get("refresh") == "1"
+
+
+def lot_aging_report(request):
+    """
+    GET: by=sku|supplier, refresh=1 (오늘 캐시 무시하고 다시 계산)
+    남은 로트의 입고 후 경과일 구간(0-30/31-60/61-90/90+)별 수량/원가.
+    """
+    by, refresh = _aging_params(request)
+    rows = get_aging(by, refresh=refresh)
+    for r in rows:
+        r["buckets"] = [(r[f"qty_{key}"], r[f"value_{key}"]) for key, *_ in AGE_BUCKETS]
+
+    totals = {
+        "buckets": [
+            sum((r[f"value_{key}"] for r in rows), Decimal("0")) for key, *_ in AGE_BUCKETS
+        ],
+        "value": sum((r["value_total"] for r in rows), Decimal("0")),
+    }
+    return render(request, "inventory/lot_aging.html", {
+        "by": by,
+        "today": timezone.localdate(),
+        "labels": [label for _, label, *_ in AGE_BUCKETS],
+        "rows": rows,
+        "totals": totals,
+    })
+
+
+def export_lot_aging_csv(request):
+    by, refresh = _aging_params(request)
+    group = GROUPINGS[by]
+    rows = get_aging(by, refresh=refresh)
+
+    def csv_rows():
+        header = {"product__sku_code": "SKU", "product__name_en": "Name(EN)",
+                  "product__base_unit": "Base Unit", "supplier__name": "Supplier"}
+        yield (
+            [header[g] for g in group]
+            + [f"Qty {label}" for _, label, *_ in AGE_BUCKETS]
+            + [f"Value {label} (PHP)" for _, label, *_ in AGE_BUCKETS]
+            + ["Qty Total", "Value Total (PHP)"]
+        )
+        for r in rows:
+            yield (
+                [r[g] for g in group]
+                + [r[f"qty_{key}"] for key, *_ in AGE_BUCKETS]
+                + [r[f"value_{key}"] for key, *_ in AGE_BUCKETS]
+                + [r["qty_total"], r["value_total"]]
+            )
 
-    return response
+    return stream_csv(f"lot_aging_by_{by}_{timezone.localdate()}.csv", csv_rows())
@@ -1,5 +1,20 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.shortcuts import redirect
+
+from fx.models import FXRatePeriod
 from .models import QuoteBatch, QuoteLine
+from .services.quoting import clone_batch, recompute_batch
+
+
+# 이 필드가 바뀌면 배치의 모든 라인을 다시 계산한다
+PRICING_SETTING_FIELDS = {
+    "fx_period",
+    "company_margin_rate",
+    "supplier_markup_rate",
+    "rounding_unit_php",
+    "ocean_krw_per_kg",
+    "air_krw_per_kg",
+}
 
 
 class QuoteLineInline(admin.TabularInline):
@@ -19,7 +34,7 @@ class QuoteBatchAdmin(admin.ModelAdmin):
         "rounding_unit_php",
         "created_at",
     )
-    actions = ["export_selected_batches_csv"]
+    actions = ["export_selected_batches_csv", "recompute_selected_batches", "clone_selected_batches"]
     def export_selected_batches_csv(self, request, queryset):
         """
         여러 개 선택하면: 첫 번째 배치만 우선 다운로드(단순화).
@@ -32,6 +47,34 @@ class QuoteBatchAdmin(admin.ModelAdmin):
 
     export_selected_batches_csv.short_description = "Export selected QuoteBatch to CSV"
 
+    @admin.action(description="Recompute all line prices of selected batches")
+    def recompute_selected_batches(self, request, queryset):
+        count = sum(recompute_batch(batch) for batch in queryset)
+        messages.success(request, f"Recomputed {count} line(s).")
+
+    @admin.action(description="Clone selected batches onto the latest FX period")
+    def clone_selected_batches(self, request, queryset):
+        """
+        선택한 배치마다 clone_batch (설정은 그대로, 환율 기간만 시작일이 가장 늦은 기간으로).
+        배치 1개면 새 배치 수정 화면으로 이동해서 마진/운임을 바로 고칠 수 있다 (저장하면 라인 재계산).
+        """
+        period = FXRatePeriod.objects.order_by("-start_date", "-id").first()
+        if period is None:
+            messages.error(request, "No FX period to clone onto.")
+            return None
+
+        clones = [clone_batch(batch, fx_period=period) for batch in queryset.order_by("id")]
+        messages.success(request, f"Cloned {len(clones)} batch(es) onto FX period {period}.")
+        if len(clones) == 1:
+            return redirect("admin:pricing_quotebatch_change", clones[0].pk)
+        return None
+
+    def save_related(self, request, form, formsets, change):
+        # 인라인 라인까지 저장된 뒤에 다시 계산 (설정이 바뀐 경우만)
+        super().save_related(request, form, formsets, change)
+        if change and PRICING_SETTING_FIELDS & set(form.changed_data):
+            recompute_batch(form.instance)
+
     inlines = [QuoteLineInline]
 
 @admin.register(QuoteLine)
@@ -1,7 +1,7 @@
-import csv
 from decimal import Decimal
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 
+from core.exports import iter_values, stream_csv
 from pricing.models import QuoteBatch, QuoteLine
 
 
@@ -14,58 +14,60 @@ def _d(v):
     return v
 
 
-def export_quote_batch_csv(batch_id: int) -> HttpResponse:
+def export_quote_batch_csv(batch_id: int) -> StreamingHttpResponse:
     batch = QuoteBatch.objects.get(id=batch_id)
 
     lines = (
         QuoteLine.objects
         .filter(batch=batch)
-        .select_related("product")
         .order_by("id")
     )
 
     filename = f"quote_batch_{batch.id}_{batch.name}.csv".replace(" ", "_")
 
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    def rows():
+        # 헤더(필요하면 나중에 더 추가)
+        yield [
+            "BatchName",
+            "ProductSKU",
+            "ProductName",
+            "QtyUnits",
+            "SupplierCostKRWPerUnit",
+            "BillableWeightKgTotal",
+            "FXRateSnapshot",
+            "SupplierPayPHPPerUnit",
+            "TransportPHPTotal",
+            "TransportPHPPerUnit",
+            "BasePricePHPPerUnit",
+            "FinalPricePHPPerUnit",
+            "CreatedAt",
+        ]
 
-    # 엑셀 한글 깨짐 방지용 BOM
-    response.write("\ufeff")
+        for (
+            sku, name_ko, name_en, qty, supplier_cost, weight, fx, supplier_pay,
+            transport_total, transport_per_unit, base_price, final_price, created_at,
+        ) in iter_values(
+            lines,
+            "product__sku_code", "product__name_ko", "product__name_en",
+            "qty_units", "supplier_cost_krw_per_unit", "billable_weight_kg_total", "fx_rate_snapshot",
+            "supplier_pay_php_per_unit", "transport_php_total", "transport_php_per_unit",
+            "base_price_php_per_unit", "final_price_php_per_unit", "created_at",
+        ):
+            yield [
+                batch.name,
+                sku,
+                name_ko or name_en,
+                _d(qty),
+                _d(supplier_cost),
+                _d(weight),
+                _d(fx),
+                _d(supplier_pay),
+                _d(transport_total),
+                _d(transport_per_unit),
+                _d(base_price),
+                _d(final_price),
+                created_at.isoformat() if created_at else "",
+            ]
 
-    writer = csv.writer(response)
-
-    # 헤더(필요하면 나중에 더 추가)
-    writer.writerow([
-        "BatchName",
-        "ProductSKU",
-        "ProductName",
-        "QtyUnits",
-        "SupplierCostKRWPerUnit",
-        "BillableWeightKgTotal",
-        "FXRateSnapshot",
-        "SupplierPayPHPPerUnit",
-        "TransportPHPTotal",
-        "TransportPHPPerUnit",
-        "BasePricePHPPerUnit",
-        "FinalPricePHPPerUnit",
-        "CreatedAt",
-    ])
-
-    for ln in lines:
-        writer.writerow([
-            batch.name,
-            ln.product.sku_code,
-            getattr(ln.product, "name_ko", "") or getattr(ln.product, "name_en", ""),
-            _d(ln.qty_units),
-            _d(ln.supplier_cost_krw_per_unit),
-            _d(ln.billable_weight_kg_total),
-            _d(ln.fx_rate_snapshot),
-            _d(ln.supplier_pay_php_per_unit),
-            _d(ln.transport_php_total),
-            _d(ln.transport_php_per_unit),
-            _d(ln.base_price_php_per_unit),
-            _d(ln.final_price_php_per_unit),
-            ln.created_at.isoformat() if ln.created_at else "",
-        ])
-
-    return response
+    # 엑셀 한글 깨짐 방지용 BOM은 stream_csv가 붙인다
+    return stream_csv(filename, rows())
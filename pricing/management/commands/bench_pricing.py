@@ -0,0 +1,184 @@
+# pricing/management/commands/bench_pricing.py
+
+import random
+import time
+from datetime import date
+from decimal import Decimal, localcontext
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from fx.models import FXRatePeriod
+from inventory.models import Product
+from pricing.models import QuoteBatch, QuoteLine
+from pricing.services.quoting import COMPUTED_FIELDS, PricingContext, ceil_to_nearest, compute_quote_lines
+
+
+def _legacy_compute_quote_line(line: QuoteLine) -> None:
+    """비교용: 예전 compute_quote_line (라인마다 batch/fx_period/product FK 접근 + Decimal(str()) 변환)."""
+    batch = line.batch
+    product = line.product
+    fx = Decimal(str(batch.fx_period.krw_to_php))
+    supplier_pay_php_per_unit = Decimal(str(line.supplier_cost_krw_per_unit)) * (
+        Decimal("1") + Decimal(str(batch.supplier_markup_rate))
+    ) * fx
+    mode = line.transport_mode or getattr(product, "default_transport_mode", None) or "OCEAN"
+    rate_krw_per_kg = Decimal(str(batch.air_krw_per_kg if mode == "AIR" else batch.ocean_krw_per_kg))
+    transport_php_total = rate_krw_per_kg * Decimal(str(line.billable_weight_kg_total)) * fx
+    transport_php_per_unit = transport_php_total / Decimal(str(line.qty_units))
+    other_php_per_unit = Decimal(str(line.other_cost_php_total or 0)) / Decimal(str(line.qty_units))
+    base = (
+        supplier_pay_php_per_unit * (Decimal("1") + Decimal(str(batch.company_margin_rate)))
+        + transport_php_per_unit
+        + other_php_per_unit
+    )
+    line.fx_rate_snapshot = fx
+    line.supplier_pay_php_per_unit = supplier_pay_php_per_unit
+    line.transport_php_total = transport_php_total
+    line.transport_php_per_unit = transport_php_per_unit
+    line.base_price_php_per_unit = base
+    line.final_price_php_per_unit = ceil_to_nearest(base, Decimal(str(batch.rounding_unit_php)))
+    if line.manual_price_php_per_unit is not None:
+        line.final_price_php_per_unit = line.manual_price_php_per_unit
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "견적 가격 계산 벤치마크: 예전 라인별 compute_quote_line(legacy) vs PricingContext + compute_quote_lines(kernel).\n"
+        "1) 메모리 합성 라인 --lines 개 (계산 비용만) 2) DB 라인 --db-lines 개를 prefetch 없이 읽어서 (FK 조회 포함).\n"
+        "DB 단계 데이터는 트랜잭션 안에서 만들고 롤백한다. 두 방식 결과가 (컬럼 자릿수로) 같은지도 확인한다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, default=100_000)
+        parser.add_argument("--db-lines", type=int, default=2_000)
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+        fx_period = FXRatePeriod(id=0, start_date=date(2026, 1, 1), krw_to_php=Decimal("0.043125"))
+        batch = QuoteBatch(
+            id=0, name="bench", fx_period=fx_period,
+            company_margin_rate=Decimal("0.2000"), supplier_markup_rate=Decimal("0.0500"),
+            rounding_unit_php=Decimal("10.00"),
+            ocean_krw_per_kg=Decimal("2200.00"), air_krw_per_kg=Decimal("14000.00"),
+        )
+        products = [
+            Product(id=i + 1, sku_code=f"BENCH-{i}", default_transport_mode=rng.choice(["OCEAN", "AIR"]))
+            for i in range(500)
+        ]
+
+        def make_lines(n):
+            return [
+                QuoteLine(
+                    batch=batch,
+                    product=rng.choice(products),
+                    transport_mode=rng.choice([None, None, "AIR", "OCEAN"]),
+                    qty_units=Decimal(rng.randint(1, 400)),
+                    supplier_cost_krw_per_unit=Decimal(rng.randint(1_000, 90_000)),
+                    billable_weight_kg_total=Decimal(rng.randint(1, 5_000)) / 10,
+                    other_cost_php_total=Decimal(rng.randint(0, 2_000)),
+                    manual_price_php_per_unit=Decimal("999.00") if rng.random() < 0.02 else None,
+                )
+                for _ in range(n)
+            ]
+
+        self.stdout.write(f"{'phase':<8} {'mode':<8} {'lines':>8} {'sec':>8} {'lines/sec':>11} {'queries':>8}")
+
+        # 1) 메모리: 계산 비용만 (FK 는 이미 붙어 있음)
+        legacy_lines = make_lines(opts["lines"])
+        kernel_lines = [self._clone(ln) for ln in legacy_lines]
+        # period_rate 는 DB 기간을 보므로 메모리 배치용 context 는 직접 만든다
+        context = PricingContext(
+            fx=fx_period.krw_to_php,
+            supplier_markup_factor=Decimal("1") + batch.supplier_markup_rate,
+            margin_factor=Decimal("1") + batch.company_margin_rate,
+            krw_per_kg={"OCEAN": batch.ocean_krw_per_kg, "AIR": batch.air_krw_per_kg},
+            rounding_unit=batch.rounding_unit_php,
+        )
+        self._run("memory", "legacy", legacy_lines, lambda: [_legacy_compute_quote_line(ln) for ln in legacy_lines])
+        self._run("memory", "kernel", kernel_lines, lambda: compute_quote_lines(context, kernel_lines))
+        self._check(legacy_lines, kernel_lines)
+
+        # 2) DB: prefetch 없이 읽은 라인 (FK 조회 비용 포함)
+        if opts["db_lines"]:
+            try:
+                with transaction.atomic():
+                    self._bench_db(opts["db_lines"], make_lines)
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def _bench_db(self, n, make_lines):
+        fx_period = FXRatePeriod.objects.create(start_date=date(1900, 1, 1), end_date=date(1900, 1, 1),
+                                                krw_to_php=Decimal("0.043125"))
+        batch = QuoteBatch.objects.create(name="bench", fx_period=fx_period)
+        products = Product.objects.bulk_create([
+            Product(sku_code=f"BENCH-PRICING-{i}", name_en="bench", base_unit="pack",
+                    net_weight_kg_per_unit=Decimal("1"), default_transport_mode="AIR" if i % 3 == 0 else "OCEAN")
+            for i in range(200)
+        ])
+        lines = make_lines(n)
+        for i, ln in enumerate(lines):
+            ln.batch = batch
+            ln.product = products[i % len(products)]
+            ln.final_price_php_per_unit = Decimal("0")  # save() 자동 계산 건너뜀
+        QuoteLine.objects.bulk_create(lines, batch_size=1000)
+
+        legacy_lines = list(QuoteLine.objects.filter(batch=batch).order_by("id"))
+        kernel_lines = list(QuoteLine.objects.filter(batch=batch).order_by("id"))
+        self._run("db", "legacy", legacy_lines, lambda: [_legacy_compute_quote_line(ln) for ln in legacy_lines])
+        self._run("db", "kernel", kernel_lines,
+                  lambda: compute_quote_lines(PricingContext.for_batch(batch), kernel_lines))
+        self._check(legacy_lines, kernel_lines)
+
+    def _run(self, phase, mode, lines, fn):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{phase:<8} {mode:<8} {len(lines):>8} {elapsed:>8.3f} {len(lines) / elapsed:>11,.0f} "
+            f"{len(ctx.captured_queries):>8}"
+        )
+
+    def _check(self, legacy_lines, kernel_lines):
+        """
+        kernel 결과 == legacy 결과를 컬럼 자릿수로 quantize 한 값.
+        기본 28자리 Decimal 은 나눗셈 결과가 정확히 반(…5)인 값을 …4999 로 만든 뒤 다시 반올림하는 경우가 있어서,
+        다른 라인은 60자리로 다시 계산해서 비교한다.
+        """
+        def differs(a, b):
+            return any(
+                getattr(a, f).quantize(Decimal(1).scaleb(-QuoteLine._meta.get_field(f).decimal_places)) != getattr(b, f)
+                for f in COMPUTED_FIELDS
+            )
+
+        suspects = [(a, b) for a, b in zip(legacy_lines, kernel_lines) if differs(a, b)]
+        with localcontext() as ctx:
+            ctx.prec = 60
+            precise = [self._clone(a) for a, _ in suspects]
+            for line in precise:
+                _legacy_compute_quote_line(line)
+        mismatched = sum(1 for a, (_, b) in zip(precise, suspects) if differs(a, b))
+
+        if mismatched:
+            self.stdout.write(self.style.ERROR(f"  {mismatched} line(s) differ between legacy and kernel!"))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"  results identical after quantize ({len(suspects)} exact-half line(s) double-rounded by 28-digit Decimal)"
+            ))
+
+    @staticmethod
+    def _clone(line: QuoteLine) -> QuoteLine:
+        return QuoteLine(
+            batch=line.batch, product=line.product, transport_mode=line.transport_mode,
+            qty_units=line.qty_units, supplier_cost_krw_per_unit=line.supplier_cost_krw_per_unit,
+            billable_weight_kg_total=line.billable_weight_kg_total, other_cost_php_total=line.other_cost_php_total,
+            manual_price_php_per_unit=line.manual_price_php_per_unit,
+        )
@@ -0,0 +1,49 @@
+# pricing/management/commands/import_quote_lines.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fx.services import FXRateNotFound
+from pricing.models import QuoteBatch
+from pricing.services.line_import import (
+    IMPORT_CHUNK_SIZE,
+    OPTIONAL_COLUMNS,
+    REQUIRED_COLUMNS,
+    import_quote_lines,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "견적 라인 CSV를 QuoteBatch 에 한 번에 추가한다 (주간 공급사 단가표 등).\n"
+        "필수 컬럼: " + ", ".join(REQUIRED_COLUMNS) + "\n"
+        "선택 컬럼: " + ", ".join(OPTIONAL_COLUMNS) + "\n"
+        "오류 행(형식 오류, 없는 SKU)은 건너뛰고 줄 번호와 함께 출력한다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("batch_id", type=int)
+        parser.add_argument("csv_path")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Rows per insert batch")
+        parser.add_argument("--dry-run", action="store_true", help="Validate and price only, write nothing")
+
+    def handle(self, *args, **opts):
+        try:
+            batch = QuoteBatch.objects.get(id=opts["batch_id"])
+        except QuoteBatch.DoesNotExist:
+            raise CommandError(f"QuoteBatch #{opts['batch_id']} does not exist")
+
+        try:
+            with open(opts["csv_path"], newline="", encoding="utf-8-sig") as f:
+                result = import_quote_lines(batch, f, chunk_size=opts["chunk_size"], dry_run=opts["dry_run"])
+        except (ValueError, FXRateNotFound) as e:
+            raise CommandError(str(e))
+
+        for message in result.errors:
+            self.stdout.write(self.style.WARNING(message))
+        if result.error_count > len(result.errors):
+            self.stdout.write(self.style.WARNING(f"... and {result.error_count - len(result.errors)} more error(s)"))
+
+        prefix = "Dry run: " if opts["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}created={result.created} skipped={result.error_count} (batch #{batch.id} {batch.name})"
+        ))
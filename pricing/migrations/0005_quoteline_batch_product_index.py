@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_stockmovement_ref_index'),
+        ('pricing', '0004_remove_quotebatch_transport_krw_per_kg_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quoteline',
+            index=models.Index(fields=['batch', 'product', 'created_at'], name='pricing_line_batch_product_idx'),
+        ),
+    ]
@@ -68,6 +68,12 @@ class QuoteLine(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # 제안가 조회: filter(batch_id, product_id).order_by("-created_at").first()
+            models.Index(fields=["batch", "product", "created_at"], name="pricing_line_batch_product_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         # 계산 결과가 비어있다면 자동 계산
         if self.final_price_php_per_unit is None:
@@ -0,0 +1,144 @@
+# pricing/services/line_import.py
+
+import csv
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from core.exports import chunked
+from inventory.models import Product
+from pricing.models import QuoteBatch, QuoteLine
+from pricing.services.quoting import PricingContext, compute_quote_lines
+
+
+REQUIRED_COLUMNS = ["sku_code", "qty_units", "supplier_cost_krw_per_unit", "billable_weight_kg_total"]
+OPTIONAL_COLUMNS = ["transport_mode", "other_cost_php_total", "manual_price_php_per_unit"]
+IMPORT_CHUNK_SIZE = 2000
+MAX_ERROR_MESSAGES = 200  # 이보다 많으면 개수만 센다
+
+TRANSPORT_MODES = set(QuoteLine.TransportMode.values)
+
+
+@dataclass
+class QuoteLineImportResult:
+    created: int = 0
+    error_count: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def add_error(self, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_ERROR_MESSAGES:
+            self.errors.append(message)
+
+
+def _decimal(r: dict, name: str, *, required: bool = False, positive: bool = False,
+             allow_negative: bool = False) -> Decimal | None:
+    """
+    숫자 컬럼 1개. 빈 칸: required 면 오류, 아니면 None. 천 단위 쉼표는 무시.
+    컬럼 자릿수(decimal_places / max_digits)를 넘는 값은 저장하면 잘리거나 실패하므로 오류로 돌려준다.
+    """
+    raw = (r.get(name) or "").strip().replace(",", "")
+    if not raw:
+        if required:
+            raise ValueError(f"{name} is required")
+        return None
+    try:
+        value = Decimal(raw)
+    except InvalidOperation:
+        raise ValueError(f"{name} is not a number: {raw!r}")
+    if not value.is_finite():
+        raise ValueError(f"{name} is not a number: {raw!r}")
+
+    f = QuoteLine._meta.get_field(name)
+    if -value.as_tuple().exponent > f.decimal_places:
+        raise ValueError(f"{name} has more than {f.decimal_places} decimal places: {raw!r}")
+    if abs(value) >= Decimal(10) ** (f.max_digits - f.decimal_places):
+        raise ValueError(f"{name} is too large: {raw!r}")
+    if positive and value <= 0:
+        raise ValueError(f"{name} must be > 0")
+    if value < 0 and not allow_negative:
+        raise ValueError(f"{name} must be >= 0")
+    return value
+
+
+def _parse_row(r: dict) -> dict:
+    """CSV 1행 → QuoteLine 입력 필드 dict (sku_code 포함, product 는 나중에 한 번에 찾는다)."""
+    sku = (r.get("sku_code") or "").strip()
+    if not sku:
+        raise ValueError("sku_code is required")
+
+    mode = (r.get("transport_mode") or "").strip().upper() or None
+    if mode is not None and mode not in TRANSPORT_MODES:
+        raise ValueError(f"transport_mode must be one of {', '.join(sorted(TRANSPORT_MODES))} or blank: {mode!r}")
+
+    return {
+        "sku_code": sku,
+        "qty_units": _decimal(r, "qty_units", required=True, positive=True),
+        "supplier_cost_krw_per_unit": _decimal(r, "supplier_cost_krw_per_unit", required=True),
+        "billable_weight_kg_total": _decimal(r, "billable_weight_kg_total", required=True),
+        "other_cost_php_total": _decimal(r, "other_cost_php_total", allow_negative=True) or Decimal("0"),  # 할인은 음수
+        "transport_mode": mode,
+        "manual_price_php_per_unit": _decimal(r, "manual_price_php_per_unit"),
+    }
+
+
+def _insert_chunk(batch: QuoteBatch, context: PricingContext, parsed: list, result: QuoteLineImportResult,
+                  errors: list, *, dry_run: bool) -> None:
+    """
+    chunk 1개: SKU 조회 1쿼리 (sku_code__in) → 가격 계산 (compute_quote_lines, 쿼리 없음) → bulk_create 1회.
+    없는 SKU 행은 건너뛰고 errors 에 (줄 번호, 메시지) 로 남긴다.
+    """
+    products = {
+        p.sku_code: p
+        for p in Product.objects.filter(sku_code__in={values["sku_code"] for _, values in parsed})
+    }
+
+    lines = []
+    for line_no, values in parsed:
+        sku = values.pop("sku_code")
+        product = products.get(sku)
+        if product is None:
+            errors.append((line_no, f"unknown sku_code {sku!r}"))
+            continue
+        lines.append(QuoteLine(batch=batch, product=product, **values))
+
+    compute_quote_lines(context, lines)
+    result.created += len(lines)
+    if not dry_run:
+        QuoteLine.objects.bulk_create(lines)
+
+
+def import_quote_lines(batch: QuoteBatch, lines, *, chunk_size: int = IMPORT_CHUNK_SIZE,
+                       dry_run: bool = False) -> QuoteLineImportResult:
+    """
+    견적 라인 CSV(lines: 텍스트 줄 iterable, 예: open(..., newline="") 파일)를 batch 에 추가한다 (주간 공급사 단가표 등).
+    - 필수 컬럼: REQUIRED_COLUMNS / 선택 컬럼: OPTIONAL_COLUMNS (transport_mode 빈 칸 = 상품 기본값)
+    - 형식 오류 행과 없는 SKU 행은 건너뛰고 errors 에 "line N: ..." 로 남긴다 (나머지 행은 추가됨)
+    - 배치 파라미터는 PricingContext 로 한 번만 읽고, chunk_size 행마다 SKU 조회 1쿼리 + bulk_create 1회
+    - dry_run=True: 검증과 계산만 하고 쓰지 않는다
+    헤더가 잘못되면 ValueError. 전체를 한 트랜잭션으로 실행한다.
+    """
+    reader = csv.DictReader(lines)
+    header = reader.fieldnames or []
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    result = QuoteLineImportResult()
+    context = PricingContext.for_batch(batch)
+
+    with transaction.atomic():
+        for chunk in chunked(enumerate(reader, start=2), chunk_size):
+            parsed, errors = [], []
+            for line_no, r in chunk:
+                try:
+                    parsed.append((line_no, _parse_row(r)))
+                except ValueError as e:
+                    errors.append((line_no, str(e)))
+            if parsed:
+                _insert_chunk(batch, context, parsed, result, errors, dry_run=dry_run)
+            for line_no, message in sorted(errors):
+                result.add_error(f"line {line_no}: {message}")
+
+    return result
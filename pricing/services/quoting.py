@@ -1,6 +1,56 @@
-from decimal import Decimal, ROUND_CEILING
-
-from pricing.models import QuoteLine
+from dataclasses import dataclass
+from decimal import ROUND_CEILING, ROUND_HALF_EVEN, Decimal, localcontext
+
+from django.db import transaction
+
+from core.bulk import insert_objs, update_fields_by_pk
+from fx.services import period_rate
+from inventory.models import Product
+from pricing.models import QuoteBatch, QuoteLine
+
+
+# compute_quote_line 이 채우는 필드 (recompute_batch 가 저장하는 필드)
+COMPUTED_FIELDS = [
+    "fx_rate_snapshot",
+    "supplier_pay_php_per_unit",
+    "transport_php_total",
+    "transport_php_per_unit",
+    "base_price_php_per_unit",
+    "final_price_php_per_unit",
+]
+
+# 계산 필드를 저장할 자릿수 (DB 컬럼 decimal_places, DecimalField 저장과 같은 ROUND_HALF_EVEN)
+_QUANT = {
+    name: Decimal(1).scaleb(-QuoteLine._meta.get_field(name).decimal_places)
+    for name in COMPUTED_FIELDS
+}
+# 계산 정밀도: 컬럼 최대 자릿수끼리 곱해도(원가×마크업×환율, 운임×무게×환율) 잘리지 않는 자릿수.
+# 곱은 정확하고 나눗셈은 필드마다 한 번뿐이라, 컬럼 자릿수로 반올림하면 정확한 값을 한 번 반올림한 것과 같다
+# (항마다 나눠 더하면 정확히 반(…5)인 값이 …4999 가 된 뒤 다시 반올림될 수 있음)
+CALC_PRECISION = 60
+
+# clone_batch 가 복사하는 배치 설정 (overrides 로 바꿀 수 있는 필드)
+BATCH_CLONE_FIELDS = [
+    "name",
+    "fx_period",
+    "company_margin_rate",
+    "supplier_markup_rate",
+    "rounding_unit_php",
+    "ocean_krw_per_kg",
+    "air_krw_per_kg",
+    "memo",
+]
+
+# clone_batch 가 복사하는 라인 입력 필드 (COMPUTED_FIELDS 는 새 설정으로 다시 계산)
+LINE_INPUT_FIELDS = [
+    "product",
+    "transport_mode",
+    "qty_units",
+    "supplier_cost_krw_per_unit",
+    "billable_weight_kg_total",
+    "other_cost_php_total",
+    "manual_price_php_per_unit",
+]
 
 
 def ceil_to_nearest(value: Decimal, unit: Decimal) -> Decimal:
@@ -14,65 +64,166 @@ def ceil_to_nearest(value: Decimal, unit: Decimal) -> Decimal:
     return q * unit
 
 
-def compute_quote_line(line: QuoteLine) -> None:
+def _dec(value) -> Decimal:
+    """DB에서 읽은 값은 이미 Decimal. 새로 만든 객체의 float/int/str 기본값만 변환한다."""
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+@dataclass(frozen=True)
+class PricingContext:
+    """
+    배치 1개의 가격 계산 파라미터를 한 번만 읽고 Decimal로 변환해 둔 것.
+    compute_quote_lines() 가 라인마다 batch/fx_period 를 다시 읽거나 변환하지 않도록.
+    """
+
+    fx: Decimal
+    supplier_markup_factor: Decimal  # 1 + supplier_markup_rate
+    margin_factor: Decimal           # 1 + company_margin_rate
+    krw_per_kg: dict                 # {"OCEAN": ..., "AIR": ...}
+    rounding_unit: Decimal
+
+    @classmethod
+    def for_batch(cls, batch: QuoteBatch) -> "PricingContext":
+        return cls(
+            fx=period_rate(batch.fx_period_id),
+            supplier_markup_factor=Decimal("1") + _dec(batch.supplier_markup_rate),
+            margin_factor=Decimal("1") + _dec(batch.company_margin_rate),
+            krw_per_kg={"OCEAN": _dec(batch.ocean_krw_per_kg), "AIR": _dec(batch.air_krw_per_kg)},
+            rounding_unit=_dec(batch.rounding_unit_php),
+        )
+
+
+def _default_modes(lines) -> dict:
+    """
+    transport_mode 가 비어 있는 라인의 상품 기본 운송수단 {product_id: mode}.
+    상품이 이미 붙어 있으면(select_related 등) 그대로, 아니면 빠진 상품만 1쿼리로.
+    """
+    modes, missing = {}, set()
+    for line in lines:
+        if line.transport_mode:
+            continue
+        if QuoteLine.product.is_cached(line):
+            modes[line.product_id] = line.product.default_transport_mode
+        else:
+            missing.add(line.product_id)
+    if missing:
+        modes.update(Product.objects.filter(id__in=missing).values_list("id", "default_transport_mode"))
+    return modes
+
+
+def compute_quote_lines(context: PricingContext, lines) -> None:
     """
     ✅ 의도한 계산식:
     (공급지불액 * (1+마진)) + 운송비 + 조정금액
     그리고 라운딩
-    """
 
-    if line.qty_units is None or line.qty_units <= 0:
-        raise ValueError("qty_units must be > 0")
+    lines 의 계산 필드(COMPUTED_FIELDS)를 메모리에서 채운다. 저장은 호출한 쪽에서.
+    값은 컬럼 자릿수로 반올림된 상태 (저장하고 다시 읽어도 같고, 라인 1개/배치 전체 어느 경로로 계산해도 같다).
+    라인 수와 관계없이 DB 조회는 (상품이 안 붙은 라인이 있을 때만) 상품 기본 운송수단 1쿼리.
+    """
+    lines = list(lines)
+    default_modes = _default_modes(lines)
+    fx = context.fx
+    q_sp, q_tt, q_tpu, q_base, q_final = (_QUANT[name] for name in COMPUTED_FIELDS[1:])
+
+    with localcontext() as ctx:
+        ctx.prec = CALC_PRECISION
+        ctx.rounding = ROUND_HALF_EVEN
+        for line in lines:
+            qty = line.qty_units
+            if qty is None or qty <= 0:
+                raise ValueError("qty_units must be > 0")
+            qty = _dec(qty)
+
+            # 1) 공급사 지불액 (KRW -> PHP) : 원가에 공급사 마크업 적용 후 환전
+            supplier_pay_php_per_unit = _dec(line.supplier_cost_krw_per_unit) * context.supplier_markup_factor * fx
+
+            # 2) 운송 모드: line.transport_mode 가 있으면 그걸, 없으면 상품 기본값
+            mode = line.transport_mode or default_modes.get(line.product_id) or "OCEAN"
+
+            # 3) 운송비 (KRW/kg → PHP)
+            rate_krw_per_kg = context.krw_per_kg["AIR" if mode == "AIR" else "OCEAN"]
+            transport_php_total = rate_krw_per_kg * _dec(line.billable_weight_kg_total) * fx
+
+            # ✅ 4) 핵심: 마진은 공급지불액에만 적용, 운송/조정금액(기타비용)은 뒤에 더함
+            #    라인 합계를 먼저 더하고 qty 로 한 번만 나눈다 (항마다 나누면 반올림 오차가 쌓임)
+            base_price_php_per_unit = (
+                supplier_pay_php_per_unit * context.margin_factor * qty
+                + transport_php_total
+                + _dec(line.other_cost_php_total or 0)
+            ) / qty
+
+            # 스냅샷 및 계산결과
+            line.fx_rate_snapshot = fx
+            line.supplier_pay_php_per_unit = supplier_pay_php_per_unit.quantize(q_sp)
+            line.transport_php_total = transport_php_total.quantize(q_tt)
+            line.transport_php_per_unit = (transport_php_total / qty).quantize(q_tpu)
+            line.base_price_php_per_unit = base_price_php_per_unit.quantize(q_base)  # ✅ 올림 전(예: 3621.94)
+
+            # 5) 라운딩은 최종가에만 (반올림 전 값에서 올림) / manual(조정가)가 있으면 최종가 override
+            if line.manual_price_php_per_unit is not None:
+                line.final_price_php_per_unit = line.manual_price_php_per_unit
+            else:
+                line.final_price_php_per_unit = ceil_to_nearest(base_price_php_per_unit, context.rounding_unit).quantize(q_final)
 
-    batch = line.batch
-    product = line.product
 
-    fx = batch.fx_period.krw_to_php
-    fx = Decimal(str(fx))
+def compute_quote_line(line: QuoteLine) -> None:
+    """라인 1개 계산 (화면에서 라인 추가, QuoteLine.save). 여러 라인이면 compute_quote_lines 를 쓴다."""
+    compute_quote_lines(PricingContext.for_batch(line.batch), [line])
 
-    # 1) 공급사 지불액 (KRW -> PHP) : 원가에 공급사 마크업 적용 후 환전
-    supplier_pay_krw_per_unit = Decimal(str(line.supplier_cost_krw_per_unit)) * (
-        Decimal("1") + Decimal(str(batch.supplier_markup_rate))
-    )
-    supplier_pay_php_per_unit = supplier_pay_krw_per_unit * fx
-
-    # 2) 운송 모드 결정: line.transport_mode가 있으면 그걸 쓰고,
-    #    없으면 product.default_transport_mode 사용
-    mode = getattr(line, "transport_mode", None)
-    if not mode:
-        mode = getattr(product, "default_transport_mode", None) or "OCEAN"
-
-    # 3) 운송비 (KRW/kg) 선택
-    if mode == "AIR":
-        rate_krw_per_kg = Decimal(str(batch.air_krw_per_kg))
-    else:
-        rate_krw_per_kg = Decimal(str(batch.ocean_krw_per_kg))
-
-    transport_krw_total = rate_krw_per_kg * Decimal(str(line.billable_weight_kg_total))
-    transport_php_total = transport_krw_total * fx
-    transport_php_per_unit = transport_php_total / Decimal(str(line.qty_units))
-
-    # 4) 조정금액(기타비용) per unit
-    other_php_per_unit = (Decimal(str(line.other_cost_php_total or 0))) / Decimal(str(line.qty_units))
-
-    # ✅ 5) 핵심: 마진은 공급지불액에만 적용, 운송/조정금액은 뒤에 더함
-    base_price_php_per_unit = (
-        supplier_pay_php_per_unit * (Decimal("1") + Decimal(str(batch.company_margin_rate)))
-        + transport_php_per_unit
-        + other_php_per_unit
-    )
 
-    # 6) 라운딩은 최종가에만 적용
-    rounded_final = ceil_to_nearest(base_price_php_per_unit, Decimal(str(batch.rounding_unit_php)))
+@transaction.atomic
+def recompute_batch(batch: QuoteBatch) -> int:
+    """
+    배치 설정(마진/마크업/운송비/라운딩/환율)이 바뀐 뒤 모든 라인을 다시 계산한다.
+    - 라인 + 상품 조회 1쿼리 (select_related), 배치 파라미터는 PricingContext 로 한 번만 읽음
+    - 계산은 메모리, 저장은 pk 기준 UPDATE executemany (core.bulk, bulk_update 의 CASE WHEN 식 생성 비용 없음)
+    조정가(manual)가 있는 라인은 최종가가 조정가로 유지되고 제안가만 새로 계산된다.
+    반환: 다시 계산한 라인 수
+    """
+    lines = list(QuoteLine.objects.filter(batch=batch).select_related("product"))
+    compute_quote_lines(PricingContext.for_batch(batch), lines)
+    update_fields_by_pk(QuoteLine, lines, COMPUTED_FIELDS)
+    return len(lines)
 
-    # 스냅샷 및 계산결과 저장
-    line.fx_rate_snapshot = fx
-    line.supplier_pay_php_per_unit = supplier_pay_php_per_unit
-    line.transport_php_total = transport_php_total
-    line.transport_php_per_unit = transport_php_per_unit
-    line.base_price_php_per_unit = base_price_php_per_unit  # ✅ 올림 전(예: 3621.94)
-    line.final_price_php_per_unit = rounded_final           # ✅ 올림 후(예: 3630)
 
-    # manual(조정가)가 있으면 최종가 override
-    if line.manual_price_php_per_unit is not None:
-        line.final_price_php_per_unit = line.manual_price_php_per_unit
+@transaction.atomic
+def clone_batch(source: QuoteBatch, **overrides) -> QuoteBatch:
+    """
+    source 배치를 복사해 새 배치를 만든다 (매주: 지난주 배치 + 새 환율 기간 + 운임/마진 조정).
+    - 설정: source 값에 overrides(BATCH_CLONE_FIELDS, FK 는 fx_period 또는 fx_period_id)를 덮어씀.
+      name 을 안 주면 "<원래 이름> (copy)"
+    - 라인: 입력 필드(LINE_INPUT_FIELDS)만 복사하고, 새 설정의 PricingContext 로 한 번에 다시 계산
+    라인 수와 관계없이 쿼리 수가 일정하다: 배치 INSERT 1 + 라인·상품 조회 1 + 라인 INSERT executemany 1 (core.bulk)
+    """
+    attnames = {name: QuoteBatch._meta.get_field(name).attname for name in BATCH_CLONE_FIELDS}
+    unknown = set(overrides) - set(attnames) - set(attnames.values())
+    if unknown:
+        raise ValueError(f"Cannot override: {', '.join(sorted(unknown))}")
+
+    values = {}
+    for name, attname in attnames.items():
+        if name in overrides:
+            values[name] = overrides[name]
+        elif attname in overrides:
+            values[attname] = overrides[attname]
+        else:
+            values[attname] = getattr(source, attname)
+    if "name" not in overrides:
+        values["name"] = f"{source.name} (copy)"
+    batch = QuoteBatch.objects.create(**values)
+
+    sources = (
+        QuoteLine.objects
+        .filter(batch=source)
+        .select_related("product")
+        .only(*LINE_INPUT_FIELDS, "product__default_transport_mode")
+        .order_by("id")
+    )
+    lines = [
+        QuoteLine(batch=batch, **{name: getattr(ln, name) for name in LINE_INPUT_FIELDS})
+        for ln in sources
+    ]
+    compute_quote_lines(PricingContext.for_batch(batch), lines)
+    insert_objs(QuoteLine, lines, batch_size=max(len(lines), 1))  # 라인은 이미 메모리에 다 있으므로 executemany 1회
+    return batch
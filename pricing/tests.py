@@ -1,3 +1,342 @@
+import io
+import math
+import random
+from datetime import date
+from decimal import Decimal
+from fractions import Fraction
+
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.urls import reverse
+
+from fx.models import FXRatePeriod
+from fx.services import reset_index
+from inventory.models import Product
+from pricing.models import QuoteBatch, QuoteLine
+from pricing.services.line_import import import_quote_lines
+from pricing.services.quoting import (
+    COMPUTED_FIELDS,
+    PricingContext,
+    clone_batch,
+    compute_quote_line,
+    compute_quote_lines,
+    recompute_batch,
+)
+
+
+class RecomputeBatchTests(TestCase):
+    """배치 설정 변경 후 recompute_batch: 모든 라인이 새 설정으로 다시 계산되고, 조정가 라인은 최종가 유지."""
+
+    def setUp(self):
+        reset_index()
+        self.addCleanup(reset_index)
+        fx = FXRatePeriod.objects.create(start_date=date(2026, 1, 1), krw_to_php=Decimal("0.043000"))
+        self.batch = QuoteBatch.objects.create(name="Recompute", fx_period=fx)
+        products = [
+            Product.objects.create(
+                sku_code=f"RQ-{mode}", name_en=mode, base_unit="pack",
+                net_weight_kg_per_unit=Decimal("1.0000"), default_transport_mode=mode,
+            )
+            for mode in ("OCEAN", "AIR")
+        ]
+        for i, product in enumerate(products * 2):
+            QuoteLine.objects.create(
+                batch=self.batch, product=product, qty_units=Decimal(i + 1),
+                supplier_cost_krw_per_unit=Decimal("12000"), billable_weight_kg_total=Decimal("2.5"),
+                manual_price_php_per_unit=Decimal("999.00") if i == 0 else None,
+            )
+
+    def test_lines_follow_new_settings(self):
+        before = dict(QuoteLine.objects.values_list("id", "base_price_php_per_unit"))
+
+        self.batch.company_margin_rate = Decimal("0.3500")
+        self.batch.air_krw_per_kg = Decimal("20000")
+        self.batch.save()
+        with self.assertNumQueries(4):  # savepoint 2 + 라인·상품 조회 1 + UPDATE executemany 1
+            self.assertEqual(recompute_batch(self.batch), 4)
+
+        for line in QuoteLine.objects.select_related("product", "batch"):
+            self.assertGreater(line.base_price_php_per_unit, before[line.id])
+            expected = QuoteLine.objects.get(pk=line.pk)
+            compute_quote_line(expected)
+            for field in COMPUTED_FIELDS:
+                self.assertEqual(getattr(line, field), getattr(expected, field).quantize(getattr(line, field)), field)
+            if line.manual_price_php_per_unit is not None:
+                self.assertEqual(line.final_price_php_per_unit, Decimal("999.00"))
+
+    def test_bulk_kernel_matches_single_line(self):
+        self.batch.supplier_markup_rate = Decimal("0.0700")
+        self.batch.save()
+        single = list(QuoteLine.objects.order_by("id"))
+        for line in single:
+            compute_quote_line(line)
+
+        lines = list(QuoteLine.objects.order_by("id"))  # 상품 prefetch 없음
+        context = PricingContext.for_batch(self.batch)
+        with self.assertNumQueries(1):  # 상품 기본 운송수단 1쿼리 (라인 수와 무관)
+            compute_quote_lines(context, lines)
+        for a, b in zip(single, lines):
+            for field in COMPUTED_FIELDS:
+                self.assertEqual(getattr(a, field), getattr(b, field), field)
+
+
+def _round_half_even(value: Fraction, places: int) -> Decimal:
+    scaled = value * 10 ** places
+    n = math.floor(scaled)
+    if scaled - n > Fraction(1, 2) or (scaled - n == Fraction(1, 2) and n % 2):
+        n += 1
+    return Decimal(n).scaleb(-places)
+
+
+def _exact_prices(context: PricingContext, line: QuoteLine) -> dict:
+    """기대값: 같은 식을 분수(Fraction)로 정확히 계산하고 컬럼 자릿수로 한 번만 ROUND_HALF_EVEN (최종가는 올림)."""
+    places = {name: QuoteLine._meta.get_field(name).decimal_places for name in COMPUTED_FIELDS}
+    qty = Fraction(line.qty_units)
+    mode = line.transport_mode or line.product.default_transport_mode
+    supplier_pay = Fraction(line.supplier_cost_krw_per_unit) * Fraction(context.supplier_markup_factor) * Fraction(context.fx)
+    transport = Fraction(context.krw_per_kg[mode]) * Fraction(line.billable_weight_kg_total) * Fraction(context.fx)
+    base = supplier_pay * Fraction(context.margin_factor) + (transport + Fraction(line.other_cost_php_total)) / qty
+    unit = Fraction(context.rounding_unit)
+    if line.manual_price_php_per_unit is not None:
+        final = Fraction(line.manual_price_php_per_unit)
+    elif unit > 0:
+        final = math.ceil(base / unit) * unit
+    else:
+        final = base
+    return {
+        "supplier_pay_php_per_unit": _round_half_even(supplier_pay, places["supplier_pay_php_per_unit"]),
+        "transport_php_total": _round_half_even(transport, places["transport_php_total"]),
+        "transport_php_per_unit": _round_half_even(transport / qty, places["transport_php_per_unit"]),
+        "base_price_php_per_unit": _round_half_even(base, places["base_price_php_per_unit"]),
+        "final_price_php_per_unit": _round_half_even(final, places["final_price_php_per_unit"]),
+    }
+
+
+class ExactRoundingTests(TestCase):
+    """
+    compute_quote_lines 결과 == 정확한 값(분수)을 컬럼 자릿수로 한 번만 반올림한 값.
+    seed 고정 무작위 입력 (작은 값/정확히 나눠떨어지는 값/큰 값 섞어서).
+    """
+
+    SEED = 20261018
+
+    def _random_case(self, rng):
+        def fixed(lo, hi, places):
+            return Decimal(rng.randint(lo, hi)).scaleb(-places)
+
+        context = PricingContext(
+            fx=fixed(1, 2_000_000, 6),
+            supplier_markup_factor=1 + fixed(-5_000, 30_000, 4),
+            margin_factor=1 + fixed(-5_000, 30_000, 4),
+            krw_per_kg={"OCEAN": fixed(0, 10 ** 8, 2), "AIR": fixed(0, 10 ** 9, 2)},
+            rounding_unit=rng.choice([Decimal("0"), Decimal("0.01"), Decimal("10.00"), fixed(1, 10_000, 2)]),
+        )
+        product = Product(id=1, default_transport_mode=rng.choice(["OCEAN", "AIR"]))
+        lines = [
+            QuoteLine(
+                product=product,
+                transport_mode=rng.choice([None, "OCEAN", "AIR"]),
+                qty_units=rng.choice([fixed(1, 10 ** rng.randint(1, 12), 4), Decimal(rng.choice([1, 2, 4, 8, 25, "0.5"]))]),
+                supplier_cost_krw_per_unit=rng.choice([fixed(0, 10 ** rng.randint(1, 13), 2), Decimal(rng.randint(0, 50))]),
+                billable_weight_kg_total=fixed(0, 10 ** rng.randint(1, 13), 4),
+                other_cost_php_total=fixed(-10 ** 6, 10 ** rng.randint(1, 12), 2),
+                manual_price_php_per_unit=fixed(0, 10 ** 8, 2) if rng.random() < 0.05 else None,
+            )
+            for _ in range(100)
+        ]
+        return context, lines
+
+    def test_matches_exact_rounding(self):
+        rng = random.Random(self.SEED)
+        for _ in range(30):
+            context, lines = self._random_case(rng)
+            compute_quote_lines(context, lines)
+            for line in lines:
+                expected = _exact_prices(context, line)
+                for name, value in expected.items():
+                    self.assertEqual(getattr(line, name), value, name)
+
+    def test_single_line_and_bulk_paths_store_the_same_exact_half(self):
+        # 정확한 base = 3083.52755 → ROUND_HALF_EVEN 3083.5276.
+        # (28자리로 항마다 나누면 3083.527549999… 가 되어 3083.5275 로 저장되던 값)
+        reset_index()
+        self.addCleanup(reset_index)
+        fx = FXRatePeriod.objects.create(start_date=date(2026, 1, 1), krw_to_php=Decimal("0.043125"))
+        batch = QuoteBatch.objects.create(
+            name="Half", fx_period=fx, company_margin_rate=Decimal("0.2000"), supplier_markup_rate=Decimal("0.0500"),
+            rounding_unit_php=Decimal("10.00"), ocean_krw_per_kg=Decimal("2200.00"), air_krw_per_kg=Decimal("14000.00"),
+        )
+        product = Product.objects.create(
+            sku_code="HALF-1", name_en="half", base_unit="pack",
+            net_weight_kg_per_unit=Decimal("1.0000"), default_transport_mode="OCEAN",
+        )
+        single = QuoteLine.objects.create(  # save() → compute_quote_line (화면에서 라인 1개 추가)
+            batch=batch, product=product, qty_units=Decimal("236"), supplier_cost_krw_per_unit=Decimal("54332"),
+            billable_weight_kg_total=Decimal("320.4"), other_cost_php_total=Decimal("580"),
+        )
+        single.refresh_from_db()
+        self.assertEqual(single.base_price_php_per_unit, Decimal("3083.5276"))
+        self.assertEqual(single.final_price_php_per_unit, Decimal("3090"))
+
+        import_quote_lines(batch, io.StringIO(
+            "sku_code,qty_units,supplier_cost_krw_per_unit,billable_weight_kg_total,other_cost_php_total\n"
+            "HALF-1,236,54332,320.4,580\n"
+        ))
+        before = list(QuoteLine.objects.filter(batch=batch).order_by("id").values_list(*COMPUTED_FIELDS))
+        recompute_batch(batch)  # 설정이 그대로면 다시 계산해도 저장값이 바뀌지 않는다
+        self.assertEqual(list(QuoteLine.objects.filter(batch=batch).order_by("id").values_list(*COMPUTED_FIELDS)), before)
+
+        clone = clone_batch(batch)
+        self.assertEqual(list(clone.lines.order_by("id").values_list(*COMPUTED_FIELDS)), before)
+
+
+class QuoteLineImportTests(TestCase):
+    """견적 라인 CSV: 정상 행은 한 번에 추가, 오류 행은 줄 번호와 함께 건너뜀."""
+
+    CSV = (
+        "sku_code,qty_units,supplier_cost_krw_per_unit,billable_weight_kg_total,transport_mode,other_cost_php_total,manual_price_php_per_unit\n"
+        "QI-1,10,12000,2.5,,,\n"
+        "QI-2,4,\"1,500\",1.2,air,-20,\n"
+        "QI-1,3,9000,1,OCEAN,0,450\n"
+        "NOPE,1,1000,1,,,\n"
+        "QI-2,0,1000,1,,,\n"
+        "QI-2,1,abc,1,,,\n"
+        "QI-2,1,1000,1,TRUCK,,\n"
+        "QI-2,1,1000.123,1,,,\n"
+    )
+
+    def setUp(self):
+        reset_index()
+        self.addCleanup(reset_index)
+        fx = FXRatePeriod.objects.create(start_date=date(2026, 1, 1), krw_to_php=Decimal("0.043000"))
+        self.batch = QuoteBatch.objects.create(name="Import", fx_period=fx)
+        for sku in ("QI-1", "QI-2"):
+            Product.objects.create(sku_code=sku, name_en=sku, base_unit="pack", net_weight_kg_per_unit=Decimal("1"))
+
+    def test_valid_rows_inserted_and_errors_reported(self):
+        with self.assertNumQueries(5):  # savepoint 2 + FX 인덱스 1 + SKU 조회 1 + bulk_create 1
+            result = import_quote_lines(self.batch, io.StringIO(self.CSV))
+
+        self.assertEqual(result.created, 3)
+        self.assertEqual(result.error_count, 5)
+        self.assertEqual([m.split(":")[0] for m in result.errors], ["line 5", "line 6", "line 7", "line 8", "line 9"])
+        self.assertIn("unknown sku_code 'NOPE'", result.errors[0])
+        self.assertIn("decimal places", result.errors[4])
+
+        lines = list(QuoteLine.objects.filter(batch=self.batch).select_related("product").order_by("id"))
+        self.assertEqual([(ln.product.sku_code, ln.transport_mode) for ln in lines],
+                         [("QI-1", None), ("QI-2", "AIR"), ("QI-1", "OCEAN")])
+        self.assertEqual(lines[1].supplier_cost_krw_per_unit, Decimal("1500"))
+        self.assertEqual(lines[2].final_price_php_per_unit, Decimal("450"))
+        for line in lines:
+            expected = QuoteLine.objects.get(pk=line.pk)
+            compute_quote_line(expected)
+            self.assertEqual(line.base_price_php_per_unit, expected.base_price_php_per_unit.quantize(Decimal("0.0001")))
+
+    def test_dry_run_and_upload_view(self):
+        result = import_quote_lines(self.batch, io.StringIO(self.CSV), dry_run=True)
+        self.assertEqual((result.created, result.error_count), (3, 5))
+        self.assertFalse(QuoteLine.objects.exists())
+
+        with self.assertRaisesMessage(ValueError, "Missing columns: qty_units"):
+            import_quote_lines(self.batch, io.StringIO("sku_code,supplier_cost_krw_per_unit,billable_weight_kg_total\n"))
+
+        response = self.client.post(
+            reverse("pricing:quote_lines_import", args=[self.batch.id]),
+            {"csv_file": SimpleUploadedFile("lines.csv", self.CSV.encode("utf-8-sig"), content_type="text/csv")},
+        )
+        self.assertContains(response, "3 line(s) created, 5 skipped")
+        self.assertContains(response, "line 5: unknown sku_code")
+        self.assertEqual(QuoteLine.objects.filter(batch=self.batch).count(), 3)
+
+
+class CloneBatchTests(TestCase):
+    """배치 복제: 라인 입력만 복사하고 새 환율 기간/설정으로 한 번에 재계산, 쿼리 수는 라인 수와 무관."""
+
+    def setUp(self):
+        reset_index()
+        self.addCleanup(reset_index)
+        self.old_fx = FXRatePeriod.objects.create(
+            start_date=date(2026, 1, 1), end_date=date(2026, 1, 31), krw_to_php=Decimal("0.043000"),
+        )
+        self.new_fx = FXRatePeriod.objects.create(start_date=date(2026, 2, 1), krw_to_php=Decimal("0.045000"))
+        self.source = QuoteBatch.objects.create(name="Week 5", fx_period=self.old_fx, memo="weekly")
+        self.products = [
+            Product.objects.create(
+                sku_code=f"CL-{mode}", name_en=mode, base_unit="pack",
+                net_weight_kg_per_unit=Decimal("1.0000"), default_transport_mode=mode,
+            )
+            for mode in ("OCEAN", "AIR")
+        ]
+
+    def _add_lines(self, count):
+        QuoteLine.objects.bulk_create([
+            QuoteLine(
+                batch=self.source, product=self.products[i % 2], qty_units=Decimal(i + 1),
+                supplier_cost_krw_per_unit=Decimal("12000"), billable_weight_kg_total=Decimal("2.5"),
+                other_cost_php_total=Decimal("-5") if i == 1 else Decimal("0"),
+                manual_price_php_per_unit=Decimal("999.00") if i == 0 else None,
+            )
+            for i in range(count)
+        ])
+        recompute_batch(self.source)
+
+    def test_lines_copied_and_repriced(self):
+        self._add_lines(4)
+        clone = clone_batch(self.source, fx_period=self.new_fx, air_krw_per_kg=Decimal("20000"))
+
+        self.assertEqual(clone.name, "Week 5 (copy)")
+        self.assertEqual((clone.fx_period_id, clone.memo), (self.new_fx.id, "weekly"))
+        self.assertEqual(clone.company_margin_rate, self.source.company_margin_rate)
+        self.assertEqual(self.source.lines.count(), 4)  # 원본은 그대로
+
+        old = list(self.source.lines.order_by("id"))
+        new = list(clone.lines.select_related("product", "batch").order_by("id"))
+        self.assertEqual(len(new), 4)
+        for before, line in zip(old, new):
+            for name in ("product_id", "transport_mode", "qty_units", "supplier_cost_krw_per_unit",
+                         "billable_weight_kg_total", "other_cost_php_total", "manual_price_php_per_unit"):
+                self.assertEqual(getattr(line, name), getattr(before, name))
+            self.assertGreater(line.base_price_php_per_unit, before.base_price_php_per_unit)
+            expected = QuoteLine.objects.select_related("product", "batch").get(pk=line.pk)
+            compute_quote_line(expected)
+            for name in COMPUTED_FIELDS:
+                field = QuoteLine._meta.get_field(name)
+                self.assertEqual(getattr(line, name), getattr(expected, name).quantize(Decimal(1).scaleb(-field.decimal_places)))
+        self.assertEqual(new[0].final_price_php_per_unit, Decimal("999.00"))
+
+        with self.assertRaisesMessage(ValueError, "Cannot override: lines"):
+            clone_batch(self.source, lines=[])
+
+    def test_query_count_is_constant(self):
+        self._add_lines(2)
+        # savepoint 2 + 배치 INSERT 1 + 라인·상품 조회 1 + 라인 INSERT executemany 1 (FX 인덱스는 캐시됨)
+        with self.assertNumQueries(5):
+            clone_batch(self.source, fx_period=self.new_fx)
+        self._add_lines(2500)
+        with self.assertNumQueries(5):
+            clone = clone_batch(self.source, fx_period=self.new_fx)
+        self.assertEqual(clone.lines.count(), 2502)
+
+    def test_clone_view(self):
+        self._add_lines(3)
+        url = reverse("pricing:quote_batch_clone", args=[self.source.id])
+        response = self.client.get(url)
+        self.assertContains(response, "Week 5 (copy)")
+        self.assertContains(response, "3 line(s)")
+
+        form = {
+            "name": "Week 6", "fx_period_id": self.new_fx.id, "company_margin_rate": "0.25",
+            "supplier_markup_rate": "0.05", "ocean_krw_per_kg": "2200", "air_krw_per_kg": "abc",
+            "rounding_unit_php": "10",
+        }
+        response = self.client.post(url, form)
+        self.assertContains(response, "Check the FX period and numeric settings.")
+        self.assertEqual(QuoteBatch.objects.count(), 1)
 
-# Create your tests here.
+        form["air_krw_per_kg"] = "15000"
+        response = self.client.post(url, form)
+        clone = QuoteBatch.objects.get(name="Week 6")
+        self.assertRedirects(response, reverse("pricing:quote_batch_detail", args=[clone.id]))
+        self.assertEqual((clone.fx_period_id, clone.company_margin_rate), (self.new_fx.id, Decimal("0.25")))
+        self.assertEqual(clone.lines.count(), 3)
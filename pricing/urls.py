@@ -10,5 +10,7 @@ urlpatterns = [
     # 기존: batch detail
     path("quote/<int:batch_id>/", views.quote_batch_detail, name="quote_batch_detail"),
     path("quote/<int:batch_id>/export.csv", views.quote_batch_export_csv, name="quote_batch_export_csv"),
+    path("quote/<int:batch_id>/import/", views.quote_lines_import, name="quote_lines_import"),
+    path("quote/<int:batch_id>/clone/", views.quote_batch_clone, name="quote_batch_clone"),
     path("quote/<int:batch_id>/line/<int:line_id>/delete/", views.quote_line_delete, name="quote_line_delete"),
 ]
@@ -1,12 +1,17 @@
 # pricing/views.py
 
-from decimal import Decimal
+import io
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.http import require_http_methods, require_POST
 
+from fx.models import FXRatePeriod
+from fx.services import FXRateNotFound
 from pricing.models import QuoteBatch, QuoteLine
 from pricing.exports.quote_csv import export_quote_batch_csv
-from pricing.services.quoting import compute_quote_line
+from pricing.services.line_import import OPTIONAL_COLUMNS, REQUIRED_COLUMNS, import_quote_lines
+from pricing.services.quoting import clone_batch, compute_quote_line, recompute_batch
 from inventory.models import Product
 
 
@@ -24,7 +29,10 @@ def quote_batch_detail(request, batch_id: int):
             batch.ocean_krw_per_kg = Decimal(request.POST["ocean_krw_per_kg"])
             batch.air_krw_per_kg = Decimal(request.POST["air_krw_per_kg"])
             batch.rounding_unit_php = Decimal(request.POST["rounding_unit_php"])
-            batch.save()
+            # 설정만 바꾸면 기존 라인 가격이 옛 설정으로 남으므로 같은 트랜잭션에서 전부 다시 계산
+            with transaction.atomic():
+                batch.save()
+                recompute_batch(batch)
             return redirect("pricing:quote_batch_detail", batch_id=batch.id)
 
         # 2) QuoteLine 생성
@@ -84,6 +92,8 @@ def quote_batch_detail(request, batch_id: int):
         "ko": {
             "language": "Language",
             "download_csv": "CSV 다운로드",
+            "import_csv": "CSV로 라인 추가",
+            "clone_batch": "배치 복제 (새 환율 기간)",
             "batch_settings": "배치 설정",
             "company_margin_rate": "회사 마진율 (예: 0.20)",
             "supplier_markup_rate": "공급사 마크업율 (예: 0.05)",
@@ -107,6 +117,8 @@ def quote_batch_detail(request, batch_id: int):
         "en": {
             "language": "Language",
             "download_csv": "Download CSV",
+            "import_csv": "Import lines from CSV",
+            "clone_batch": "Clone batch (new FX period)",
             "batch_settings": "Batch Settings",
             "company_margin_rate": "Company margin rate (e.g. 0.20)",
             "supplier_markup_rate": "Supplier markup rate (e.g. 0.05)",
@@ -139,6 +151,95 @@ def quote_batch_detail(request, batch_id: int):
     })
 
 
+@require_http_methods(["GET", "POST"])
+def quote_lines_import(request, batch_id: int):
+    """
+    견적 라인 CSV 업로드 (공급사 단가표 1,000+ SKU 를 한 번에).
+    오류 행은 건너뛰고 줄 번호별 오류 목록을 보여준다 (나머지 행은 추가됨).
+    """
+    batch = get_object_or_404(QuoteBatch, id=batch_id)
+    result, error = None, ""
+    dry_run = request.POST.get("dry_run") == "on"
+
+    if request.method == "POST":
+        upload = request.FILES.get("csv_file")
+        if upload is None:
+            error = "Choose a CSV file."
+        else:
+            try:
+                result = import_quote_lines(
+                    batch,
+                    io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline=""),
+                    dry_run=dry_run,
+                )
+            except (ValueError, UnicodeDecodeError, FXRateNotFound) as e:
+                error = f"Import failed: {e}"
+
+    return render(request, "pricing/quote_line_import.html", {
+        "batch": batch,
+        "result": result,
+        "more_errors": (result.error_count - len(result.errors)) if result else 0,
+        "dry_run": dry_run,
+        "error": error,
+        "required_columns": REQUIRED_COLUMNS,
+        "optional_columns": OPTIONAL_COLUMNS,
+    })
+
+
+CLONE_DECIMAL_FIELDS = [
+    "company_margin_rate",
+    "supplier_markup_rate",
+    "ocean_krw_per_kg",
+    "air_krw_per_kg",
+    "rounding_unit_php",
+]
+
+
+@require_http_methods(["GET", "POST"])
+def quote_batch_clone(request, batch_id: int):
+    """
+    배치 복제: 지난 배치의 라인을 그대로 가져오고 환율 기간/설정만 바꿔서 새 배치로 (clone_batch).
+    라인 가격은 새 설정으로 한 번에 다시 계산된다.
+    """
+    source = get_object_or_404(QuoteBatch, id=batch_id)
+    periods = FXRatePeriod.objects.order_by("-start_date", "-id")
+    values = {
+        "name": f"{source.name} (copy)",
+        "fx_period_id": periods.values_list("id", flat=True).first() or source.fx_period_id,
+        **{name: getattr(source, name) for name in CLONE_DECIMAL_FIELDS},
+    }
+    error = ""
+
+    if request.method == "POST":
+        values["name"] = request.POST.get("name", "").strip()
+        values.update({name: request.POST.get(name, "").strip() for name in CLONE_DECIMAL_FIELDS})
+        try:
+            values["fx_period_id"] = int(request.POST.get("fx_period_id", ""))
+            overrides = {name: Decimal(values[name]) for name in CLONE_DECIMAL_FIELDS}
+        except (ValueError, InvalidOperation):
+            error = "Check the FX period and numeric settings."
+        else:
+            if not values["name"]:
+                error = "Name is required."
+            elif not periods.filter(id=values["fx_period_id"]).exists():
+                error = "Unknown FX period."
+            else:
+                try:
+                    batch = clone_batch(source, name=values["name"], fx_period_id=values["fx_period_id"], **overrides)
+                except FXRateNotFound as e:
+                    error = str(e)
+                else:
+                    return redirect("pricing:quote_batch_detail", batch_id=batch.id)
+
+    return render(request, "pricing/quote_batch_clone.html", {
+        "source": source,
+        "line_count": source.lines.count(),
+        "periods": periods,
+        "values": values,
+        "error": error,
+    })
+
+
 def quote_batch_export_csv(request, batch_id: int):
     return export_quote_batch_csv(batch_id)
 
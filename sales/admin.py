@@ -3,7 +3,7 @@
 from django.contrib import admin, messages
 from django.db import transaction
 
-from sales.models import SalesInvoice, SalesInvoiceLine
+from sales.models import LotAllocation, SalesInvoice, SalesInvoiceLine
 from sales.services.invoicing import issue_invoice, cancel_invoice  # ✅ cancel_invoice 추가
 
 
@@ -65,3 +65,18 @@ class SalesInvoiceAdmin(admin.ModelAdmin):
 class SalesInvoiceLineAdmin(admin.ModelAdmin):
     list_display = ("invoice", "product", "qty_units", "suggested_unit_price_php", "manual_unit_price_php", "final_unit_price_php", "created_at")
     search_fields = ("invoice__invoice_no", "product__sku_code", "product__name_en", "product__name_ko")
+
+
+@admin.register(LotAllocation)
+class LotAllocationAdmin(admin.ModelAdmin):
+    """ISSUE/CANCEL 때 서비스가 만들고 지우는 기록이므로 읽기 전용."""
+    list_display = ("invoice_line", "lot", "qty_units", "unit_cost_php", "created_at")
+    list_select_related = ("invoice_line__invoice", "invoice_line__product", "lot__product")
+    search_fields = ("invoice_line__invoice__invoice_no", "lot__product__sku_code")
+    raw_id_fields = ("invoice_line", "lot")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partners', '0001_initial'),
+        ('pricing', '0005_quoteline_batch_product_index'),
+        ('sales', '0003_salesinvoice_sales_channel'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='salesinvoice',
+            index=models.Index(fields=['status', 'issue_date'], name='sales_inv_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesinvoice',
+            index=models.Index(fields=['status', 'customer', 'issue_date'], name='sales_inv_status_cust_date_idx'),
+        ),
+    ]
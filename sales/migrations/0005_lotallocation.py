@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_inventorylot_open_fifo_index'),
+        ('sales', '0004_salesinvoice_report_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LotAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('qty_units', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('unit_cost_php', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('invoice_line', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lot_allocations', to='sales.salesinvoiceline')),
+                ('lot', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='allocations', to='inventory.inventorylot')),
+            ],
+        ),
+    ]
@@ -32,6 +32,13 @@ class SalesInvoice(models.Model):
     memo = models.TextField(blank=True, default="")
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            # 리포트: ISSUED + 기간 / ISSUED + 고객 + 기간
+            models.Index(fields=["status", "issue_date"], name="sales_inv_status_date_idx"),
+            models.Index(fields=["status", "customer", "issue_date"], name="sales_inv_status_cust_date_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.invoice_no} ({self.customer})"
 
@@ -105,3 +112,20 @@ class SalesInvoiceLine(models.Model):
     def __str__(self) -> str:
         return f"{self.invoice.invoice_no} - {self.product.sku_code}"
 
+
+
+class LotAllocation(models.Model):
+    """
+    인보이스 라인이 어느 입고 로트에서 얼마나 나갔는지 (ISSUE 시 FIFO로 생성, CANCEL 시 삭제).
+    - 로트별 매출원가 / "로트 X를 받은 고객" 추적용
+    """
+    invoice_line = models.ForeignKey(SalesInvoiceLine, on_delete=models.CASCADE, related_name="lot_allocations")
+    lot = models.ForeignKey("inventory.InventoryLot", on_delete=models.PROTECT, related_name="allocations")
+
+    qty_units = models.DecimalField(max_digits=14, decimal_places=4)
+    unit_cost_php = models.DecimalField(max_digits=14, decimal_places=4)
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"Allocation(line={self.invoice_line_id}, lot={self.lot_id}) qty={self.qty_units}"
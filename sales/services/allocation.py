@@ -0,0 +1,131 @@
+# sales/services/allocation.py
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import F, Sum
+
+from inventory.models import InventoryLot
+from sales.models import LotAllocation
+
+
+FIFO = "FIFO"  # 먼저 입고된 로트부터 (received_date)
+FEFO = "FEFO"  # 유통기한 빠른 로트부터 (expiry_date, 유통기한 없는 로트는 맨 뒤 → 입고 순)
+
+_LOT_ORDER = {
+    FIFO: ("product_id", "received_date", "id"),
+    FEFO: ("product_id", F("expiry_date").asc(nulls_last=True), "received_date", "id"),
+}
+
+
+def check_strategy(strategy: str) -> str:
+    """지원하는 로트 차감 순서(FIFO/FEFO)인지 확인. issue_invoice 가 재고를 건드리기 전에 부른다."""
+    if strategy not in _LOT_ORDER:
+        raise ValueError(f"Unknown lot allocation strategy: {strategy}")
+    return strategy
+
+
+def allocate_lots(lines, strategy: str = FIFO) -> list[LotAllocation]:
+    """
+    인보이스 라인 수량을 입고 로트에서 strategy 순서(FIFO/FEFO)로 차감하고
+    LotAllocation을 만든다. issue_invoice 트랜잭션 안에서 호출.
+
+    쿼리: 남은 로트 잠금/조회 1 (inv_lot_open_fifo_idx / inv_lot_open_expiry_idx) + 로트 bulk_update 1 + allocation bulk_create 1.
+    로트 남은 수량이 부족하면(로트 없이 잡힌 과거 재고 등) 가능한 만큼만 배정한다.
+    재고 부족 자체는 MovementJournal(balance)에서 이미 막는다.
+    """
+    check_strategy(strategy)
+
+    product_ids = {ln.product_id for ln in lines}
+    if not product_ids:
+        return []
+
+    open_lots = defaultdict(list)
+    for lot in (
+        InventoryLot.objects
+        .select_for_update()
+        .filter(product_id__in=product_ids, qty_units_remaining__gt=0)
+        .order_by(*_LOT_ORDER[strategy])
+        .only("id", "product_id", "received_date", "expiry_date", "qty_units_remaining", "landed_cost_php_per_unit")
+    ):
+        open_lots[lot.product_id].append(lot)
+
+    allocations = []
+    touched = {}
+    for ln in lines:
+        need = ln.qty_units
+        queue = open_lots[ln.product_id]
+        while need > 0 and queue:
+            lot = queue[0]
+            take = min(need, lot.qty_units_remaining)
+            allocations.append(LotAllocation(
+                invoice_line=ln,
+                lot=lot,
+                qty_units=take,
+                unit_cost_php=lot.landed_cost_php_per_unit,
+            ))
+            lot.qty_units_remaining -= take
+            touched[lot.id] = lot
+            need -= take
+            if lot.qty_units_remaining <= 0:
+                queue.pop(0)
+
+    InventoryLot.objects.bulk_update(touched.values(), ["qty_units_remaining"], batch_size=2000)
+    return LotAllocation.objects.bulk_create(allocations, batch_size=2000)
+
+
+def release_lots(invoice_id: int) -> int:
+    """
+    인보이스의 LotAllocation을 되돌린다 (로트 남은 수량 복구 + allocation 삭제). cancel_invoice 트랜잭션 안에서 호출.
+    반환: 삭제한 allocation 수
+    """
+    allocations = LotAllocation.objects.filter(invoice_line__invoice_id=invoice_id)
+    restore = dict(
+        allocations.values("lot_id").annotate(qty=Sum("qty_units")).values_list("lot_id", "qty")
+    )
+    if not restore:
+        return 0
+
+    lots = list(InventoryLot.objects.select_for_update().filter(id__in=restore).only("id", "qty_units_remaining"))
+    for lot in lots:
+        lot.qty_units_remaining += Decimal(restore[lot.id])
+    InventoryLot.objects.bulk_update(lots, ["qty_units_remaining"], batch_size=2000)
+
+    deleted, _ = allocations.delete()
+    return deleted
+
+
+def lot_customers(lot_id: int) -> list[dict]:
+    """
+    "로트 X를 받은 고객" 추적. 인보이스별 1행.
+    lot_id 인덱스(FK) → invoice_line/invoice/customer PK 조인만 타므로 테이블 스캔 없음.
+    반환: [{"customer_id", "customer_name", "invoice_id", "invoice_no", "issue_date", "qty_units"}, ...]
+    """
+    return list(
+        LotAllocation.objects
+        .filter(lot_id=lot_id)
+        .values(
+            customer_id=F("invoice_line__invoice__customer_id"),
+            customer_name=F("invoice_line__invoice__customer__name"),
+            invoice_id=F("invoice_line__invoice_id"),
+            invoice_no=F("invoice_line__invoice__invoice_no"),
+            issue_date=F("invoice_line__invoice__issue_date"),
+        )
+        .annotate(qty_units=Sum("qty_units"))
+        .order_by("issue_date", "invoice_id")
+    )
+
+
+def invoice_lots(invoice_id: int) -> list[dict]:
+    """인보이스 라인별로 어느 로트에서 얼마나, 얼마 원가로 나갔는지 (로트별 매출원가)."""
+    return list(
+        LotAllocation.objects
+        .filter(invoice_line__invoice_id=invoice_id)
+        .order_by("invoice_line_id", "lot__received_date", "lot_id")
+        .values(
+            "invoice_line_id", "lot_id", "qty_units", "unit_cost_php",
+            sku_code=F("lot__product__sku_code"),
+            received_date=F("lot__received_date"),
+            supplier_name=F("lot__supplier__name"),
+        )
+    )
@@ -1,11 +1,14 @@
 # sales/services/invoicing.py
 
 from decimal import Decimal
+from django.conf import settings
 from django.db import transaction
-from django.utils import timezone
 
-from sales.models import SalesInvoice
-from inventory.models import InventoryBalance, StockMovement
+from core.bulk import update_fields_by_pk
+from sales.models import SalesInvoice, SalesInvoiceLine
+from inventory.models import StockMovement
+from inventory.services.journal import MovementJournal
+from sales.services.allocation import allocate_lots, check_strategy, release_lots
 
 
 def _suggested_price_from_quote(invoice: SalesInvoice, product_id: int):
@@ -30,26 +33,14 @@ def _suggested_price_from_quote(invoice: SalesInvoice, product_id: int):
     return ql.final_price_php_per_unit
 
 
-def _ensure_balance_locked(product_id: int) -> InventoryBalance:
+@transaction.atomic
+def issue_invoice(invoice_id: int, *, lot_strategy: str | None = None) -> SalesInvoice:
     """
-    InventoryBalance를 '락 걸고' 가져온다.
-    - 존재하면: select_for_update()로 row lock
-    - 없으면: 생성 후 다시 select_for_update()로 가져옴
+    lot_strategy: 로트 차감 순서 "FIFO"(입고 순) / "FEFO"(유통기한 순).
+    None이면 settings.SALES_LOT_ALLOCATION_STRATEGY. 모르는 값이면 아무것도 쓰기 전에 ValueError.
     """
-    try:
-        return InventoryBalance.objects.select_for_update().get(product_id=product_id)
-    except InventoryBalance.DoesNotExist:
-        InventoryBalance.objects.create(
-            product_id=product_id,
-            on_hand_qty_units=Decimal("0"),
-            avg_cost_php_per_unit=Decimal("0"),
-            last_updated_at=timezone.now(),
-        )
-        return InventoryBalance.objects.select_for_update().get(product_id=product_id)
+    strategy = check_strategy(lot_strategy or settings.SALES_LOT_ALLOCATION_STRATEGY)
 
-
-@transaction.atomic
-def issue_invoice(invoice_id: int) -> SalesInvoice:
     # invoice row lock
     invoice = SalesInvoice.objects.select_for_update().get(id=invoice_id)
 
@@ -91,70 +82,29 @@ def issue_invoice(invoice_id: int) -> SalesInvoice:
                 f"Set Adjusted(manual) price or ensure QuoteBatch has QuoteLine for this product."
             )
 
-        ln.save(update_fields=["suggested_unit_price_php", "final_unit_price_php"])
+    # 라인 가격 저장은 executemany 1회 (라인마다 save() 하면 트랜잭션이 라인 수만큼 길어짐)
+    update_fields_by_pk(SalesInvoiceLine, lines, ["suggested_unit_price_php", "final_unit_price_php"])
 
-    # 2) 재고 차감(OUT) — balance도 row lock
-    for ln in lines:
-        if not ln.qty_units or ln.qty_units <= 0:
-            continue
-
-        bal = _ensure_balance_locked(ln.product_id)
-
-        if bal.on_hand_qty_units < ln.qty_units:
-            raise ValueError(
-                f"Insufficient stock for {ln.product.sku_code}. "
-                f"On hand={bal.on_hand_qty_units}, required={ln.qty_units}"
+    # 2) 재고 차감(OUT) — 품목별로 합산해서 balance 잠금/검사/차감은 journal commit에서 한 번에
+    #    (재고 부족이면 InsufficientStock(ValueError) → 트랜잭션 전체 롤백)
+    with MovementJournal() as journal:
+        for ln in lines:
+            journal.add_out(
+                product_id=ln.product_id,
+                qty_units=ln.qty_units,
+                ref_table="sales_salesinvoice",
+                ref_id=invoice.id,
+                memo=f"Invoice {invoice.invoice_no} issued",
             )
 
-        bal.on_hand_qty_units = bal.on_hand_qty_units - ln.qty_units
-        bal.last_updated_at = timezone.now()
-        bal.save(update_fields=["on_hand_qty_units", "last_updated_at"])
-
-        StockMovement.objects.create(
-            product_id=ln.product_id,
-            movement_type=StockMovement.OUT,
-            qty_units=ln.qty_units,
-            ref_table="sales_salesinvoice",
-            ref_id=invoice.id,
-            memo=f"Invoice {invoice.invoice_no} issued",
-        )
+    # 3) 로트 차감(FIFO/FEFO) — 라인별 LotAllocation 기록 (로트별 원가/추적용)
+    allocate_lots(lines, strategy)
 
-    # 3) invoice 상태 변경 (같은 트랜잭션 안에서)
+    # 4) invoice 상태 변경 (같은 트랜잭션 안에서)
     invoice.status = SalesInvoice.ISSUED
     invoice.save(update_fields=["status"])
     return invoice
 
-def cancel_invoice(invoice: SalesInvoice):
-    """
-    Cancel an ISSUED sales invoice and restore inventory.
-
-    Rules:
-    - Only ISSUED invoices can be cancelled
-    - Inventory is restored via IN StockMovement
-    - Original OUT movements are NEVER deleted
-    - Duplicate cancel is blocked
-    """
-
-    if invoice.status != SalesInvoice.ISSUED:
-        raise ValueError("Only ISSUED invoices can be cancelled.")
-
-    with transaction.atomic():
-        # 1. Invoice 상태 변경
-        invoice.status = SalesInvoice.CANCELLED
-        invoice.save(update_fields=["status"])
-
-        # 2. 재고 원복 (IN movement 생성)
-        for line in invoice.lines.all():
-            StockMovement.objects.create(
-                movement_type=StockMovement.IN,
-                product=line.product,
-                qty_units=line.qty_units,
-                ref_table="sales_salesinvoice",
-                ref_id=invoice.id,
-                memo=f"Invoice {invoice.invoice_no} cancelled – stock restored",
-                created_at=timezone.now(),
-            )
-
 # sales/services/invoicing.py (맨 아래에 추가)
 
 @transaction.atomic
@@ -186,26 +136,21 @@ def cancel_invoice(invoice_id: int) -> SalesInvoice:
     if not lines:
         raise ValueError("Invoice has no lines.")
 
-    # 1) 재고 원복 (balance row lock + qty add)
-    for ln in lines:
-        if not ln.qty_units or ln.qty_units <= 0:
-            continue
-
-        bal = _ensure_balance_locked(ln.product_id)
-        bal.on_hand_qty_units = bal.on_hand_qty_units + ln.qty_units
-        bal.last_updated_at = timezone.now()
-        bal.save(update_fields=["on_hand_qty_units", "last_updated_at"])
-
-        StockMovement.objects.create(
-            product_id=ln.product_id,
-            movement_type=StockMovement.IN,
-            qty_units=ln.qty_units,
-            ref_table="sales_salesinvoice",
-            ref_id=invoice.id,
-            memo=f"Invoice {invoice.invoice_no} cancelled – stock restored",
-        )
+    # 1) 재고 원복 (IN, 원가 없이 → 현재 평균원가 유지)
+    with MovementJournal() as journal:
+        for ln in lines:
+            journal.add_in(
+                product_id=ln.product_id,
+                qty_units=ln.qty_units,
+                ref_table="sales_salesinvoice",
+                ref_id=invoice.id,
+                memo=f"Invoice {invoice.invoice_no} cancelled – stock restored",
+            )
+
+    # 2) 로트 배정 되돌리기 (남은 수량 복구)
+    release_lots(invoice.id)
 
-    # 2) invoice 상태 변경
+    # 3) invoice 상태 변경
     invoice.status = SalesInvoice.CANCELLED
     invoice.save(update_fields=["status"])
     return invoice
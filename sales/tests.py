@@ -1,3 +1,277 @@
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.http import StreamingHttpResponse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventory.models import InventoryBalance, InventoryLot, Product, StockMovement
+from inventory.services.costing import create_inventory_lot
+from inventory.services.journal import InsufficientStock, MovementJournal
+from partners.models import Partner
+from sales.models import LotAllocation, SalesInvoice, SalesInvoiceLine
+from sales.services.allocation import invoice_lots, lot_customers, release_lots
+from sales.services.invoicing import cancel_invoice, issue_invoice
+
+
+def receive(product, supplier, qty, krw_per_unit, received_date=date(2026, 3, 2), expiry_date=None):
+    """환율 0.05, 마크업/운임 0 → 로트 원가 = krw_per_unit * 0.05 PHP."""
+    return create_inventory_lot(
+        product=product,
+        supplier_id=supplier.id,
+        received_date=received_date,
+        expiry_date=expiry_date,
+        qty_units_received=Decimal(qty),
+        fx_rate_snapshot=Decimal("0.050000"),
+        supplier_cost_krw_per_unit=Decimal(krw_per_unit),
+        supplier_markup_rate_snapshot=Decimal("0"),
+        transport_mode="OCEAN",
+        transport_krw_per_kg_snapshot=Decimal("0"),
+        billable_weight_kg_total=Decimal("0"),
+    )
+
+
+class InvoiceStockFlowTests(TestCase):
+    """입고 → ISSUE → CANCEL: MovementJournal 로 쓰는 재고/평균원가/이동 행이 단계마다 맞는지."""
+
+    def setUp(self):
+        self.supplier = Partner.objects.create(partner_type="SUPPLIER", name="Flow supplier")
+        self.customer = Partner.objects.create(partner_type="CUSTOMER", name="Flow customer")
+        self.a, self.b = (
+            Product.objects.create(
+                sku_code=f"FLOW-{c}", name_en=c, base_unit="pack", net_weight_kg_per_unit=Decimal("1.0000"),
+            )
+            for c in "AB"
+        )
+
+    def _invoice(self, no, *lines):
+        invoice = SalesInvoice.objects.create(invoice_no=no, customer=self.customer)
+        for product, qty in lines:
+            SalesInvoiceLine.objects.create(
+                invoice=invoice, product=product, qty_units=Decimal(qty), manual_unit_price_php=Decimal("150"),
+            )
+        return invoice
+
+    def _balance(self, product):
+        b = InventoryBalance.objects.get(product=product)
+        return b.on_hand_qty_units, b.avg_cost_php_per_unit
+
+    def _movements(self, product):
+        return list(
+            StockMovement.objects.filter(product=product).order_by("id").values_list("movement_type", "qty_units", "ref_table")
+        )
+
+    def test_receive_issue_cancel(self):
+        receive(self.a, self.supplier, 10, 2000)  # 100 PHP
+        self.assertEqual(self._balance(self.a), (Decimal("10"), Decimal("100")))
+        self.assertEqual(self._movements(self.a), [("IN", Decimal("10"), "inventory_inventorylot")])
+
+        invoice = self._invoice("FLOW-1", (self.a, 3), (self.a, 1))  # 같은 품목 두 줄 → balance 쓰기 1번
+        issue_invoice(invoice.id)
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.status, SalesInvoice.ISSUED)
+        self.assertEqual(self._balance(self.a), (Decimal("6"), Decimal("100")))  # OUT 은 평균원가 그대로
+        self.assertEqual(self._movements(self.a)[1:], [
+            ("OUT", Decimal("3"), "sales_salesinvoice"),
+            ("OUT", Decimal("1"), "sales_salesinvoice"),
+        ])
+        self.assertEqual(
+            list(invoice.lines.values_list("final_unit_price_php", flat=True)), [Decimal("150"), Decimal("150")],
+        )
+
+        receive(self.a, self.supplier, 10, 2600)  # 130 PHP → (6*100 + 10*130) / 16 = 118.75
+        self.assertEqual(self._balance(self.a), (Decimal("16"), Decimal("118.75")))
+
+        # 취소 복구 IN 은 원가 없이 → 지금 평균원가로 들어온 것으로 본다 (평균원가 그대로)
+        cancel_invoice(invoice.id)
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.status, SalesInvoice.CANCELLED)
+        self.assertEqual(self._balance(self.a), (Decimal("20"), Decimal("118.75")))
+        self.assertEqual([m[:2] for m in self._movements(self.a)[4:]], [("IN", Decimal("3")), ("IN", Decimal("1"))])
+        with self.assertRaisesMessage(ValueError, "Only ISSUED"):
+            cancel_invoice(invoice.id)
+
+        # ADJ: 부호 있는 증감, 평균원가 그대로
+        with MovementJournal() as journal:
+            journal.add_adj(product_id=self.a.id, qty_units=Decimal("-2"), ref_table="manual")
+            journal.add_adj(product_id=self.b.id, qty_units=Decimal("5"), ref_table="manual")
+        self.assertEqual(self._balance(self.a), (Decimal("18"), Decimal("118.75")))
+        self.assertEqual(self._balance(self.b), (Decimal("5"), Decimal("0")))  # balance 가 없던 품목은 새로 생김
+        self.assertEqual(self._movements(self.a)[-1], ("ADJ", Decimal("-2"), "manual"))
+
+    def test_cancel_after_stock_ran_out_restores_at_last_average(self):
+        receive(self.a, self.supplier, 4, 2000)
+        invoice = self._invoice("FLOW-2", (self.a, 4))
+        issue_invoice(invoice.id)
+        self.assertEqual(self._balance(self.a), (Decimal("0"), Decimal("100")))  # 0 이 돼도 평균원가는 남는다
+
+        cancel_invoice(invoice.id)
+        self.assertEqual(self._balance(self.a), (Decimal("4"), Decimal("100")))
+
+    def test_insufficient_stock_rolls_back_everything(self):
+        receive(self.a, self.supplier, 10, 2000)
+        receive(self.b, self.supplier, 2, 2000)
+        before = StockMovement.objects.count()
+
+        invoice = self._invoice("FLOW-3", (self.a, 5), (self.b, 3))
+        with self.assertRaisesMessage(InsufficientStock, "Insufficient stock for FLOW-B"):
+            issue_invoice(invoice.id)
+
+        self.assertEqual(StockMovement.objects.count(), before)
+        self.assertEqual(self._balance(self.a), (Decimal("10"), Decimal("100")))
+        self.assertEqual(self._balance(self.b), (Decimal("2"), Decimal("100")))
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.status, SalesInvoice.DRAFT)
+
+        # journal 단독: 한 품목이라도 음수가 되면 아무것도 쓰지 않음
+        journal = MovementJournal()
+        journal.add_in(product_id=self.a.id, qty_units=Decimal("1"), unit_cost_php=Decimal("1"))
+        journal.add_out(product_id=self.b.id, qty_units=Decimal("3"))
+        with self.assertRaises(InsufficientStock):
+            journal.commit()
+        self.assertEqual(StockMovement.objects.count(), before)
+        self.assertEqual(self._balance(self.a), (Decimal("10"), Decimal("100")))
+
+    def test_fefo_consumes_earliest_expiry_first(self):
+        no_expiry = receive(self.a, self.supplier, 5, 2000, received_date=date(2026, 3, 1))
+        late = receive(self.a, self.supplier, 4, 2000, received_date=date(2026, 3, 2), expiry_date=date(2026, 9, 1))
+        early = receive(self.a, self.supplier, 3, 2000, received_date=date(2026, 3, 3), expiry_date=date(2026, 6, 1))
+
+        invoice = self._invoice("FLOW-4", (self.a, 9))
+        issue_invoice(invoice.id, lot_strategy="FEFO")
+
+        # 유통기한 빠른 순 (입고 순과 반대), 유통기한 없는 로트는 맨 뒤
+        self.assertEqual(
+            list(LotAllocation.objects.order_by("id").values_list("lot_id", "qty_units")),
+            [(early.id, Decimal("3")), (late.id, Decimal("4")), (no_expiry.id, Decimal("2"))],
+        )
+        self.assertEqual(
+            dict(InventoryLot.objects.values_list("id", "qty_units_remaining")),
+            {no_expiry.id: Decimal("3"), late.id: Decimal("0"), early.id: Decimal("0")},
+        )
+
+    def test_fifo_issue_lot_trace_and_release(self):
+        l1 = receive(self.a, self.supplier, 3, 2000, received_date=date(2026, 3, 1))  # 100 PHP
+        l2 = receive(self.a, self.supplier, 4, 2600, received_date=date(2026, 3, 2))  # 130 PHP
+        l3 = receive(self.a, self.supplier, 5, 3000, received_date=date(2026, 3, 3))  # 150 PHP
+
+        invoice = self._invoice("FLOW-6", (self.a, 5), (self.a, 3))  # 두 줄이 세 로트에 걸침
+        issue_invoice(invoice.id)
+        line1, line2 = invoice.lines.order_by("id").values_list("id", flat=True)
+        self.assertEqual(
+            [(r["invoice_line_id"], r["lot_id"], r["qty_units"], r["unit_cost_php"]) for r in invoice_lots(invoice.id)],
+            [
+                (line1, l1.id, Decimal("3"), Decimal("100")),
+                (line1, l2.id, Decimal("2"), Decimal("130")),
+                (line2, l2.id, Decimal("2"), Decimal("130")),
+                (line2, l3.id, Decimal("1"), Decimal("150")),
+            ],
+        )
+        self.assertEqual({(r["sku_code"], r["supplier_name"]) for r in invoice_lots(invoice.id)}, {("FLOW-A", "Flow supplier")})
+
+        other = Partner.objects.create(partner_type="CUSTOMER", name="Other customer")
+        second = SalesInvoice.objects.create(invoice_no="FLOW-7", customer=other)
+        SalesInvoiceLine.objects.create(invoice=second, product=self.a, qty_units=Decimal("2"), manual_unit_price_php=Decimal("150"))
+        issue_invoice(second.id)
+
+        def customers(lot):
+            return [(r["customer_name"], r["invoice_no"], r["qty_units"]) for r in lot_customers(lot.id)]
+
+        self.assertEqual(customers(l2), [("Flow customer", "FLOW-6", Decimal("4"))])  # 두 줄 합계
+        self.assertEqual(customers(l3), [("Flow customer", "FLOW-6", Decimal("1")), ("Other customer", "FLOW-7", Decimal("2"))])
+        self.assertEqual(lot_customers(l1.id)[0]["customer_id"], self.customer.id)
+
+        cancel_invoice(invoice.id)
+        self.assertEqual(
+            dict(InventoryLot.objects.values_list("id", "qty_units_remaining")),
+            {l1.id: Decimal("3"), l2.id: Decimal("4"), l3.id: Decimal("3")},
+        )
+        self.assertEqual(invoice_lots(invoice.id), [])
+        self.assertEqual(customers(l3), [("Other customer", "FLOW-7", Decimal("2"))])
+        self.assertEqual(release_lots(invoice.id), 0)
+
+    def test_unknown_strategy_raises_before_stock_is_written(self):
+        receive(self.a, self.supplier, 10, 2000)
+        before = StockMovement.objects.count()
+        invoice = self._invoice("FLOW-5", (self.a, 3))
+
+        with CaptureQueriesContext(connection) as ctx:
+            with self.assertRaisesMessage(ValueError, "Unknown lot allocation strategy: LIFO"):
+                issue_invoice(invoice.id, lot_strategy="LIFO")
+        self.assertFalse([q["sql"] for q in ctx.captured_queries if not q["sql"].startswith(("SAVEPOINT", "ROLLBACK", "RELEASE"))])
+
+        self.assertEqual(StockMovement.objects.count(), before)
+        self.assertEqual(self._balance(self.a), (Decimal("10"), Decimal("100")))
+        self.assertFalse(LotAllocation.objects.exists())
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.status, SalesInvoice.DRAFT)
+
+
+class SalesExportTests(TestCase):
+    """CSV export 스트리밍: 고객별 매출(GROUP BY 고객), 인보이스 상세 — 헤더/행/StreamingHttpResponse."""
+
+    def setUp(self):
+        supplier = Partner.objects.create(partner_type="SUPPLIER", name="Export supplier")
+        self.product = Product.objects.create(
+            sku_code="EXP-1", name_en="Export product", name_ko="수출 품목", base_unit="pack",
+            net_weight_kg_per_unit=Decimal("1.0000"),
+        )
+        receive(self.product, supplier, 100, 2000)
+        self.alpha = Partner.objects.create(partner_type="CUSTOMER", name="Alpha", name_ko="알파")
+        self.twins = [Partner.objects.create(partner_type="CUSTOMER", name="Twin") for _ in range(2)]
+
+    def _invoice(self, no, customer, qty, price, *, issue_date=date(2026, 3, 10), issue=True):
+        invoice = SalesInvoice.objects.create(invoice_no=no, customer=customer, issue_date=issue_date)
+        SalesInvoiceLine.objects.create(
+            invoice=invoice, product=self.product, qty_units=Decimal(qty), manual_unit_price_php=Decimal(price),
+        )
+        if issue:
+            issue_invoice(invoice.id)
+        return invoice
+
+    @staticmethod
+    def _csv(response):
+        return list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode("utf-8-sig"))))
+
+    def test_sales_report_csv_groups_by_customer(self):
+        self._invoice("EXP-1", self.alpha, 2, "150")
+        self._invoice("EXP-2", self.alpha, 1, "150")
+        self._invoice("EXP-3", self.twins[0], 1, "100")
+        self._invoice("EXP-4", self.twins[1], 2, "100")  # 이름이 같은 다른 고객 → 따로 집계
+        self._invoice("EXP-5", self.alpha, 9, "999", issue=False)  # DRAFT 제외
+        self._invoice("EXP-6", self.twins[0], 1, "50", issue_date=date(2026, 2, 1))
+
+        response = self.client.get(reverse("sales:sales_report_export_csv"))
+        self.assertIsInstance(response, StreamingHttpResponse)
+        rows = self._csv(response)
+        self.assertEqual(rows[0], ["Customer(EN)", "Customer(KO)", "Total Sales (PHP)"])
+        self.assertEqual([(name, name_ko, Decimal(total)) for name, name_ko, total in rows[1:]], [
+            ("Alpha", "알파", Decimal("450")),
+            ("Twin", "", Decimal("200")),
+            ("Twin", "", Decimal("150")),
+        ])
+
+        rows = self._csv(self.client.get(reverse("sales:sales_report_export_csv"), {"date_from": "2026-03-01"}))
+        self.assertEqual([(name, Decimal(total)) for name, _, total in rows[1:]], [
+            ("Alpha", Decimal("450")), ("Twin", Decimal("200")), ("Twin", Decimal("100")),
+        ])
+
+    def test_invoice_detail_csv(self):
+        invoice = self._invoice("EXP-7", self.alpha, 3, "120.50")
 
-# Create your tests here.
+        response = self.client.get(reverse("sales:invoice_detail_export_csv", args=[invoice.id]))
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertIn('filename="invoice_EXP-7.csv"', response["Content-Disposition"])
+        rows = self._csv(response)
+        self.assertEqual(rows[:5], [
+            ["Invoice No", "EXP-7"], ["Customer", "Alpha"], ["Issue Date", "2026-03-10"], ["Status", "ISSUED"], [],
+        ])
+        self.assertEqual(rows[5], ["SKU", "Product(EN)", "Product(KO)", "Qty", "Price per unit (PHP)", "Total amount (PHP)"])
+        sku, name_en, name_ko, qty, unit, total = rows[6]
+        self.assertEqual((sku, name_en, name_ko), ("EXP-1", "Export product", "수출 품목"))
+        self.assertEqual((Decimal(qty), Decimal(unit), Decimal(total)), (Decimal("3"), Decimal("120.50"), Decimal("361.50")))
+        self.assertEqual(rows[7:], [[], ["TOTAL (PHP)", rows[6][5]]])
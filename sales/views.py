@@ -7,27 +7,17 @@ from decimal import Decimal
 
 from django.db.models import F, Sum, Count, ExpressionWrapper, DecimalField
 from django.db.models.functions import Coalesce
-from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, render
 from django.utils.dateparse import parse_date
 
+from core.exports import iter_values, stream_csv
+from inventory.services.balance_cache import get_balances
 from partners.models import Partner
 from sales.models import SalesInvoice, SalesInvoiceLine
-import csv
 from django.shortcuts import get_object_or_404
 
 from sales.models import SalesInvoice
 
-def _csv_response_with_bom(filename: str) -> HttpResponse:
-    """
-    Excel에서 UTF-8 한글이 깨지지 않도록 BOM을 포함한 CSV 응답을 만든다.
-    """
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    response.write("\ufeff")  # UTF-8 BOM
-    return response
-
-
 def sales_report(request):
     """
     Sales Report (ISSUED only)
@@ -93,54 +83,37 @@ def sales_report(request):
 
 
 def sales_report_export_csv(request):
+    """
+    고객별 총매출 CSV. 집계는 DB에서 (GROUP BY customer) 하고 결과만 스트리밍한다.
+    """
     date_from = parse_date(request.GET.get("date_from", "") or "")
     date_to = parse_date(request.GET.get("date_to", "") or "")
 
-    qs = (
-        SalesInvoice.objects
-        .filter(status=SalesInvoice.ISSUED)
-        .select_related("customer")
-        .prefetch_related("lines")
-        .order_by("-issue_date", "-id")
-    )
+    qs = SalesInvoice.objects.filter(status=SalesInvoice.ISSUED)
     if date_from:
         qs = qs.filter(issue_date__gte=date_from)
     if date_to:
         qs = qs.filter(issue_date__lte=date_to)
 
-    by_customer = defaultdict(lambda: {
-        "customer_id": None,
-        "customer_en": "",
-        "customer_ko": "",
-        "total_php": Decimal("0"),
-    })
-
-    for inv in qs:
-        ckey = inv.customer_id
-        row = by_customer[ckey]
-        row["customer_id"] = ckey
-        row["customer_en"] = getattr(inv.customer, "name_en", "") or getattr(inv.customer, "name", "") or str(inv.customer)
-        row["customer_ko"] = getattr(inv.customer, "name_ko", "") or ""
-        for ln in inv.lines.all():
-            if ln.final_unit_price_php is None:
-                continue
-            row["total_php"] += (ln.final_unit_price_php * ln.qty_units)
-
-    # ✅ 1) CSV도 동일하게 내림차순
-    sorted_rows = sorted(
-        by_customer.values(),
-        key=lambda x: (-x["total_php"], (x["customer_en"] or "")),
+    line_total_expr = ExpressionWrapper(
+        F("lines__final_unit_price_php") * F("lines__qty_units"),
+        output_field=DecimalField(max_digits=18, decimal_places=4),
     )
 
-    import csv
-    response = _csv_response_with_bom("sales_report.csv")
-    writer = csv.writer(response)
-    writer.writerow(["Customer(EN)", "Customer(KO)", "Total Sales (PHP)"])
+    # ✅ 1) CSV도 동일하게 내림차순 (동점이면 이름으로)
+    # GROUP BY 는 고객 id + 출력하는 이름 컬럼까지 명시 (id 로 묶으므로 이름이 같은 고객도 따로 집계)
+    grouped = (
+        qs.values("customer_id", "customer__name", "customer__name_ko")
+        .annotate(total_php=Coalesce(Sum(line_total_expr), Decimal("0")))
+        .order_by("-total_php", "customer__name", "customer_id")
+    )
 
-    for r in sorted_rows:
-        writer.writerow([r["customer_en"], r["customer_ko"], str(r["total_php"])])
+    def rows():
+        yield ["Customer(EN)", "Customer(KO)", "Total Sales (PHP)"]
+        for _, name, name_ko, total in iter_values(grouped, "customer_id", "customer__name", "customer__name_ko", "total_php"):
+            yield [name, name_ko or "", total]
 
-    return response
+    return stream_csv("sales_report.csv", rows())
 
 
 def customer_detail_report(request, customer_id: int):
@@ -220,25 +193,16 @@ def customer_detail_report_export_csv(request, customer_id: int):
         .order_by("product__sku_code")
     )
 
-    import csv
-    response = _csv_response_with_bom(f"customer_{customer_id}_purchase_report.csv")
-    writer = csv.writer(response)
-
-    writer.writerow(["Customer", str(customer)])
-    writer.writerow(["Date from", request.GET.get("date_from", ""), "Date to", request.GET.get("date_to", "")])
-    writer.writerow([])
-    writer.writerow(["SKU", "Product(EN)", "Product(KO)", "Total Qty", "Total Amount (PHP)"])
-
-    for r in rows:
-        writer.writerow([
-            r["product__sku_code"],
-            r["product__name_en"],
-            r["product__name_ko"],
-            str(r["total_qty"]),
-            str(r["total_amount"]),
-        ])
+    def csv_rows():
+        yield ["Customer", str(customer)]
+        yield ["Date from", request.GET.get("date_from", ""), "Date to", request.GET.get("date_to", "")]
+        yield []
+        yield ["SKU", "Product(EN)", "Product(KO)", "Total Qty", "Total Amount (PHP)"]
+        yield from iter_values(
+            rows, "product__sku_code", "product__name_en", "product__name_ko", "total_qty", "total_amount",
+        )
 
-    return response
+    return stream_csv(f"customer_{customer_id}_purchase_report.csv", csv_rows())
 
 
 def invoice_detail(request, invoice_id: int):
@@ -246,6 +210,7 @@ def invoice_detail(request, invoice_id: int):
     ✅ 인보이스 상세 조회:
     - 헤더(고객/날짜/상태)
     - 라인(SKU/이름/수량/단가/금액)
+    - DRAFT: 라인별 현재 재고(On Hand)와 부족 여부 (balance 읽기 캐시 1회 조회)
     """
     invoice = get_object_or_404(
         SalesInvoice.objects.select_related("customer").prefetch_related("lines", "lines__product"),
@@ -259,10 +224,22 @@ def invoice_detail(request, invoice_id: int):
             continue
         total_php += (ln.final_unit_price_php * ln.qty_units)
 
+    is_draft = invoice.status == SalesInvoice.DRAFT
+    if is_draft:
+        lines = list(invoice.lines.all())
+        on_hand = get_balances(ln.product_id for ln in lines)
+        needed = defaultdict(lambda: Decimal("0"))
+        for ln in lines:
+            needed[ln.product_id] += ln.qty_units
+        for ln in lines:
+            ln.on_hand = on_hand[ln.product_id].on_hand_qty_units
+            ln.is_short = needed[ln.product_id] > ln.on_hand
+
     context = {
         "invoice": invoice,
         "lines": invoice.lines.all(),
         "total_php": total_php,
+        "is_draft": is_draft,
     }
     return render(request, "sales/invoice_detail.html", context)
 
@@ -277,57 +254,37 @@ def invoice_detail_export_csv(request, invoice_id: int):
         id=invoice_id,
     )
 
-    # ✅ BOM 포함 CSV 응답 (이미 프로젝트에 _csv_response_with_bom()이 있으면 그걸 그대로 사용)
-    try:
-        response = _csv_response_with_bom(f"invoice_{invoice.invoice_no}.csv")  # type: ignore
-    except NameError:
-        # fallback (혹시 함수명이 다르거나 없는 경우)
-        from django.http import HttpResponse
-        response = HttpResponse(content_type="text/csv; charset=utf-8")
-        response["Content-Disposition"] = f'attachment; filename="invoice_{invoice.invoice_no}.csv"'
-        response.write("\ufeff")
+    def rows():
+        # Header block
+        yield ["Invoice No", invoice.invoice_no]
+        yield ["Customer", str(invoice.customer)]
+        yield ["Issue Date", str(invoice.issue_date)]
+        yield ["Status", invoice.status]
+        yield []
 
-    writer = csv.writer(response)
+        # Line header
+        yield ["SKU", "Product(EN)", "Product(KO)", "Qty", "Price per unit (PHP)", "Total amount (PHP)"]
 
-    # Header block
-    writer.writerow(["Invoice No", invoice.invoice_no])
-    writer.writerow(["Customer", str(invoice.customer)])
-    writer.writerow(["Issue Date", str(invoice.issue_date)])
-    writer.writerow(["Status", invoice.status])
-    writer.writerow([])
+        total_php = Decimal("0")
+        for ln in invoice.lines.all():
+            unit = ln.final_unit_price_php or Decimal("0")
+            qty = ln.qty_units or Decimal("0")
+            line_total = unit * qty
+            total_php += line_total
 
-    # Line header
-    writer.writerow(["SKU", "Product(EN)", "Product(KO)", "Qty", "Price per unit (PHP)", "Total amount (PHP)"])
+            yield [
+                ln.product.sku_code,
+                ln.product.name_en,
+                ln.product.name_ko,
+                str(qty),
+                str(unit),
+                str(line_total),
+            ]
 
-    total_php = Decimal("0")
-    for ln in invoice.lines.all():
-        unit = ln.final_unit_price_php or Decimal("0")
-        qty = ln.qty_units or Decimal("0")
-        line_total = unit * qty
-        total_php += line_total
-
-        writer.writerow([
-            ln.product.sku_code,
-            ln.product.name_en,
-            ln.product.name_ko,
-            str(qty),
-            str(unit),
-            str(line_total),
-        ])
-
-    writer.writerow([])
-    writer.writerow(["TOTAL (PHP)", str(total_php)])
-
-    return response
-
-def _csv_response_with_bom(filename: str) -> HttpResponse:
-    """
-    Excel UTF-8 한글 깨짐 방지용 BOM 포함 CSV
-    """
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    response.write("\ufeff")
-    return response
+        yield []
+        yield ["TOTAL (PHP)", str(total_php)]
+
+    return stream_csv(f"invoice_{invoice.invoice_no}.csv", rows())
 
 
 def _parse_date(s: str):
@@ -436,28 +393,20 @@ def product_performance_export_csv(request):
         .order_by("-sales_php", "-qty_sold")
     )
 
-    response = _csv_response_with_bom("product_performance.csv")
-    w = csv.writer(response)
+    def rows():
+        yield ["Date from", date_from]
+        yield ["Date to", date_to]
+        yield ["Channel", channel or "ALL"]
+        yield []
 
-    w.writerow(["Date from", date_from])
-    w.writerow(["Date to", date_to])
-    w.writerow(["Channel", channel or "ALL"])
-    w.writerow([])
+        yield ["SKU", "Name(EN)", "Name(KO)", "Qty Sold", "Sales (PHP)", "#Invoices", "Avg Unit Price (PHP)"]
 
-    w.writerow(["SKU", "Name(EN)", "Name(KO)", "Qty Sold", "Sales (PHP)", "#Invoices", "Avg Unit Price (PHP)"])
+        for sku, name_en, name_ko, qty_sold, sales_php, invoice_count in iter_values(
+            grouped, "product__sku_code", "product__name_en", "product__name_ko", "qty_sold", "sales_php", "invoice_count",
+        ):
+            qty = Decimal(str(qty_sold or 0))
+            sales = Decimal(str(sales_php or 0))
+            avg = (sales / qty) if qty > 0 else Decimal("0")
+            yield [sku, name_en, name_ko, str(qty), str(sales), str(invoice_count), str(avg)]
 
-    for r in grouped:
-        qty = Decimal(str(r["qty_sold"] or 0))
-        sales = Decimal(str(r["sales_php"] or 0))
-        avg = (sales / qty) if qty > 0 else Decimal("0")
-        w.writerow([
-            r["product__sku_code"],
-            r["product__name_en"],
-            r["product__name_ko"],
-            str(qty),
-            str(sales),
-            str(r["invoice_count"]),
-            str(avg),
-        ])
-
-    return response
\ No newline at end of file
+    return stream_csv("product_performance.csv", rows())